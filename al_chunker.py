@@ -0,0 +1,142 @@
+"""
+AL-Chunker
+
+Zerlegt AL-Objekte für die Vektorisierung in Abschnitte begrenzter Größe. mxbai-embed-large
+schneidet lange Eingaben ab, ein Embedding über eine ganze Codeunit mit tausenden Zeilen
+beschreibt also nur ihren Anfang. Geteilt wird an Strukturgrenzen:
+
+- procedure / trigger (samt vorangestellten Attributen wie [EventSubscriber(...)] und ///-Kommentaren)
+- Abschnitte wie fields, keys, fieldgroups, layout, actions, dataset, requestpage
+- einzelne field(...), fieldgroup(...), key(...), dataitem(...), column(...), action(...) usw.
+
+Aufeinanderfolgende Segmente werden zu Chunks bis CHUNK_MAX_CHARS Zeichen zusammengefasst,
+längere Segmente an Zeilengrenzen geteilt. Jeder Chunk außer dem ersten beginnt mit der
+Objektdeklaration (z.B. codeunit 50100 "Sales Mgt."), damit er für sich allein einordenbar
+bleibt. Objekte bis CHUNK_MAX_CHARS ergeben genau einen Chunk mit dem unveränderten Inhalt;
+dessen Embedding kommt damit aus dem Embedding-Cache der ganzen Datei.
+
+Die Chunks stehen in der LanceDB-Tabelle namespace_chunks mit (root, id) der Datei als
+Elternschlüssel; search_objects fasst Treffer auf Objektebene zusammen.
+"""
+
+import os
+import re
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+from al_scanner import find_declaration
+from vector_storage import search_table
+
+# Etwa 512 Token von mxbai-embed-large bei AL-Code
+CHUNK_MAX_CHARS = int(os.environ.get("AL_CHUNK_MAX_CHARS", "2000"))
+CHUNK_TABLE = "namespace_chunks"
+# Chunks pro gewünschtem Objekt, die search_objects holt, bevor nach Objekt gruppiert wird
+CHUNK_SEARCH_FANOUT = 8
+
+_ROUTINE = re.compile(
+    r'^[ \t]*(?:(?:local|internal|protected)[ \t]+)?(procedure|trigger)[ \t]+("[^"\r\n]+"|\w+)', re.IGNORECASE
+)
+_SECTION = re.compile(
+    r'^[ \t]*(fields|keys|fieldgroups|layout|actions|views|dataset|requestpage|elements|labels|rendering)[ \t]*$',
+    re.IGNORECASE,
+)
+_ELEMENT = re.compile(
+    r'^[ \t]*(field|fieldgroup|key|dataitem|column|area|group|part|action|value|tableelement|fieldelement)'
+    r'[ \t]*\([ \t]*(?:\d+[ \t]*;[ \t]*)?("[^"\r\n]+"|[\w.]+)',
+    re.IGNORECASE,
+)
+# Attribute und Dokumentationskommentare gehören zur folgenden Prozedur
+_PREAMBLE = re.compile(r'^[ \t]*(\[|///)')
+
+class ALChunk(NamedTuple):
+    index: int
+    content: str
+    # Erstes Strukturelement im Chunk, z.B. "procedure PostDocument" oder "field No."
+    label: str
+    start_line: int
+
+def _boundary_label(line: str) -> Optional[str]:
+    m = _ROUTINE.match(line) or _ELEMENT.match(line)
+    if m:
+        name = m.group(2).strip('"')
+        return f"{m.group(1).lower()} {name}"
+    m = _SECTION.match(line)
+    if m:
+        return m.group(1).lower()
+    return None
+
+def split_segments(lines: Sequence[str]) -> List[tuple]:
+    """(Startzeile, Endzeile exklusiv, Label) der Struktursegmente; das erste ist der Objektkopf."""
+    starts = [(0, "header")]
+    preamble_start = None
+    for i, line in enumerate(lines):
+        if _PREAMBLE.match(line):
+            if preamble_start is None:
+                preamble_start = i
+            continue
+        label = _boundary_label(line)
+        if label:
+            start = preamble_start if preamble_start is not None else i
+            if start > 0:
+                starts.append((start, label))
+        if line.strip():
+            preamble_start = None
+    segments = []
+    for n, (start, label) in enumerate(starts):
+        end = starts[n + 1][0] if n + 1 < len(starts) else len(lines)
+        if end > start:
+            segments.append((start, end, label))
+    return segments
+
+def chunk_al_object(content: str, max_chars: int = CHUNK_MAX_CHARS) -> List[ALChunk]:
+    """Zerlege AL-Code in Chunks von höchstens etwa max_chars Zeichen (siehe Modulbeschreibung)."""
+    if len(content) <= max_chars:
+        return [ALChunk(0, content, "header", 0)]
+    m = find_declaration(content)
+    prefix = f"{m.group(0).strip()}\n" if m else ""
+    budget = max(max_chars - len(prefix), max_chars // 2)
+    lines = content.splitlines(keepends=True)
+
+    chunks: List[ALChunk] = []
+    current: List[str] = []
+    current_label, current_start, size = "", 0, 0
+
+    def flush():
+        nonlocal current, size
+        if current:
+            text = "".join(current)
+            chunks.append(ALChunk(len(chunks), text if not chunks else prefix + text, current_label, current_start))
+        current, size = [], 0
+
+    for start, end, label in split_segments(lines):
+        segment_size = sum(len(line) for line in lines[start:end])
+        if current and size + segment_size > budget:
+            flush()
+        for line_no in range(start, end):
+            line = lines[line_no]
+            # Segmente über dem Budget an Zeilengrenzen teilen
+            if current and size + len(line) > budget:
+                flush()
+            if not current:
+                current_label, current_start = label, line_no
+            current.append(line)
+            size += len(line)
+    flush()
+    return chunks
+
+def search_objects(table, query_embedding: List[float], top_k: int = 3,
+                   fanout: int = CHUNK_SEARCH_FANOUT, where: Optional[str] = None) -> List[Dict]:
+    """
+    Ähnlichste Objekte über ihre Chunks: holt top_k * fanout Chunks, gruppiert nach (root, id)
+    und bewertet jedes Objekt mit dem besten Chunk. Liefert je Objekt die Zeile des besten
+    Chunks (mit _distance und label) plus matched_chunks.
+    """
+    objects: "OrderedDict[tuple, Dict]" = OrderedDict()
+    for row in search_table(table, query_embedding, top_k * fanout, where):
+        key = (row.get("root"), row.get("id"))
+        if key in objects:
+            objects[key]["matched_chunks"] += 1
+            continue
+        # Treffer kommen nach Distanz sortiert, der erste Chunk eines Objekts ist sein bester
+        objects[key] = {**row, "matched_chunks": 1}
+    return list(objects.values())[:top_k]
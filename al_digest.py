@@ -0,0 +1,137 @@
+"""
+AL-Digest
+
+Kompakte Textfassung eines AL-Objekts für das Embedding. Der Rohtext besteht zu einem großen
+Teil aus Lizenzkopf, Kommentaren, Captions und ToolTips (oft in mehreren Sprachen), Einrückung
+und langen Feldlisten; mxbai-embed-large sieht davon nur den Anfang. Der Digest enthält nur,
+was ein Objekt einordnet:
+
+    codeunit 80 "Sales-Post"
+    namespace: Microsoft.Sales.Posting
+    caption: Sales-Post
+    source table: Sales Header
+    procedures: PostDocument, CheckLines, ...
+    triggers: OnRun
+    publishes events: OnBeforePostSalesDoc, ...
+    subscribes to: codeunit "Release Sales Document".OnAfterReleaseSalesDoc, ...
+    references: table "Sales Header", codeunit "Release Sales Document", ...
+
+Objektkopf kommt aus al_scanner, Referenzen und Event-Abonnements aus al_lexer, Prozeduren,
+Trigger, Felder, Schlüssel usw. aus den Strukturgrenzen von al_chunker. Jede Liste ist auf
+DIGEST_MAX_ITEMS Einträge begrenzt (Referenzen nach Häufigkeit).
+
+strip_boilerplate entfernt aus Code-Abschnitten (Chunks großer Objekte) Kommentare,
+Caption-/ToolTip-Eigenschaften und Einrückung. estimate_tokens schätzt die Token einer Eingabe
+für die Auswertung im Vectorizer.
+"""
+
+import os
+import re
+from collections import Counter
+from typing import Dict, List
+
+from al_chunker import split_segments
+from al_lexer import iter_references
+from al_scanner import scan_al_text
+
+DIGEST_MAX_ITEMS = int(os.environ.get("AL_DIGEST_MAX_ITEMS", "60"))
+# Teil des Hashes, über den der Vectorizer unveränderte Dateien erkennt: ein neues Format bettet alles neu ein
+DIGEST_VERSION = "al-digest-1"
+
+_EVENT_PUBLISHER = re.compile(
+    r'\[\s*(IntegrationEvent|BusinessEvent|InternalEvent)\b[^\]]*\](?:\s*\[[^\]]*\])*\s*'
+    r'(?:(?:local|internal|protected)\s+)?procedure\s+("[^"\r\n]+"|\w+)',
+    re.IGNORECASE,
+)
+_CAPTION = re.compile(r"^[ \t]*Caption[ \t]*=[ \t]*'((?:[^'\r\n]|'')*)'", re.IGNORECASE | re.MULTILINE)
+# Kommentare entfernen, String-Literale (die // enthalten können) unverändert lassen
+_COMMENT_OR_STRING = re.compile(r"'(?:[^'\r\n]|'')*'|//[^\n]*|/\*.*?\*/", re.DOTALL)
+_BOILERPLATE_PROPERTY = re.compile(
+    r'^[ \t]*(Caption|CaptionML|ToolTip|ToolTipML|OptionCaption|OptionCaptionML|AboutTitle|AboutText|'
+    r'InstructionalText|InstructionalTextML|AdditionalSearchTerms|AdditionalSearchTermsML)[ \t]*=',
+    re.IGNORECASE,
+)
+_TOKEN = re.compile(r"\w+|[^\w\s]")
+
+# Strukturlabels aus al_chunker -> Zeile im Digest
+_STRUCTURE_LINES = [
+    ("procedure", "procedures"),
+    ("trigger", "triggers"),
+    ("field", "fields"),
+    ("key", "keys"),
+    ("dataitem", "dataitems"),
+    ("column", "columns"),
+    ("action", "actions"),
+    ("value", "values"),
+    ("part", "parts"),
+]
+
+def _quote(name: str) -> str:
+    return f'"{name}"' if not re.fullmatch(r"\w+", name) else name
+
+def _join(items: List[str]) -> str:
+    items = list(dict.fromkeys(items))
+    text = ", ".join(items[:DIGEST_MAX_ITEMS])
+    if len(items) > DIGEST_MAX_ITEMS:
+        text += f", ... (+{len(items) - DIGEST_MAX_ITEMS})"
+    return text
+
+def build_digest(content: str) -> str:
+    """Digest eines AL-Objekts (siehe Modulbeschreibung); ohne Objektdeklaration der Inhalt selbst."""
+    header = scan_al_text(content)
+    if header is None:
+        return content
+    obj_type, obj_id, obj_name, namespace, _ = header
+    lines = [f"{obj_type.lower()} {obj_id + ' ' if obj_id else ''}{_quote(obj_name)}"]
+    if namespace:
+        lines.append(f"namespace: {namespace}")
+    caption = _CAPTION.search(content)
+    if caption and caption.group(1) != obj_name:
+        lines.append(f"caption: {caption.group(1)}")
+
+    singles: Dict[str, List[str]] = {"extends": [], "implements": [], "source_table": []}
+    subscriptions: List[str] = []
+    references: Counter = Counter()
+    self_key = (obj_type.lower(), obj_name.lower())
+    for ref in iter_references(content):
+        if ref.kind in singles:
+            singles[ref.kind].append(_quote(ref.object_name))
+        elif ref.kind == "event_subscriber":
+            subscriptions.append(f"{ref.object_type} {_quote(ref.object_name)}.{ref.detail}")
+        elif ref.object_name and (ref.object_type, ref.object_name.lower()) != self_key:
+            references[f"{ref.object_type} {_quote(ref.object_name)}"] += 1
+    for kind, label in (("extends", "extends"), ("implements", "implements"), ("source_table", "source table")):
+        if singles[kind]:
+            lines.append(f"{label}: {_join(singles[kind])}")
+
+    structure: Dict[str, List[str]] = {kind: [] for kind, _ in _STRUCTURE_LINES}
+    for _, _, label in split_segments(content.splitlines()):
+        kind, _, name = label.partition(" ")
+        if name and kind in structure:
+            structure[kind].append(_quote(name))
+    for kind, label in _STRUCTURE_LINES:
+        if structure[kind]:
+            lines.append(f"{label}: {_join(structure[kind])}")
+
+    publishers = [_quote(m.group(2).strip('"')) for m in _EVENT_PUBLISHER.finditer(content)]
+    if publishers:
+        lines.append(f"publishes events: {_join(publishers)}")
+    if subscriptions:
+        lines.append(f"subscribes to: {_join(subscriptions)}")
+    if references:
+        lines.append(f"references: {_join([name for name, _ in references.most_common()])}")
+    return "\n".join(lines)
+
+def strip_boilerplate(content: str) -> str:
+    """AL-Code ohne Kommentare, Caption-/ToolTip-Eigenschaften, Einrückung und Leerzeilen."""
+    code = _COMMENT_OR_STRING.sub(lambda m: m.group(0) if m.group(0).startswith("'") else "", content)
+    lines = []
+    for line in code.splitlines():
+        line = line.strip()
+        if line and not _BOILERPLATE_PROPERTY.match(line):
+            lines.append(line)
+    return "\n".join(lines)
+
+def estimate_tokens(text: str) -> int:
+    """Grobe Token-Schätzung (Wörter und Satzzeichen), genügt für den Vergleich vorher/nachher."""
+    return len(_TOKEN.findall(text))
@@ -0,0 +1,493 @@
+"""
+AL-Index
+
+Gemeinsame, persistente Index-Schicht für AL-Objekte.
+
+Der Index speichert pro Datei ein Manifest (Pfad, mtime, Größe, Content-Hash) zusammen
+mit dem gescannten Objektkopf. Beim Start wird das Manifest geladen und nur Dateien,
+die hinzugekommen, geändert oder gelöscht wurden, werden neu geparst. Alle Skripte
+(build_al_index, namespace_review, namespace_suggester, rag_namespace_review) laden
+den Index über load_al_index, statt die Roots jedes Mal komplett neu zu scannen.
+
+Gespeichert wird der Index als Arrow-IPC-Datei (eine Zeile pro Datei, Spalten für Typ,
+Namespace, Verzeichnis und Root dictionary-kodiert). Die Datei wird per Memory-Map geöffnet;
+Zeilen werden erst beim Zugriff in Python-Dicts umgewandelt.
+
+Pro Root gibt es einen eigenen Shard in AL_INDEX_DIR, der mit dem Fingerprint des Roots
+(Git-HEAD bei sauberem Arbeitsbaum) gespeichert wird. Stimmt der Fingerprint, wird der Shard
+ohne Verzeichnisdurchlauf übernommen. Die selten geänderten Roots (Base Application pro
+BC-Version, KBA) werden so nur einmal gebaut; neu gescannt werden nur die HC/MTC-Shards.
+Beim Laden werden die Shards in Root-Reihenfolge zusammengeführt.
+
+Mit CHANGE_DETECTION=git merkt sich jeder Shard zusätzlich einen Git-Snapshot (HEAD-Commit und
+die zu dem Zeitpunkt uncommitteten Dateien). Beim nächsten Lauf liefert git diff die seither geänderten
+Dateien; nur diese werden geprüft, der Verzeichnisdurchlauf entfällt.
+
+Läuft al_watch.py, hält es die Shards der überwachten Roots laufend aktuell und schreibt einen
+Heartbeat nach AL_INDEX_DIR. Solange dieser frisch ist, werden die Shards ohne Abgleich übernommen.
+"""
+
+import os
+import re
+import json
+import codecs
+import hashlib
+import time
+from collections import defaultdict
+from typing import Dict, Tuple, List, Iterator, Optional
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from al_scanner import decode_al, scan_al_headers, scan_al_text
+from file_discovery import iter_file_entries
+from git_changes import CHANGE_DETECTION, changes_since, git_snapshot, root_fingerprint
+
+AL_INDEX_DIR = "al_index"
+AL_INDEX_VERSION = "6"
+WATCH_HEARTBEAT_FILE = "watch.json"
+# Ein Heartbeat älter als diese Anzahl Sekunden gilt als beendeter Watcher
+WATCH_HEARTBEAT_TIMEOUT = 15
+OBJECT_NAME_PREFIXES = ("KVSMED", "KVSMTC", "KVSKBA")
+# Referenzarten, die auf einen anderen Objekttyp zeigen (Record "X" / Database::"X" -> table)
+REFERENCE_TYPE_ALIASES = {"record": "table", "database": "table"}
+
+AL_INDEX_SCHEMA = pa.schema(
+    [
+        ("filepath", pa.string()),
+        ("root", pa.dictionary(pa.int32(), pa.string())),
+        ("directory", pa.dictionary(pa.int32(), pa.string())),
+        ("mtime", pa.int64()),
+        ("size", pa.int64()),
+        ("hash", pa.string()),
+        ("object_type", pa.dictionary(pa.int32(), pa.string())),
+        ("object_id", pa.string()),
+        ("object_name", pa.string()),
+        ("namespace", pa.dictionary(pa.int32(), pa.string())),
+        ("offset", pa.int64()),
+    ],
+    metadata={"al_index_version": AL_INDEX_VERSION},
+)
+
+def normalize_path(path: str) -> str:
+    return path.replace("\\", "/")
+
+def root_prefix(root: str) -> str:
+    """Normalisierter Root-Pfad mit abschließendem '/', für Präfixvergleiche."""
+    return normalize_path(root).rstrip("/") + "/"
+
+def root_key(root: str) -> str:
+    """Vergleichsschlüssel eines Roots: root_prefix ohne Groß-/Kleinschreibung (wie shard_path)."""
+    return root_prefix(root).lower()
+
+def _root_mask(column: pa.ChunkedArray, roots: List[str]):
+    """Zeilen, deren Spalte root zu einem der Roots gehört, unabhängig von der Schreibweise."""
+    keys = pa.array([root_key(root) for root in roots], pa.string())
+    return pc.is_in(pc.utf8_lower(column.cast(pa.string())), value_set=keys)
+
+def is_under_roots(filepath: str, roots: List[str]) -> bool:
+    path = normalize_path(filepath)
+    return any(path.startswith(root_prefix(root)) for root in roots)
+
+def root_of(filepath: str, roots: List[str]) -> Optional[str]:
+    path = normalize_path(filepath)
+    for root in roots:
+        if path.startswith(root_prefix(root)):
+            return root
+    return None
+
+class ALSource:
+    """
+    Lazy Handle auf den Quelltext eines AL-Objekts (Pfad + Byte-Offset der Objektdeklaration).
+    Der Code wird erst bei read() gelesen und nicht im Index gehalten.
+    """
+    __slots__ = ("filepath", "offset")
+
+    def __init__(self, filepath: str, offset: int = 0):
+        self.filepath = filepath
+        self.offset = offset
+
+    def read(self, from_declaration: bool = False) -> str:
+        """Lies die Datei; mit from_declaration=True ohne Lizenzkopf, namespace- und using-Block."""
+        with open(self.filepath, "rb") as f:
+            if from_declaration:
+                f.seek(self.offset)
+            data = f.read()
+        return data.decode("utf-8-sig", errors="replace")
+
+    def __repr__(self) -> str:
+        return f"ALSource({self.filepath!r}, offset={self.offset})"
+
+def shard_path(root: str, index_dir: str = AL_INDEX_DIR) -> str:
+    """Dateiname des Shards: lesbarer Kurzname aus den letzten Pfadteilen plus Hash des Root-Pfads."""
+    parts = normalize_path(root).rstrip("/").split("/")[-2:]
+    slug = re.sub(r"[^\w.-]+", "_", "_".join(parts))
+    digest = hashlib.sha1(root_prefix(root).lower().encode("utf-8")).hexdigest()[:10]
+    return os.path.join(index_dir, f"{slug}-{digest}.arrow")
+
+def open_al_table(index_path: str) -> Optional[pa.Table]:
+    """Öffne eine Index-Datei per Memory-Map. Bei fehlender oder veralteter Datei wird None geliefert."""
+    if not os.path.exists(index_path):
+        return None
+    try:
+        table = pa.ipc.open_file(pa.memory_map(index_path, "r")).read_all()
+    except Exception as e:
+        print(f"WARNUNG: {index_path} konnte nicht gelesen werden ({e}), Index wird neu aufgebaut.")
+        return None
+    metadata = table.schema.metadata or {}
+    if metadata.get(b"al_index_version") != AL_INDEX_VERSION.encode():
+        return None
+    return table
+
+def table_metadata(table: Optional[pa.Table], key: str) -> Optional[str]:
+    if table is None:
+        return None
+    value = (table.schema.metadata or {}).get(key.encode("utf-8"))
+    return value.decode("utf-8") if value else None
+
+def table_fingerprint(table: Optional[pa.Table]) -> Optional[str]:
+    return table_metadata(table, "fingerprint")
+
+def write_al_table(table: pa.Table, index_path: str, metadata: Optional[Dict[str, str]] = None) -> None:
+    """Schreibe die Tabelle mit Versionskennung und optionalen Metadaten (fingerprint, git_snapshot)."""
+    # IPC-Dateien erlauben nur ein Dictionary pro Spalte, daher vorher vereinheitlichen
+    table = table.unify_dictionaries().combine_chunks()
+    metadata = {key: value for key, value in (metadata or {}).items() if value}
+    metadata["al_index_version"] = AL_INDEX_VERSION
+    table = table.replace_schema_metadata(metadata)
+    os.makedirs(os.path.dirname(index_path) or ".", exist_ok=True)
+    tmp_path = index_path + ".tmp"
+    with pa.OSFile(tmp_path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, index_path)
+
+def _empty_rows() -> Dict[str, list]:
+    return {name: [] for name in AL_INDEX_SCHEMA.names}
+
+def _add_row(rows: Dict[str, list], path: str, root: str, st: os.stat_result, digest: Optional[str], header) -> None:
+    obj_type, obj_id, obj_name, namespace, offset = header or (None, None, None, None, None)
+    rows["filepath"].append(path)
+    # Immer als root_prefix, damit verschiedene Schreibweisen desselben Roots übereinstimmen
+    rows["root"].append(root_prefix(root) if root else None)
+    rows["directory"].append(path.rsplit("/", 1)[0])
+    rows["mtime"].append(st.st_mtime_ns)
+    rows["size"].append(st.st_size)
+    rows["hash"].append(digest)
+    rows["object_type"].append(obj_type)
+    rows["object_id"].append(obj_id)
+    rows["object_name"].append(obj_name)
+    rows["namespace"].append(namespace)
+    rows["offset"].append(offset)
+
+def update_al_table(
+    table: Optional[pa.Table], roots: List[str], candidates: Optional[List[str]] = None
+) -> Tuple[Optional[pa.Table], int, int, int]:
+    """
+    Gleiche die Index-Tabelle mit dem Dateisystem ab.
+    Dateien mit unveränderter mtime und Größe werden nicht gelesen. Neue Dateien werden im
+    Prozess-Pool nur bis zur Objektdeklaration gelesen; ihr Content-Hash wird erst berechnet,
+    wenn sich mtime oder Größe ändern. Dann entscheidet der Hash, ob neu geparst werden muss.
+    Mit candidates (z.B. aus git diff) werden nur diese Dateien geprüft statt die Roots zu
+    durchlaufen; nicht mehr vorhandene Kandidaten werden entfernt, alle anderen Zeilen bleiben.
+    Gibt (neue Tabelle oder None falls unverändert, neu, geändert, gelöscht) zurück.
+    """
+    paths, mtimes, sizes, hashes = [], [], [], []
+    if table is not None:
+        paths = table.column("filepath").to_pylist()
+        mtimes = table.column("mtime").to_pylist()
+        sizes = table.column("size").to_pylist()
+        hashes = table.column("hash").to_pylist()
+    known = {path: i for i, path in enumerate(paths)}
+    rows = _empty_rows()
+    keep = []
+    seen = set()
+    new_files = []
+    changed = 0
+    if candidates is None:
+        files = ((entry.path, entry.stat) for entry in iter_file_entries(roots, (".al",)))
+    else:
+        files = ((filepath, lambda filepath=filepath: os.stat(filepath)) for filepath in candidates)
+    for filepath, stat in files:
+        path = normalize_path(filepath)
+        try:
+            st = stat()
+        except OSError:
+            continue
+        seen.add(path)
+        i = known.get(path)
+        if i is not None and mtimes[i] == st.st_mtime_ns and sizes[i] == st.st_size:
+            keep.append(i)
+            continue
+        if i is None:
+            new_files.append((path, st))
+            continue
+        try:
+            with open(filepath, "rb") as f:
+                data = f.read()
+        except OSError as e:
+            print(f"Fehler beim Lesen von {filepath}: {e}")
+            continue
+        digest = hashlib.sha256(data).hexdigest()
+        root = root_of(path, roots)
+        if hashes[i] == digest:
+            # Nur angefasst (z.B. Checkout), Inhalt unverändert: Objektkopf übernehmen
+            old = table.slice(i, 1).to_pylist()[0]
+            header = (old["object_type"], old["object_id"], old["object_name"], old["namespace"], old["offset"])
+            _add_row(rows, path, root, st, digest, header if old["object_name"] else None)
+            continue
+        bom = len(codecs.BOM_UTF8) if data.startswith(codecs.BOM_UTF8) else 0
+        _add_row(rows, path, root, st, digest, scan_al_text(decode_al(data[bom:]), bom))
+        changed += 1
+    if new_files:
+        stats = dict(new_files)
+        for path, header in scan_al_headers([path for path, _ in new_files]):
+            _add_row(rows, path, root_of(path, roots), stats[path], None, header)
+    # Zeilen anderer Roots bleiben erhalten, nicht mehr vorhandene Dateien der eigenen Roots fallen weg
+    prefixes = [root_prefix(root) for root in roots]
+    targets = None if candidates is None else {normalize_path(filepath) for filepath in candidates}
+    deleted = 0
+    for i, path in enumerate(paths):
+        if path in seen:
+            continue
+        if targets is not None:
+            gone = path in targets
+        else:
+            gone = any(path.startswith(prefix) for prefix in prefixes)
+        if gone:
+            deleted += 1
+        else:
+            keep.append(i)
+    if table is not None and not rows["filepath"] and not deleted:
+        return None, 0, 0, 0
+    parts = [pa.Table.from_pydict(rows, schema=AL_INDEX_SCHEMA)]
+    if table is not None:
+        # take() kopiert, die neue Tabelle hängt damit nicht mehr an der Memory-Map der alten Datei
+        parts.insert(0, table.take(pa.array(sorted(keep), pa.int64())))
+    merged = pa.concat_tables(parts)
+    # Nach Root-Reihenfolge und Pfad sortiert speichern, damit beim Laden nicht sortiert werden muss
+    rank = {root_key(root): idx for idx, root in enumerate(roots)}
+    merged_roots = merged.column("root").to_pylist()
+    merged_paths = merged.column("filepath").to_pylist()
+    order = sorted(
+        range(merged.num_rows),
+        key=lambda i: (rank.get(merged_roots[i] and merged_roots[i].lower(), len(roots)), merged_paths[i]),
+    )
+    # Typ explizit, eine leere Liste wäre sonst vom Typ null
+    return merged.take(pa.array(order, pa.int64())), len(new_files), changed, deleted
+
+def strip_object_prefix(name: str) -> str:
+    """
+    Entferne das Produktpräfix (KVSMED/KVSMTC/KVSKBA) vom Objektnamen, samt Leerzeichen
+    dazwischen ("KVSMED Sales Ext" -> "Sales Ext").
+    """
+    name = name.strip()
+    upper = name.upper()
+    for prefix in OBJECT_NAME_PREFIXES:
+        if upper.startswith(prefix):
+            return name[len(prefix):].strip()
+    return name
+
+class ALObjectIndex:
+    """
+    Nachschlage-Index über alle AL-Objekte mit O(1)-Zugriff nach Name, (Typ, Name),
+    (Typ, Objekt-Id) und Name ohne Produktpräfix (jeweils case-insensitive).
+    Ein Name darf in mehreren Roots vorkommen; die Einträge bleiben in Root-Reihenfolge
+    erhalten, get()/find() liefern den Treffer aus dem zuerst konfigurierten Root.
+
+    Grundlage ist die (memory-mapped) Arrow-Tabelle. Die Schlüssel-Dicts enthalten nur
+    Zeilennummern; Einträge werden erst beim Zugriff aus den Spalten erzeugt.
+    """
+
+    def __init__(self, table: pa.Table):
+        self.table = table
+        self._entries: Dict[int, Dict] = {}
+        self._by_name: Dict[str, List[int]] = defaultdict(list)
+        self._by_type_name: Dict[Tuple[str, str], List[int]] = defaultdict(list)
+        self._by_id: Dict[Tuple[str, str], List[int]] = defaultdict(list)
+        self._by_stripped_name: Dict[str, List[int]] = defaultdict(list)
+        types = table.column("object_type").to_pylist()
+        names = table.column("object_name").to_pylist()
+        ids = table.column("object_id").to_pylist()
+        for i, (obj_type, name, obj_id) in enumerate(zip(types, names, ids)):
+            obj_type = obj_type.lower()
+            name = name.lower()
+            self._by_name[name].append(i)
+            self._by_type_name[(obj_type, name)].append(i)
+            if obj_id:
+                self._by_id[(obj_type, obj_id)].append(i)
+            self._by_stripped_name[strip_object_prefix(name).lower()].append(i)
+
+    def __len__(self) -> int:
+        return self.table.num_rows
+
+    def __iter__(self) -> Iterator[Dict]:
+        for i in range(self.table.num_rows):
+            yield self._entry(i)
+
+    def _entry(self, i: int) -> Dict:
+        entry = self._entries.get(i)
+        if entry is None:
+            row = self.table.slice(i, 1).to_pylist()[0]
+            entry = {
+                "object_type": row["object_type"],
+                "object_id": row["object_id"],
+                "object_name": row["object_name"],
+                "namespace": row["namespace"],
+                "directory": row["directory"],
+                "filepath": row["filepath"],
+                "root": row["root"],
+                "source": ALSource(row["filepath"], row["offset"]),
+            }
+            self._entries[i] = entry
+        return entry
+
+    def _first(self, rows: List[int]) -> Optional[Dict]:
+        return self._entry(rows[0]) if rows else None
+
+    def find_all(self, name: str) -> List[Dict]:
+        return [self._entry(i) for i in self._by_name.get(name.lower(), [])]
+
+    def find(self, name: str) -> Optional[Dict]:
+        return self._first(self._by_name.get(name.lower(), []))
+
+    def get_all(self, obj_type: str, name: str) -> List[Dict]:
+        obj_type = REFERENCE_TYPE_ALIASES.get(obj_type.lower(), obj_type.lower())
+        return [self._entry(i) for i in self._by_type_name.get((obj_type, name.lower()), [])]
+
+    def get(self, obj_type: str, name: str) -> Optional[Dict]:
+        obj_type = REFERENCE_TYPE_ALIASES.get(obj_type.lower(), obj_type.lower())
+        return self._first(self._by_type_name.get((obj_type, name.lower()), []))
+
+    def by_id(self, obj_type: str, obj_id: str) -> Optional[Dict]:
+        obj_type = REFERENCE_TYPE_ALIASES.get(obj_type.lower(), obj_type.lower())
+        return self._first(self._by_id.get((obj_type, str(obj_id)), []))
+
+    def find_stripped(self, name: str) -> List[Dict]:
+        """Alle Objekte, deren Name ohne Produktpräfix übereinstimmt (z.B. HC- und MTC-Pendant)."""
+        return [self._entry(i) for i in self._by_stripped_name.get(strip_object_prefix(name).lower(), [])]
+
+    def query(self, columns: Optional[List[str]] = None, **equals) -> pa.Table:
+        """
+        Spaltenweise Abfrage direkt auf der Arrow-Tabelle,
+        z.B. query(["object_name", "filepath"], namespace="Microsoft.Sales.Document").
+        root wird in jeder Schreibweise des Roots erkannt (mit/ohne abschließendes '/').
+        """
+        mask = None
+        for column, value in equals.items():
+            if column == "root":
+                cond = _root_mask(self.table.column(column), [value])
+            else:
+                cond = pc.equal(self.table.column(column).cast(pa.string()), value)
+            mask = cond if mask is None else pc.and_(mask, cond)
+        table = self.table if mask is None else self.table.filter(mask)
+        return table.select(columns) if columns else table
+
+def build_object_index(table: Optional[pa.Table], roots: List[str]) -> ALObjectIndex:
+    """Baue den ALObjectIndex aus den Zeilen mit Objektkopf, die zu den angegebenen Roots gehören."""
+    if table is None:
+        table = pa.Table.from_pydict(_empty_rows(), schema=AL_INDEX_SCHEMA)
+    mask = pc.and_(
+        pc.is_valid(table.column("object_name")),
+        _root_mask(table.column("root"), roots),
+    )
+    if not pc.all(mask).as_py():
+        table = table.filter(mask)
+    return ALObjectIndex(table)
+
+def git_candidates(root: str, table: Optional[pa.Table]) -> Tuple[Optional[List[str]], Dict[str, str]]:
+    """
+    Kandidaten für den Abgleich per git diff seit dem im Shard gespeicherten Snapshot.
+    Liefert (Kandidaten oder None für vollen Durchlauf, Git-Metadaten für den neuen Shard).
+    """
+    snapshot = git_snapshot(root)
+    if snapshot is None:
+        return None, {}
+    git_state = {"git_snapshot": json.dumps(snapshot)}
+    previous = table_metadata(table, "git_snapshot")
+    changes = changes_since(root, json.loads(previous)) if previous else None
+    if changes is None:
+        return None, git_state
+    changed, deleted = changes
+    return [os.path.join(root, path) for path in sorted(changed | deleted)], git_state
+
+def write_watch_heartbeat(roots: List[str], index_dir: str = AL_INDEX_DIR) -> None:
+    """Vom Watcher regelmäßig aufgerufen: meldet, welche Roots gerade überwacht werden."""
+    os.makedirs(index_dir, exist_ok=True)
+    path = os.path.join(index_dir, WATCH_HEARTBEAT_FILE)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({"pid": os.getpid(), "roots": [root_prefix(root) for root in roots]}, f)
+    os.replace(path + ".tmp", path)
+
+def remove_watch_heartbeat(index_dir: str = AL_INDEX_DIR) -> None:
+    try:
+        os.remove(os.path.join(index_dir, WATCH_HEARTBEAT_FILE))
+    except OSError:
+        pass
+
+def watched_roots(index_dir: str = AL_INDEX_DIR) -> List[str]:
+    """Roots (als root_prefix), deren Shards ein laufender Watcher aktuell hält."""
+    path = os.path.join(index_dir, WATCH_HEARTBEAT_FILE)
+    try:
+        if time.time() - os.path.getmtime(path) > WATCH_HEARTBEAT_TIMEOUT:
+            return []
+        with open(path, encoding="utf-8") as f:
+            return json.load(f).get("roots", [])
+    except (OSError, ValueError):
+        return []
+
+def load_shard(
+    root: str, index_dir: str = AL_INDEX_DIR, rebuild: bool = False, candidates: Optional[List[str]] = None
+) -> Optional[pa.Table]:
+    """
+    Lade den Shard eines Roots. Passt der gespeicherte Fingerprint zum aktuellen Git-Stand
+    oder hält ein Watcher den Root aktuell, wird der Shard unverändert übernommen, sonst
+    inkrementell abgeglichen und neu geschrieben. Mit candidates (z.B. vom Watcher gemeldete
+    Dateien) werden nur diese abgeglichen.
+    """
+    path = shard_path(root, index_dir)
+    table = None if rebuild else open_al_table(path)
+    fingerprint = root_fingerprint(root)
+    if table is not None and candidates is None:
+        if fingerprint and table_fingerprint(table) == fingerprint:
+            print(f"AL-Index-Shard {root}: unverändert ({fingerprint[:16]}), {table.num_rows} Dateien.")
+            return table
+        if root_prefix(root) in watched_roots(index_dir):
+            print(f"AL-Index-Shard {root}: vom Watcher aktuell gehalten, {table.num_rows} Dateien.")
+            return table
+    git_state = {}
+    if candidates is not None:
+        # Der alte Snapshot bleibt gültig: git diff seit damals umfasst auch die jetzt abgeglichenen Dateien
+        git_state = {"git_snapshot": table_metadata(table, "git_snapshot")}
+    elif CHANGE_DETECTION == "git":
+        # Git-Stand vor dem Scan festhalten, spätere Änderungen erscheinen im nächsten git diff
+        candidates, git_state = git_candidates(root, table)
+        if candidates is not None:
+            print(f"AL-Index-Shard {root}: {len(candidates)} Dateien laut git diff zu prüfen.")
+    if table is None and candidates is not None:
+        candidates = None  # Ohne vorhandenen Shard muss der Root komplett gescannt werden
+    updated, added, changed, deleted = update_al_table(table, [root], candidates)
+    metadata = {"fingerprint": fingerprint, **git_state}
+    if updated is not None or any(table_metadata(table, key) != value for key, value in metadata.items()):
+        if updated is None:
+            updated = table.take(pa.array(range(table.num_rows), pa.int64()))
+        # Memory-Map der alten Datei freigeben, bevor sie ersetzt wird
+        table = None
+        write_al_table(updated, path, metadata)
+        updated = None
+        table = open_al_table(path)
+    print(f"AL-Index-Shard {root}: {added} neu, {changed} geändert, {deleted} gelöscht.")
+    return table
+
+def load_al_index(roots: List[str], index_dir: str = AL_INDEX_DIR, rebuild: bool = False) -> ALObjectIndex:
+    """
+    Lade den AL-Index für die angegebenen Roots aus den Shards und führe sie zusammen.
+    Mit rebuild=True werden die gespeicherten Shards verworfen und alles neu gescannt.
+    """
+    start = time.time()
+    tables = [table for table in (load_shard(root, index_dir, rebuild) for root in roots) if table is not None]
+    # Die Shards unterscheiden sich nur in den Metadaten (Fingerprint); zusammengeführt wird ohne Kopie
+    merged = pa.concat_tables([table.replace_schema_metadata(None) for table in tables]) if tables else None
+    obj_index = build_object_index(merged, roots)
+    print(f"AL-Index: {len(obj_index)} Objekte aus {len(tables)} Shards in {time.time() - start:.1f}s.")
+    return obj_index
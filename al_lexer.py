@@ -0,0 +1,119 @@
+"""
+AL-Lexer
+
+Extrahiert Objekt-Referenzen aus AL-Code in einem einzigen Durchlauf. Ein kombiniertes
+Muster zerlegt den Text in Kommentare, String-Literale, Quoted Identifier und die
+Referenz-Konstrukte; Kommentare und Strings werden dabei als Ganzes übersprungen, sodass
+auskommentierter Code und Texte in Labels keine Referenzen erzeugen. Namen dürfen in
+Anführungszeichen stehen und Leerzeichen enthalten (Record "Sales Header").
+
+Erkannte Referenzen (kind):
+    variable          Rec: Record "Sales Header";  Mgt: Codeunit "Sales-Post";  array[2] of Codeunit X
+    scope             Database::"Sales Header",  Page::"Customer Card",  Codeunit::X
+    run               Page.Run(21),  Report.RunModal(206, ...)   (Referenz über die Objekt-Id)
+    event_subscriber  [EventSubscriber(ObjectType::Codeunit, Codeunit::"Sales-Post", 'OnAfterPost...', ...)]
+    extends           pageextension 50100 "X" extends "Customer List"
+    source_table      SourceTable = "Sales Header";
+    table_relation    TableRelation = "Sales Header"."No.";
+    dataitem          dataitem(SalesHeader; "Sales Header")
+    implements        enum 50100 X implements "Price Calculation"
+"""
+
+import re
+from typing import Iterator, List, NamedTuple, Optional, Set, Tuple
+
+# Variablen-/Parametertypen und ::-Präfixe -> Objekttyp im AL-Index
+TYPE_KEYWORDS = {
+    "record": "table",
+    "database": "table",
+    "table": "table",
+    "page": "page",
+    "testpage": "page",
+    "codeunit": "codeunit",
+    "report": "report",
+    "testrequestpage": "report",
+    "xmlport": "xmlport",
+    "query": "query",
+    "enum": "enum",
+    "interface": "interface",
+}
+EXTENSION_BASE_TYPES = {
+    "tableextension": "table",
+    "pageextension": "page",
+    "reportextension": "report",
+    "enumextension": "enum",
+    "permissionsetextension": "permissionset",
+}
+PROPERTY_KINDS = {"sourcetable": "source_table", "tablerelation": "table_relation"}
+
+_NAME = r'"[^"\r\n]+"|[A-Za-z_]\w*'
+_DECL_TYPES = r"Record|Codeunit|Page|TestPage|Report|TestRequestPage|XmlPort|Query|Enum|Interface"
+_SCOPE_TYPES = r"Database|Table|Codeunit|Page|Report|XmlPort|Query|Enum"
+
+# Jede Alternative beginnt mit Satzzeichen oder am Wortanfang mit einem dieser Buchstaben. Der
+# vorgeschaltete Guard verhindert, dass die Alternativen an jeder Stelle innerhalb von Bezeichnern
+# erneut probiert werden (im synthetischen Baum von bench_al_lexer etwa Faktor 3).
+_START_GUARD = r"""(?:(?=[/'"\[:])|(?<!\w)(?=[dtpcrxqeiso]))"""
+
+# Strings enden spätestens am Zeilenende (wie in al_scanner): ein nicht geschlossenes ' verschluckt
+# sonst alle folgenden Deklarationen und Referenzen
+TOKEN_PATTERN = re.compile(
+    _START_GUARD + r"""(?:
+      (?P<skip>//[^\n]*|/\*.*?\*/|'(?:[^'\r\n]|'')*')
+    | (?P<subscriber>\[\s*EventSubscriber\s*\(\s*ObjectType\s*::\s*\w+\s*,\s*(?P<sub_type>\w+)\s*::\s*(?P<sub_name>{name})\s*,\s*'(?P<sub_event>[^']*)')
+    | (?P<extends>\b(?P<ext_type>tableextension|pageextension|reportextension|enumextension|permissionsetextension)\s+\d+\s+(?:{name})\s+extends\s+(?P<ext_name>{name}))
+    | (?P<scope>\b(?P<scope_type>{scope_types})\s*::\s*(?P<scope_name>{name}))
+    | (?P<variable>(?:(?<!:):(?!:)|\bof\b)\s*(?P<var_type>{decl_types})\s+(?P<var_name>{name}))
+    | (?P<run>\b(?P<run_type>Page|Report|Codeunit|XmlPort|Query)\s*\.\s*(?P<run_method>Run\w*)\s*\(\s*(?P<run_id>\d+)\b)
+    | (?P<property>\b(?P<prop>SourceTable|TableRelation)\s*=\s*(?!if\b)(?P<prop_name>{name}))
+    | (?P<dataitem>\bdataitem\s*\(\s*\w+\s*;\s*(?P<item_name>{name}))
+    | (?P<implements>\bimplements\s+(?P<impl_names>(?:{name})(?:\s*,\s*(?:{name}))*))
+    | (?P<quoted>"[^"\r\n]*")
+    )""".format(name=_NAME, decl_types=_DECL_TYPES, scope_types=_SCOPE_TYPES),
+    re.IGNORECASE | re.VERBOSE | re.DOTALL,
+)
+_IMPLEMENTS_NAME = re.compile(_NAME)
+
+class ALReference(NamedTuple):
+    kind: str
+    object_type: str
+    object_name: Optional[str]
+    object_id: Optional[str] = None
+    # Ereignisname (event_subscriber), Erweiterungstyp (extends) oder Methode (run)
+    detail: Optional[str] = None
+
+def _unquote(name: str) -> str:
+    return name.strip('"')
+
+def iter_references(al_code: str) -> Iterator[ALReference]:
+    """Liefere alle Referenzen im AL-Code in Textreihenfolge."""
+    for m in TOKEN_PATTERN.finditer(al_code):
+        kind = m.lastgroup
+        if kind in ("skip", "quoted"):
+            continue
+        if kind == "variable":
+            yield ALReference("variable", TYPE_KEYWORDS[m["var_type"].lower()], _unquote(m["var_name"]))
+        elif kind == "scope":
+            yield ALReference("scope", TYPE_KEYWORDS[m["scope_type"].lower()], _unquote(m["scope_name"]))
+        elif kind == "subscriber":
+            obj_type = TYPE_KEYWORDS.get(m["sub_type"].lower(), m["sub_type"].lower())
+            yield ALReference("event_subscriber", obj_type, _unquote(m["sub_name"]), detail=m["sub_event"])
+        elif kind == "extends":
+            ext_type = m["ext_type"].lower()
+            yield ALReference("extends", EXTENSION_BASE_TYPES[ext_type], _unquote(m["ext_name"]), detail=ext_type)
+        elif kind == "run":
+            yield ALReference("run", TYPE_KEYWORDS[m["run_type"].lower()], None, m["run_id"], m["run_method"])
+        elif kind == "property":
+            yield ALReference(PROPERTY_KINDS[m["prop"].lower()], "table", _unquote(m["prop_name"]))
+        elif kind == "dataitem":
+            yield ALReference("dataitem", "table", _unquote(m["item_name"]))
+        elif kind == "implements":
+            for name in _IMPLEMENTS_NAME.findall(m["impl_names"]):
+                yield ALReference("implements", "interface", _unquote(name))
+
+def extract_references(al_code: str) -> List[ALReference]:
+    return list(iter_references(al_code))
+
+def extract_reference_tuples(al_code: str) -> Set[Tuple[str, str]]:
+    """Eindeutige (object_type, object_name.lower())-Paare aller namentlichen Referenzen."""
+    return {(ref.object_type, ref.object_name.lower()) for ref in iter_references(al_code) if ref.object_name}
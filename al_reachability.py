@@ -0,0 +1,114 @@
+"""
+Erreichbarkeit von AL-Objekten
+
+Bestimmt, welche Objekte eines großen Roots (Base Application) von den eigenen Produkten
+(HC/MTC/KBA) aus überhaupt referenziert werden. Nur diese kommen als RAG-Kontext in Frage;
+der Vectorizer bettet mit VECTORIZE_BASE_APP=reachable nur sie ein statt aller Objekte.
+
+- Ausgangspunkt sind alle Objekte der Seed-Roots. Ihre Referenzen (al_lexer: Variablen,
+  Database::/Page::-Ausdrücke, Page.Run(21), extends, SourceTable, TableRelation, dataitem,
+  EventSubscriber, implements) werden über den AL-Index aufgelöst.
+- Erreichte Objekte der Ziel-Roots werden gelesen und ihre Referenzen ebenso verfolgt, bis
+  REACHABILITY_MAX_HOPS Schritte vom nächsten Seed-Objekt entfernt.
+- Zusätzlich je Namespace der Ziel-Roots bis zu REACHABILITY_NAMESPACE_SAMPLE Objekte,
+  gleichmäßig über die nach Pfad sortierten Objekte verteilt, damit jeder Namespace mit
+  Beispielen vertreten bleibt (Namespace-Vorschläge, generate_namespace_definitions).
+"""
+
+import os
+from collections import defaultdict
+from typing import Dict, Iterable, Iterator, List, Set
+
+from al_index import ALObjectIndex, ALSource, root_key, root_prefix
+from al_lexer import iter_references
+
+REACHABILITY_MAX_HOPS = int(os.environ.get("REACHABILITY_MAX_HOPS", "2"))
+REACHABILITY_NAMESPACE_SAMPLE = int(os.environ.get("REACHABILITY_NAMESPACE_SAMPLE", "3"))
+
+def resolve_references(obj_index: ALObjectIndex, content: str) -> Iterator[Dict]:
+    """Index-Einträge aller Objekte, die der AL-Code referenziert (über Name oder Objekt-Id)."""
+    for ref in iter_references(content):
+        if ref.object_name:
+            yield from obj_index.get_all(ref.object_type, ref.object_name)
+        elif ref.object_id:
+            entry = obj_index.by_id(ref.object_type, ref.object_id)
+            if entry:
+                yield entry
+
+def _filepaths(obj_index: ALObjectIndex, roots: Iterable[str]) -> List[str]:
+    paths = []
+    for root in roots:
+        paths.extend(obj_index.query(["filepath"], root=root).column("filepath").to_pylist())
+    return paths
+
+def reference_closure(obj_index: ALObjectIndex, seed_roots: List[str], target_roots: List[str],
+                      max_hops: int = REACHABILITY_MAX_HOPS) -> Dict[str, int]:
+    """Dateipfad -> Schritte vom nächsten Seed-Objekt, für alle erreichbaren Objekte der Ziel-Roots."""
+    # Die Spalte root enthält root_prefix, verglichen wird unabhängig von der Schreibweise
+    targets = {root_key(root) for root in target_roots}
+    hops: Dict[str, int] = {}
+    frontier = _filepaths(obj_index, seed_roots)
+    print(f"Erreichbarkeit: {len(frontier)} Seed-Objekte in {', '.join(seed_roots)}.")
+    for hop in range(1, max_hops + 1):
+        next_frontier = []
+        for filepath in frontier:
+            try:
+                content = ALSource(filepath).read()
+            except OSError as e:
+                print(f"Fehler beim Lesen von {filepath}: {e}")
+                continue
+            for entry in resolve_references(obj_index, content):
+                path = entry["filepath"]
+                if root_key(entry["root"]) in targets and path not in hops:
+                    hops[path] = hop
+                    next_frontier.append(path)
+        frontier = next_frontier
+        if not frontier:
+            break
+    return hops
+
+def namespace_sample(obj_index: ALObjectIndex, target_roots: List[str],
+                     sample_size: int = REACHABILITY_NAMESPACE_SAMPLE) -> Set[str]:
+    """Bis zu sample_size Dateipfade je Namespace, gleichmäßig über die sortierten Pfade verteilt."""
+    by_namespace = defaultdict(list)
+    for root in target_roots:
+        rows = obj_index.query(["filepath", "namespace"], root=root).to_pydict()
+        for filepath, namespace in zip(rows["filepath"], rows["namespace"]):
+            by_namespace[namespace or ""].append(filepath)
+    sample = set()
+    for paths in by_namespace.values():
+        paths.sort()
+        step = max(len(paths) / max(sample_size, 1), 1)
+        sample.update(paths[int(i * step)] for i in range(min(sample_size, len(paths))))
+    return sample
+
+def reachable_ids(obj_index: ALObjectIndex, seed_roots: List[str], target_roots: List[str]) -> Dict[str, Set[str]]:
+    """
+    Je Ziel-Root die Pfade relativ zum Root (ids wie im Vectorizer) der erreichbaren Objekte
+    und der Namespace-Stichprobe. Leer für Ziel-Roots, in denen kein Objekt erreicht wurde.
+    """
+    closure = reference_closure(obj_index, seed_roots, target_roots)
+    sample = namespace_sample(obj_index, target_roots)
+    selected: Dict[str, Set[str]] = {root: set() for root in target_roots}
+    # Dateipfad -> Ziel-Root in der Schreibweise des Aufrufers (Schlüssel von selected)
+    rows = {}
+    for root in target_roots:
+        for filepath in obj_index.query(["filepath"], root=root).column("filepath").to_pylist():
+            rows[filepath] = root
+    # Ohne ein einziges erreichtes Objekt (keine Seed-Objekte, Referenzen nicht aufgelöst) ist
+    # auch die Stichprobe keine sinnvolle Auswahl: der Root bleibt leer, der Vectorizer überspringt ihn
+    reached_roots = {rows[filepath] for filepath in closure if filepath in rows}
+    for filepath in closure.keys() | sample:
+        root = rows.get(filepath)
+        if root in reached_roots:
+            selected[root].add(os.path.relpath(filepath, root_prefix(root)))
+    per_hop = defaultdict(int)
+    for hop in closure.values():
+        per_hop[hop] += 1
+    print(
+        f"Erreichbarkeit: {len(rows)} Objekte in {', '.join(target_roots)}, davon "
+        + (", ".join(f"{count} nach {hop} Schritt(en)" for hop, count in sorted(per_hop.items())) or "keines erreicht")
+        + f", {len(sample - closure.keys())} zusätzlich als Namespace-Stichprobe; "
+        f"ausgewählt {sum(len(ids) for ids in selected.values())}."
+    )
+    return selected
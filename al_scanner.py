@@ -0,0 +1,125 @@
+"""
+AL-Scanner
+
+Liest nur den Kopf einer AL-Datei: die Datei wird in kleinen Blöcken gelesen, bis die
+Objektdeklaration gefunden ist (eine namespace-Anweisung steht in AL immer davor).
+Das Ergebnis ist ein kompaktes Tupel, damit es billig zwischen Prozessen übertragen werden kann.
+
+Kommentare und String-Literale werden wie in al_lexer als Ganzes übersprungen, eine
+auskommentierte Deklaration zählt also nicht. Die Datei wird mit errors="surrogateescape"
+dekodiert: ungültige UTF-8-Bytes bleiben so einzeln erhalten und der Byte-Offset der
+Deklaration stimmt mit der Datei überein (ALSource.read springt dorthin).
+
+Für viele Dateien verteilt scan_al_headers die Arbeit auf einen ProcessPoolExecutor,
+da die Regex-Auswertung CPU-gebunden ist und Threads am GIL serialisiert würden.
+"""
+
+import os
+import re
+import codecs
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+HEADER_CHUNK_SIZE = 4096
+# Unterhalb dieser Dateianzahl lohnt sich der Start eines Prozess-Pools nicht
+PROCESS_POOL_MIN_FILES = 200
+
+OBJECT_PATTERN = re.compile(
+    r'^[ \t]*(table|page|codeunit|report|xmlport|query|enum|interface|controladdin|pageextension|tableextension|enumextension|profile|dotnet|entitlement|permissionset|permissionsetextension|reportextension|enumvalue|entitlementset|entitlementsetextension)[ \t]+(\d+)?[ \t]*("[^"\r\n]+"|[\w]+)',
+    re.IGNORECASE | re.MULTILINE
+)
+# Kommentare, Strings und Quoted Identifier überspringen (ein ' in "Customer's Card" öffnet
+# keinen String); ein bis zum Textende offener Blockkommentar wird als open gemeldet
+DECLARATION_PATTERN = re.compile(
+    r"""(?P<skip>//[^\n]*|/\*.*?\*/|'(?:[^'\r\n]|'')*'|"[^"\r\n]*")|(?P<open>/\*)|(?P<object>"""
+    + OBJECT_PATTERN.pattern
+    + ")",
+    re.IGNORECASE | re.MULTILINE | re.DOTALL,
+)
+NAMESPACE_PATTERN = re.compile(
+    r'(?:Namespace\s*=\s*"([\w\d_.]+)"|namespace\s+([\w\d_.]+)\s*;)', re.IGNORECASE
+)
+
+# (Objekttyp, Objekt-Id, Objektname, Namespace, Byte-Offset der Objektdeklaration)
+ALHeader = Tuple[str, str, str, Optional[str], int]
+
+def _namespace(text: str) -> Optional[str]:
+    n = NAMESPACE_PATTERN.search(text)
+    if n:
+        return n.group(1) or n.group(2)
+    return None
+
+def _find(text: str) -> Tuple[Optional[re.Match], bool]:
+    """(Treffer von OBJECT_PATTERN außerhalb von Kommentaren/Strings, Blockkommentar offen)."""
+    for m in DECLARATION_PATTERN.finditer(text):
+        if m.lastgroup == "open":
+            return None, True
+        if m.lastgroup == "object":
+            return OBJECT_PATTERN.match(text, m.start()), False
+    return None, False
+
+def find_declaration(text: str) -> Optional[re.Match]:
+    """Objektdeklaration (Treffer von OBJECT_PATTERN) außerhalb von Kommentaren und Strings."""
+    return _find(text)[0]
+
+def decode_al(data: bytes) -> str:
+    """Dekodiere AL-Code verlustfrei (surrogateescape), Byte-Offsets bleiben berechenbar."""
+    return data.decode("utf-8", errors="surrogateescape")
+
+def _clean(text: Optional[str]) -> Optional[str]:
+    # Ungültige Bytes (Surrogate) wie beim Lesen mit errors="replace" als U+FFFD ausgeben
+    if text is None:
+        return None
+    return text.encode("utf-8", "surrogateescape").decode("utf-8", "replace")
+
+def scan_al_text(text: str, base_offset: int = 0) -> Optional[ALHeader]:
+    """
+    Werte den Objektkopf in bereits gelesenem AL-Code aus. base_offset + Offset ist nur dann
+    ein Byte-Offset in der Datei, wenn text mit decode_al dekodiert wurde.
+    """
+    m = find_declaration(text)
+    if not m:
+        return None
+    # namespace-Anweisung steht vor dem Objekt, die alte Namespace-Eigenschaft dahinter
+    namespace = _namespace(text[:m.start()]) or _namespace(text[m.end():])
+    offset = base_offset + len(text[:m.start()].encode("utf-8", "surrogateescape"))
+    return m.group(1), m.group(2) or "", _clean(m.group(3).strip('"')), _clean(namespace), offset
+
+def scan_al_header(filepath: str, chunk_size: int = HEADER_CHUNK_SIZE) -> Optional[ALHeader]:
+    """
+    Lies die Datei blockweise, bis die Objektdeklaration vollständig im Puffer ist.
+    Gibt (Objekttyp, Objekt-Id, Objektname, Namespace, Byte-Offset) oder None zurück.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="surrogateescape")
+    text = ""
+    bom = 0
+    try:
+        with open(filepath, "rb") as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not text and chunk.startswith(codecs.BOM_UTF8):
+                    chunk = chunk[len(codecs.BOM_UTF8):]
+                    bom = len(codecs.BOM_UTF8)
+                text += decoder.decode(chunk, final=not chunk)
+                if not chunk:
+                    return scan_al_text(text, bom)
+                # Nur vollständige Zeilen auswerten, die Deklaration könnte am Blockende abgeschnitten sein;
+                # endet der Puffer in einem Blockkommentar, erst weiterlesen
+                complete = text[:text.rfind("\n") + 1]
+                m, open_comment = _find(complete)
+                if m and not open_comment:
+                    return scan_al_text(complete, bom)
+    except OSError:
+        return None
+
+def _scan_worker(filepath: str) -> Tuple[str, Optional[ALHeader]]:
+    return filepath, scan_al_header(filepath)
+
+def scan_al_headers(filepaths: List[str], max_workers: Optional[int] = None) -> List[Tuple[str, Optional[ALHeader]]]:
+    """Scanne die Objektköpfe vieler Dateien, ab PROCESS_POOL_MIN_FILES in einem Prozess-Pool."""
+    if len(filepaths) < PROCESS_POOL_MIN_FILES:
+        return [_scan_worker(filepath) for filepath in filepaths]
+    max_workers = max_workers or os.cpu_count() or 1
+    chunksize = max(1, min(256, len(filepaths) // (max_workers * 8)))
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(_scan_worker, filepaths, chunksize=chunksize))
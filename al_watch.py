@@ -0,0 +1,152 @@
+"""
+AL-Watcher
+
+Hält AL-Index und LanceDB-Vektoren während einer Review-Sitzung aktuell, damit
+rag_namespace_review.py nie mit einem kalten Abgleich der Roots startet.
+
+Der Watcher überwacht die Roots per watchdog (unter Linux inotify). Dateiereignisse werden
+gesammelt und erst verarbeitet, wenn für WATCH_DEBOUNCE_SECONDS Ruhe ist (Editoren und
+git checkout erzeugen viele Ereignisse pro Datei). Pro Durchgang werden nur die betroffenen
+Dateien im AL-Index-Shard des Roots abgeglichen und ihre Zeilen in LanceDB ersetzt bzw. gelöscht.
+
+Solange der Watcher läuft, schreibt ein eigener Thread einen Heartbeat nach AL_INDEX_DIR, auch
+während ein Durchgang (Vektorisierung, Indexaufbau) länger dauert; load_al_index übernimmt die
+Shards der überwachten Roots dann ohne Verzeichnisdurchlauf.
+
+Aufruf:
+    python al_watch.py [ROOT ...]
+
+Ohne ROOT werden die Roots aus AL_WATCH_ROOTS (mit os.pathsep getrennt) bzw. die
+ROOT_DIRS des Vectorizers überwacht. Mit AL_WATCH_VECTORS=0 wird nur der AL-Index gepflegt.
+"""
+
+import os
+import sys
+import time
+import threading
+from collections import defaultdict
+from typing import Dict, List
+
+from watchdog.events import FileSystemEventHandler
+from watchdog.observers import Observer
+
+from al_index import (
+    AL_INDEX_DIR, load_al_index, load_shard, normalize_path, remove_watch_heartbeat, root_of, write_watch_heartbeat
+)
+from file_discovery import is_ignored_path
+from vectorizer import FILE_EXTENSION_FILTERS, ROOT_DIRS, collect_files, vector_root, vectorize_data
+
+WATCH_DEBOUNCE_SECONDS = float(os.environ.get("AL_WATCH_DEBOUNCE", "1.0"))
+WATCH_VECTORS = os.environ.get("AL_WATCH_VECTORS", "1") != "0"
+# Abstand zwischen Heartbeats, deutlich unter WATCH_HEARTBEAT_TIMEOUT in al_index
+HEARTBEAT_INTERVAL = 5.0
+
+class PendingChanges(FileSystemEventHandler):
+    """Sammelt geänderte Pfade mit dem Zeitpunkt des letzten Ereignisses."""
+
+    def __init__(self, extensions: List[str]):
+        super().__init__()
+        self.extensions = tuple(ext.lower() for ext in extensions)
+        self._pending: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def _add(self, path) -> None:
+        if isinstance(path, bytes):
+            path = os.fsdecode(path)
+        if path and path.lower().endswith(self.extensions):
+            with self._lock:
+                self._pending[path] = time.monotonic()
+
+    def on_any_event(self, event) -> None:
+        if event.is_directory or event.event_type in ("opened", "closed_no_write"):
+            return
+        self._add(event.src_path)
+        # Bei Umbenennungen (z.B. Speichern über eine temporäre Datei) zählt auch das Ziel
+        self._add(getattr(event, "dest_path", ""))
+
+    def take_settled(self, quiet_seconds: float) -> List[str]:
+        """Pfade, für die seit quiet_seconds kein Ereignis mehr kam, aus der Warteschlange nehmen."""
+        now = time.monotonic()
+        with self._lock:
+            settled = [path for path, last in self._pending.items() if now - last >= quiet_seconds]
+            for path in settled:
+                del self._pending[path]
+        return settled
+
+def update_vectors(root: str, paths: List[str]) -> None:
+    """Ersetze die LanceDB-Zeilen der geänderten Dateien, entferne die gelöschter Dateien."""
+    existing = {os.path.relpath(path, root) for path in paths if os.path.exists(path)}
+    deleted = [(vector_root(root), os.path.relpath(path, root)) for path in paths if not os.path.exists(path)]
+    data = collect_files(root, FILE_EXTENSION_FILTERS, only=existing)
+    if not vectorize_data(data, deleted):
+        # Nicht geschriebene Dateien stehen im Fehlerprotokoll und kommen im nächsten Vectorizer-Lauf zuerst
+        raise RuntimeError("LanceDB nicht vollständig aktualisiert, siehe Fehlerprotokoll")
+
+def apply_changes(roots: List[str], paths: List[str]) -> None:
+    by_root = defaultdict(list)
+    for path in paths:
+        root = root_of(path, roots)
+        # Ereignisse in .alpackages, output usw. wie bei der Dateisuche ignorieren
+        if root and not is_ignored_path(os.path.relpath(path, root)):
+            by_root[root].append(path)
+    for root, root_paths in by_root.items():
+        print(f"[Watch] {len(root_paths)} geänderte Dateien in {root}")
+        al_paths = [path for path in root_paths if path.lower().endswith(".al")]
+        if al_paths:
+            load_shard(root, AL_INDEX_DIR, candidates=al_paths)
+        if WATCH_VECTORS:
+            try:
+                update_vectors(root, root_paths)
+            except Exception as e:
+                print(f"[Watch] Fehler beim Aktualisieren der Vektoren für {root}: {e}")
+
+def heartbeat_loop(roots: List[str], stop: threading.Event) -> None:
+    """Heartbeat alle HEARTBEAT_INTERVAL Sekunden schreiben, bis stop gesetzt wird."""
+    while not stop.is_set():
+        try:
+            write_watch_heartbeat(roots, AL_INDEX_DIR)
+        except OSError as e:
+            print(f"[Watch] Heartbeat konnte nicht geschrieben werden: {e}")
+        stop.wait(HEARTBEAT_INTERVAL)
+
+def watch(roots: List[str]) -> None:
+    roots = [root for root in roots if os.path.isdir(root)]
+    if not roots:
+        print("FEHLER: Keiner der Roots existiert.")
+        return
+    # Einmaliger Abgleich beim Start, danach nur noch ereignisgesteuert
+    load_al_index(roots, AL_INDEX_DIR)
+    handler = PendingChanges(FILE_EXTENSION_FILTERS if WATCH_VECTORS else [".al"])
+    observer = Observer()
+    for root in roots:
+        observer.schedule(handler, root, recursive=True)
+    observer.start()
+    print(f"[Watch] Überwache {len(roots)} Roots (Entprellung {WATCH_DEBOUNCE_SECONDS}s), Abbruch mit Strg+C.")
+    stop = threading.Event()
+    # Unabhängig von der Verarbeitung: apply_changes kann länger als WATCH_HEARTBEAT_TIMEOUT dauern
+    heartbeat = threading.Thread(target=heartbeat_loop, args=(roots, stop), name="watch-heartbeat", daemon=True)
+    heartbeat.start()
+    try:
+        while observer.is_alive():
+            paths = handler.take_settled(WATCH_DEBOUNCE_SECONDS)
+            if paths:
+                apply_changes(roots, sorted({normalize_path(path) for path in paths}))
+            time.sleep(min(0.5, WATCH_DEBOUNCE_SECONDS))
+    except KeyboardInterrupt:
+        print("\n[Watch] Beendet.")
+    finally:
+        stop.set()
+        heartbeat.join()
+        observer.stop()
+        observer.join()
+        remove_watch_heartbeat(AL_INDEX_DIR)
+
+def main():
+    roots = sys.argv[1:]
+    if not roots:
+        env_roots = os.environ.get("AL_WATCH_ROOTS")
+        roots = env_roots.split(os.pathsep) if env_roots else ROOT_DIRS
+    watch(roots)
+
+if __name__ == "__main__":
+    main()
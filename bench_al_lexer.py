@@ -0,0 +1,92 @@
+"""
+Benchmark: AL-Lexer gegen die bisherigen Regex-Extraktoren für Referenzen.
+
+Aufruf:
+    python bench_al_lexer.py [ROOT ...]
+
+Ohne ROOT wird der synthetische Baum aus bench_al_scanner erzeugt (BENCH_FILES Dateien).
+Die Dateien werden vorab in den Speicher gelesen, gemessen wird nur die Extraktion.
+Die bisherigen Extraktoren laufen zusammen (je Skript ein eigener Durchlauf über den Text),
+wie es bei einem Lauf aller drei Skripte der Fall war. Ausgegeben werden MB/s, Dateien/s und
+die Anzahl gefundener eindeutiger Referenzen (Typ, Name) je Variante.
+"""
+
+import re
+import sys
+import time
+import shutil
+import tempfile
+from typing import List, Set, Tuple
+
+from al_lexer import extract_reference_tuples
+from bench_al_scanner import BENCH_FILES, generate_tree
+from file_discovery import find_files
+
+# Bisherige Muster aus namespace_suggester, namespace_review und rag_namespace_review
+LEGACY_SUGGESTER_PATTERN = re.compile(
+    r'(?:'
+        r'(Database|Table|Page|Codeunit|Report|XmlPort|Query|Enum)\s*::\s*"?([\w\d_]+)"?'
+        r'|'
+        r':\s*(Record|Page|Codeunit|Report|XmlPort|Query|Enum)\s+("?[\w\d_]+"?)'
+    r')',
+    re.IGNORECASE
+)
+LEGACY_REVIEW_PATTERN = re.compile(r'(Table|Page|Codeunit|Report|XmlPort|Query|Enum)\s*::\s*"?([\w\d_]+)"?', re.IGNORECASE)
+LEGACY_RAG_PATTERNS = [
+    re.compile(r'(Table|Page|Codeunit|Report|XmlPort|Query|Enum)\s*::\s*"?([\w\d_]+)"?', re.IGNORECASE),
+    re.compile(r'(Table|Page|Codeunit|Report|XmlPort|Query|Enum)\s*\(\s*"?([\w\d_]+)"?\s*\)', re.IGNORECASE),
+]
+LEGACY_TYPES = {"record": "table", "database": "table"}
+
+def legacy_extract(al_code: str) -> Set[Tuple[str, str]]:
+    refs = set()
+    for m in LEGACY_SUGGESTER_PATTERN.findall(al_code):
+        if m[1]:
+            refs.add((LEGACY_TYPES.get(m[0].lower(), m[0].lower()), m[1].lower()))
+        elif m[3]:
+            refs.add((LEGACY_TYPES.get(m[2].lower(), m[2].lower()), m[3].replace('"', '').lower()))
+    for m in LEGACY_REVIEW_PATTERN.findall(al_code):
+        refs.add((LEGACY_TYPES.get(m[0].lower(), m[0].lower()), m[1].lower()))
+    for pattern in LEGACY_RAG_PATTERNS:
+        for m in pattern.findall(al_code):
+            refs.add((LEGACY_TYPES.get(m[0].lower(), m[0].lower()), m[1].lower()))
+    return refs
+
+def bench(label: str, func, contents: List[str]) -> Set[Tuple[str, str]]:
+    total_bytes = sum(len(content) for content in contents)
+    found = set()
+    start = time.perf_counter()
+    for content in contents:
+        found |= func(content)
+    elapsed = time.perf_counter() - start
+    print(
+        f"{label:<34} {total_bytes / elapsed / 1e6:>7.1f} MB/s {len(contents) / elapsed:>9.0f} Dateien/s"
+        f"  {len(found):>6} Referenzen"
+    )
+    return found
+
+def main():
+    roots = sys.argv[1:]
+    tmp_dir = None
+    if not roots:
+        tmp_dir = tempfile.mkdtemp(prefix="al_bench_")
+        print(f"Erzeuge synthetischen Baum mit {BENCH_FILES} Dateien in {tmp_dir} ...")
+        generate_tree(tmp_dir, BENCH_FILES)
+        roots = [tmp_dir]
+    try:
+        contents = []
+        for filepath in find_files(roots):
+            with open(filepath, encoding="utf-8-sig", errors="replace") as f:
+                contents.append(f.read())
+        print(f"{len(contents)} AL-Dateien, {sum(len(c) for c in contents) / 1e6:.1f} MB")
+        legacy = bench("Regex je Skript (bisher)", legacy_extract, contents)
+        lexer = bench("AL-Lexer (ein Durchlauf)", extract_reference_tuples, contents)
+        with_spaces = sum(1 for _, name in lexer - legacy if " " in name)
+        print(f"Nur vom Lexer gefunden: {len(lexer - legacy)} (davon {with_spaces} Namen mit Leerzeichen)")
+        print(f"Nur von den Regex gefunden (Kommentare, Strings, abgeschnittene Namen): {len(legacy - lexer)}")
+    finally:
+        if tmp_dir:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Benchmark: Header-Scanner im Prozess-Pool gegen den bisherigen Thread-Scan.
+
+Aufruf:
+    python bench_al_scanner.py [ROOT ...]
+
+Ohne ROOT wird ein synthetischer Baum in Größe der Base Application erzeugt
+(BENCH_FILES Dateien, Standard 7500). Ausgegeben werden Dateien/Sekunde je Variante.
+"""
+
+import os
+import re
+import sys
+import time
+import random
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+from file_discovery import find_files
+from al_scanner import scan_al_headers
+
+BENCH_FILES = int(os.environ.get("BENCH_FILES", "7500"))
+
+# Bisherige Implementierung aus build_al_index.py (readlines + Regex pro Zeile, ThreadPool mit cpu_count*4)
+LEGACY_OBJECT_PATTERN = re.compile(
+    r'^(table|page|codeunit|report|xmlport|query|enum|interface|controladdin|pageextension|tableextension|enumextension|profile|dotnet|entitlement|permissionset|permissionsetextension|reportextension|enumvalue|entitlementset|entitlementsetextension)\s+(\d+)?\s*"?([\w\d_]+)"?',
+    re.IGNORECASE
+)
+LEGACY_NAMESPACE_PATTERN = re.compile(
+    r'(?:Namespace\s*=\s*"([\w\d_.]+)"|namespace\s+([\w\d_.]+)\s*;)', re.IGNORECASE
+)
+
+def legacy_scan_al_file(filepath):
+    try:
+        with open(filepath, encoding="utf-8") as f:
+            lines = f.readlines()
+        obj_type, obj_name, namespace = None, None, None
+        for line in lines:
+            if not obj_type:
+                m = LEGACY_OBJECT_PATTERN.match(line.strip())
+                if m:
+                    obj_type = m.group(1)
+                    obj_name = m.group(3)
+            if not namespace:
+                n = LEGACY_NAMESPACE_PATTERN.search(line)
+                if n:
+                    namespace = n.group(1) or n.group(2)
+            if obj_type and obj_name and namespace is not None:
+                break
+        if obj_type and obj_name:
+            return (obj_type.lower(), obj_name), {"namespace": namespace, "filepath": filepath}
+    except Exception:
+        pass
+    return None
+
+def legacy_parallel_scan(al_files: List[str]):
+    result = {}
+    lock = threading.Lock()
+    def process_file(filepath):
+        r = legacy_scan_al_file(filepath)
+        if r:
+            key, val = r
+            with lock:
+                result[key] = val
+    with ThreadPoolExecutor(max_workers=os.cpu_count() * 4) as executor:
+        for f in [executor.submit(process_file, filepath) for filepath in al_files]:
+            f.result()
+    return result
+
+def generate_tree(target: str, count: int) -> None:
+    """Erzeuge AL-Dateien mit Lizenzkopf, namespace/using-Block und typischer Länge."""
+    rnd = random.Random(42)
+    areas = ["Sales", "Purchases", "Inventory", "Finance", "Warehouse", "Service", "Manufacturing", "CRM"]
+    types = ["table", "page", "codeunit", "report", "enum", "query", "xmlport"]
+    license_header = "".join("// " + "-" * 90 + "\n" for _ in range(3))
+    for i in range(count):
+        area = rnd.choice(areas)
+        directory = os.path.join(target, area, rnd.choice(["Document", "Setup", "Posting", "History"]))
+        os.makedirs(directory, exist_ok=True)
+        obj_type = rnd.choice(types)
+        lines = [license_header, f"namespace Microsoft.{area}.Document;\n\n"]
+        lines += [f"using Microsoft.{a}.Setup;\n" for a in rnd.sample(areas, 4)]
+        lines.append(f'\n{obj_type} {i + 1} "{area} Object {i}"\n{{\n')
+        for j in range(rnd.randint(50, 600)):
+            lines.append(f'    procedure Proc{j}(var Rec: Record "{area} Header"; Qty: Decimal)\n    begin\n        Rec."Field {j}" := Qty;\n    end;\n')
+        lines.append("}\n")
+        with open(os.path.join(directory, f"{area}Object{i}.{obj_type.capitalize()}.al"), "w", encoding="utf-8") as f:
+            f.writelines(lines)
+
+def bench(label: str, func, files: List[str]) -> None:
+    start = time.perf_counter()
+    result = func(files)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<40} {len(files) / elapsed:>10.0f} Dateien/s  ({elapsed:.2f}s, {len(result)} Ergebnisse)")
+
+def main():
+    roots = sys.argv[1:]
+    tmp_dir = None
+    if not roots:
+        tmp_dir = tempfile.mkdtemp(prefix="al_bench_")
+        print(f"Erzeuge synthetischen Baum mit {BENCH_FILES} Dateien in {tmp_dir} ...")
+        generate_tree(tmp_dir, BENCH_FILES)
+        roots = [tmp_dir]
+    try:
+        files = find_files(roots)
+        print(f"{len(files)} AL-Dateien, {os.cpu_count()} CPUs")
+        # Erster Durchlauf wärmt den Page-Cache, damit beide Varianten gleiche I/O-Bedingungen haben
+        legacy_parallel_scan(files)
+        bench("ThreadPool (readlines, bisher)", legacy_parallel_scan, files)
+        bench("ProcessPool (Header-Scan, neu)", scan_al_headers, files)
+    finally:
+        if tmp_dir:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
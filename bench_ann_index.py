@@ -0,0 +1,87 @@
+"""
+Benchmark: Recall und Latenz des Vektorindex (vector_index) gegen die exakte Suche.
+
+Aufruf:
+    python bench_ann_index.py [LANCEDB_PATH]
+
+Die Vektoren kommen wie in bench_quantization.py aus namespace_vectors in LANCEDB_PATH oder
+werden synthetisch erzeugt (BENCH_ROWS). Gemessen wird in einem temporären Verzeichnis:
+
+- exakte Suche ohne Index (vollständiger Scan) als Referenz für die Latenz
+- je Indextyp (ivf_pq, hnsw) die Aufbauzeit mit den Parametern aus vector_index.index_params
+- je Kombination aus nprobes, refine_factor und ef (BENCH_NPROBES, BENCH_REFINE_FACTORS,
+  BENCH_EF) Recall@BENCH_TOP_K gegenüber der exakten float32-Suche sowie mittlere und
+  95%-Latenz über vector_storage.search_table
+
+Daraus lassen sich VECTOR_SEARCH_NPROBES / VECTOR_SEARCH_REFINE_FACTOR / VECTOR_SEARCH_EF
+für die eigene Tabellengröße wählen.
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+from itertools import product
+from typing import List
+
+import lancedb
+import numpy as np
+import pyarrow as pa
+
+from bench_quantization import encode_matrix, load_corpus, overlap
+from vector_index import LANCEDB_INDEX_TYPES, build_vector_index
+from vector_storage import search_table, vector_type
+
+BENCH_QUERIES = int(os.environ.get("BENCH_QUERIES", "200"))
+BENCH_TOP_K = int(os.environ.get("BENCH_TOP_K", "10"))
+BENCH_NPROBES = [int(n) for n in os.environ.get("BENCH_NPROBES", "1,5,10,20,50").split(",")]
+BENCH_REFINE_FACTORS = [int(n) for n in os.environ.get("BENCH_REFINE_FACTORS", "0,5,10").split(",")]
+BENCH_EF = [int(n) for n in os.environ.get("BENCH_EF", "0,50,200").split(",")]
+
+def measure(table, queries: np.ndarray, expected: List[List[tuple]], **params):
+    """(Recall, mittlere Latenz, 95%-Latenz) über alle Anfragen; Latenzen in Sekunden."""
+    latencies, recall = [], 0.0
+    for q, exp in zip(queries, expected):
+        start = time.perf_counter()
+        rows = search_table(table, q.tolist(), BENCH_TOP_K, **params)
+        latencies.append(time.perf_counter() - start)
+        recall += overlap([(row["root"], row["id"]) for row in rows], exp)
+    # Erste Suche lädt den Index, sie zählt nicht
+    rest = np.array(latencies[1:] or latencies)
+    return recall / len(queries), float(rest.mean()), float(np.percentile(rest, 95))
+
+def report(label: str, recall: float, mean: float, p95: float):
+    print(f"{label:<40} {recall:>8.1%} {mean * 1000:>8.2f}ms {p95 * 1000:>8.2f}ms")
+
+def main():
+    ids, matrix = load_corpus(sys.argv[1] if len(sys.argv) > 1 else "./lancedb")
+    rnd = np.random.default_rng(7)
+    picks = rnd.choice(len(ids), size=min(BENCH_QUERIES, len(ids)), replace=False)
+    queries = matrix[picks] + 0.02 * rnd.normal(size=(len(picks), matrix.shape[1])).astype(np.float32)
+    # Exakte Referenz: Kosinus auf float32
+    expected = [[ids[i] for i in np.argsort(-(matrix @ q))[:BENCH_TOP_K]] for q in queries]
+    schema = pa.schema([("root", pa.string()), ("id", pa.string()), ("embedding", vector_type(matrix.shape[1], "float32"))])
+    data = pa.Table.from_arrays(
+        [pa.array([root for root, _ in ids]), pa.array([doc_id for _, doc_id in ids]), encode_matrix(matrix, "float32")],
+        schema=schema,
+    )
+
+    tmp_dir = tempfile.mkdtemp(prefix="ann_bench_")
+    try:
+        db = lancedb.connect(tmp_dir)
+        print(f"{'Suche':<40} {f'Recall@{BENCH_TOP_K}':>8} {'Ø':>10} {'p95':>10}")
+        flat = db.create_table("flat", data=data, schema=schema)
+        report("ohne Index (Scan)", *measure(flat, queries, expected))
+        for index_type in LANCEDB_INDEX_TYPES:
+            table = db.create_table(index_type, data=data, schema=schema)
+            build_vector_index(table, index_type)
+            ef_values = BENCH_EF if index_type == "hnsw" else [0]
+            for nprobes, refine_factor, ef in product(BENCH_NPROBES, BENCH_REFINE_FACTORS, ef_values):
+                label = f"{index_type} nprobes={nprobes} refine={refine_factor}" + (f" ef={ef}" if ef else "")
+                report(label, *measure(table, queries, expected, nprobes=nprobes, refine_factor=refine_factor, ef=ef))
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Benchmark: Chunk-Größen für die Vektorisierung großer AL-Objekte.
+
+Aufruf:
+    python bench_chunking.py [ROOT ...]
+
+Ohne ROOT wird der synthetische Baum aus bench_al_scanner erzeugt (BENCH_CHUNK_FILES Dateien,
+Standard 200). Aussagekräftige Trefferquoten liefert nur echter Code, die synthetischen
+Prozeduren sind bis auf ihre Namen gleich.
+
+Je Chunk-Größe (BENCH_CHUNK_SIZES, "0" = ganze Datei wie bisher) werden alle Dateien zerlegt
+und mit dem Backend aus EMBED_BACKEND (Batches von EMBED_BATCH_SIZE) eingebettet. Ausgegeben
+werden Chunks, Zeichen, Embedding-Zeit und die Trefferquote auf Objektebene: Als Anfrage dient
+je großem Objekt eine Prozedur aus seiner zweiten Hälfte, die ohne Chunking im abgeschnittenen
+Teil liegt; gezählt wird, wie oft das Objekt unter den besten BENCH_TOP_K Objekten ist
+(Kosinus-Ähnlichkeit, je Objekt der beste Chunk wie in al_chunker.search_objects).
+"""
+
+import os
+import sys
+import time
+import random
+import shutil
+import tempfile
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from al_chunker import CHUNK_MAX_CHARS, chunk_al_object, split_segments
+from bench_al_scanner import generate_tree
+from embedding_backends import generate_embeddings
+from file_discovery import find_files
+from vectorizer import EMBED_BATCH_SIZE
+
+BENCH_CHUNK_FILES = int(os.environ.get("BENCH_CHUNK_FILES", "200"))
+BENCH_CHUNK_SIZES = [int(s) for s in os.environ.get("BENCH_CHUNK_SIZES", f"0,1000,{CHUNK_MAX_CHARS},4000").split(",")]
+BENCH_QUERIES = int(os.environ.get("BENCH_QUERIES", "100"))
+BENCH_TOP_K = int(os.environ.get("BENCH_TOP_K", "5"))
+
+def pick_queries(contents: List[str], count: int) -> List[Tuple[int, str]]:
+    """(Objektindex, Prozedurtext) aus der zweiten Hälfte großer Objekte."""
+    rnd = random.Random(42)
+    candidates = []
+    for obj, content in enumerate(contents):
+        if len(content) <= 2 * max(CHUNK_MAX_CHARS, 1000):
+            continue
+        lines = content.splitlines(keepends=True)
+        routines = [
+            (start, end) for start, end, label in split_segments(lines)
+            if label.startswith(("procedure ", "trigger ")) and start > len(lines) // 2
+        ]
+        if routines:
+            start, end = rnd.choice(routines)
+            candidates.append((obj, "".join(lines[start:end])[:1000]))
+    rnd.shuffle(candidates)
+    return candidates[:count]
+
+def embed_all(texts: List[str]) -> Tuple[np.ndarray, float]:
+    start = time.perf_counter()
+    vectors = []
+    for i in range(0, len(texts), EMBED_BATCH_SIZE):
+        for embedding in generate_embeddings(texts[i:i + EMBED_BATCH_SIZE]):
+            vectors.append(embedding if embedding is not None else [0.0])
+    elapsed = time.perf_counter() - start
+    dim = max(len(v) for v in vectors)
+    matrix = np.array([v if len(v) == dim else [0.0] * dim for v in vectors], dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms), elapsed
+
+def hit_rate(chunk_vectors: np.ndarray, owners: np.ndarray, object_count: int,
+             query_vectors: np.ndarray, expected: List[int], top_k: int) -> float:
+    hits = 0
+    for query, obj in zip(query_vectors, expected):
+        scores = chunk_vectors @ query
+        # Bestes Chunk je Objekt
+        best = np.full(object_count, -np.inf, dtype=np.float32)
+        np.maximum.at(best, owners, scores)
+        if obj in np.argsort(-best)[:top_k]:
+            hits += 1
+    return hits / max(len(expected), 1)
+
+def main():
+    roots = sys.argv[1:]
+    tmp_dir = None
+    if not roots:
+        tmp_dir = tempfile.mkdtemp(prefix="al_bench_")
+        print(f"Erzeuge synthetischen Baum mit {BENCH_CHUNK_FILES} Dateien in {tmp_dir} ...")
+        generate_tree(tmp_dir, BENCH_CHUNK_FILES)
+        roots = [tmp_dir]
+    try:
+        contents = []
+        for path in find_files(roots):
+            with open(path, encoding="utf-8", errors="replace") as f:
+                contents.append(f.read())
+        queries = pick_queries(contents, BENCH_QUERIES)
+        print(f"{len(contents)} AL-Dateien, {len(queries)} Anfragen aus großen Objekten, Batch {EMBED_BATCH_SIZE}")
+        query_vectors, _ = embed_all([text for _, text in queries])
+        expected = [obj for obj, _ in queries]
+
+        results: Dict[int, tuple] = {}
+        for size in BENCH_CHUNK_SIZES:
+            texts, owners = [], []
+            for obj, content in enumerate(contents):
+                chunks = chunk_al_object(content, size) if size > 0 else [None]
+                for chunk in chunks:
+                    texts.append(chunk.content if chunk else content)
+                    owners.append(obj)
+            chunk_vectors, elapsed = embed_all(texts)
+            rate = hit_rate(chunk_vectors, np.array(owners), len(contents), query_vectors, expected, BENCH_TOP_K)
+            results[size] = (len(texts), sum(len(t) for t in texts), elapsed, rate)
+
+        print(f"{'Chunk-Größe':<14} {'Chunks':>8} {'Zeichen':>12} {'Embedding':>11} {'Chunks/s':>9} {f'Treffer@{BENCH_TOP_K}':>11}")
+        for size, (count, chars, elapsed, rate) in results.items():
+            label = "ganze Datei" if size <= 0 else str(size)
+            print(f"{label:<14} {count:>8} {chars:>12} {elapsed:>10.1f}s {count / elapsed:>9.1f} {rate:>10.1%}")
+    finally:
+        if tmp_dir:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Benchmark: Speicherformate der Embeddings (float32, float16, int8) in LanceDB.
+
+Aufruf:
+    python bench_quantization.py [LANCEDB_PATH]
+
+Gelesen werden die Embeddings aus namespace_vectors (bzw. der Tabelle des Backends aus
+EMBED_BACKEND) in LANCEDB_PATH, Standard ./lancedb. Fehlt die Tabelle, werden BENCH_ROWS
+synthetische, um Cluster gestreute Vektoren erzeugt. Je Format wird eine Tabelle mit root, id
+und embedding in einem temporären Verzeichnis angelegt und gemessen:
+
+- Größe auf der Platte
+- Ladezeit: alle Embeddings per Spalten-Scan in ein NumPy-Array (wie der int8-Suchpfad)
+- Suchlatenz über vector_storage.search_table (erste Suche und Mittel der übrigen)
+- Übereinstimmung der Top-BENCH_TOP_K mit der exakten float32-Kosinus-Suche
+
+Als Anfragen dienen BENCH_QUERIES gespeicherte Vektoren mit leichtem Rauschen.
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+from typing import List
+
+import lancedb
+import numpy as np
+import pyarrow as pa
+
+from embedding_backends import get_backend
+from lancedb_scan import scan_batches
+from vector_storage import INT8_MAX, VECTOR_DTYPES, search_table, vector_type
+
+BENCH_ROWS = int(os.environ.get("BENCH_ROWS", "20000"))
+BENCH_QUERIES = int(os.environ.get("BENCH_QUERIES", "200"))
+BENCH_TOP_K = int(os.environ.get("BENCH_TOP_K", "10"))
+BENCH_DIM = 1024
+
+def load_corpus(path: str):
+    """((root, id)-Schlüssel, normierte float32-Matrix) aus der Vektortabelle oder synthetisch."""
+    table_name = get_backend().table_name("namespace_vectors")
+    try:
+        table = lancedb.connect(path).open_table(table_name)
+    except Exception:
+        table = None
+    if table is not None and table.count_rows():
+        ids, blocks = [], []
+        for batch in scan_batches(table, ["root", "id", "embedding"]):
+            ids.extend(zip(batch.column("root").to_pylist(), batch.column("id").to_pylist()))
+            embeddings = batch.column("embedding")
+            blocks.append(embeddings.values.to_numpy(zero_copy_only=False).reshape(len(batch), embeddings.type.list_size))
+        matrix = np.concatenate(blocks).astype(np.float32)
+        print(f"{len(ids)} Vektoren aus {path}/{table_name}")
+    else:
+        rnd = np.random.default_rng(42)
+        centers = rnd.normal(size=(max(BENCH_ROWS // 50, 1), BENCH_DIM))
+        matrix = (centers[rnd.integers(0, len(centers), BENCH_ROWS)] + 0.5 * rnd.normal(size=(BENCH_ROWS, BENCH_DIM))).astype(np.float32)
+        ids = [("synthetic", str(i)) for i in range(BENCH_ROWS)]
+        print(f"Keine Tabelle {table_name} in {path}, {BENCH_ROWS} synthetische Vektoren")
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return ids, matrix / np.where(norms == 0, 1, norms)
+
+def encode_matrix(matrix: np.ndarray, dtype: str) -> pa.Array:
+    if dtype == "int8":
+        peaks = np.abs(matrix).max(axis=1, keepdims=True)
+        values = np.rint(matrix * (INT8_MAX / np.where(peaks == 0, 1, peaks))).astype(np.int8)
+    else:
+        values = matrix.astype(np.float16 if dtype == "float16" else np.float32)
+    return pa.FixedSizeListArray.from_arrays(pa.array(values.ravel(), type=VECTOR_DTYPES[dtype]), matrix.shape[1])
+
+def directory_size(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(path) for f in files)
+
+def overlap(result: List[tuple], expected: List[tuple]) -> float:
+    return len(set(result) & set(expected)) / max(len(expected), 1)
+
+def main():
+    ids, matrix = load_corpus(sys.argv[1] if len(sys.argv) > 1 else "./lancedb")
+    rnd = np.random.default_rng(7)
+    picks = rnd.choice(len(ids), size=min(BENCH_QUERIES, len(ids)), replace=False)
+    queries = matrix[picks] + 0.02 * rnd.normal(size=(len(picks), matrix.shape[1])).astype(np.float32)
+    # Exakte Referenz: Kosinus auf float32
+    expected = [[ids[i] for i in np.argsort(-(matrix @ q))[:BENCH_TOP_K]] for q in queries]
+    roots = [root for root, _ in ids]
+    names = [doc_id for _, doc_id in ids]
+
+    tmp_dir = tempfile.mkdtemp(prefix="vec_bench_")
+    try:
+        db = lancedb.connect(tmp_dir)
+        print(f"{'Format':<8} {'Platte':>10} {'Laden':>9} {'1. Suche':>10} {'Suche Ø':>9} {f'Top-{BENCH_TOP_K}':>8}")
+        for dtype in VECTOR_DTYPES:
+            schema = pa.schema([("root", pa.string()), ("id", pa.string()), ("embedding", vector_type(matrix.shape[1], dtype))])
+            data = pa.Table.from_arrays([pa.array(roots), pa.array(names), encode_matrix(matrix, dtype)], schema=schema)
+            db.create_table(dtype, data=data, schema=schema)
+            size = directory_size(os.path.join(tmp_dir, f"{dtype}.lance"))
+
+            table = lancedb.connect(tmp_dir).open_table(dtype)
+            start = time.perf_counter()
+            loaded = sum(len(batch) for batch in scan_batches(table, ["embedding"]))
+            load_time = time.perf_counter() - start
+            assert loaded == len(ids)
+
+            latencies, agreement = [], 0.0
+            for q, exp in zip(queries, expected):
+                start = time.perf_counter()
+                rows = search_table(table, q.tolist(), BENCH_TOP_K)
+                latencies.append(time.perf_counter() - start)
+                agreement += overlap([(row["root"], row["id"]) for row in rows], exp)
+            rest = latencies[1:] or latencies
+            print(
+                f"{dtype:<8} {size / 2**20:>8.1f}MB {load_time * 1000:>7.0f}ms {latencies[0] * 1000:>8.1f}ms "
+                f"{sum(rest) / len(rest) * 1000:>7.1f}ms {agreement / len(queries):>8.1%}"
+            )
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
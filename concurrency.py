@@ -0,0 +1,133 @@
+"""
+Adaptive Parallelität
+
+AIMD-Regelung (additive increase, multiplicative decrease) der gleichzeitigen Requests an
+einen Dienst wie Ollama oder Azure OpenAI, statt die Zahl der Worker je Rechner von Hand
+einzustellen.
+
+- Nach jedem erfolgreichen Request steigt das Limit um 1/Limit, also um etwa 1 pro Runde,
+  solange die Latenz pro Einheit (z.B. pro Dokument eines Batches) höchstens
+  CONCURRENCY_LATENCY_TOLERANCE mal so hoch ist wie die beste bisher gemessene.
+- Steigt die Latenz darüber (der Dienst stellt Requests nur noch in die Warteschlange) oder
+  schlägt ein Request fehl, wird das Limit mit CONCURRENCY_DECREASE multipliziert. Requests,
+  die vor der letzten Senkung gestartet wurden, lösen keine weitere Senkung aus.
+
+AIMDController enthält nur die Regelung und ist threadsicher; AsyncLimiter begrenzt damit
+asyncio-Tasks. summary() gibt aus, bei welchem Limit sich der Lauf eingependelt hat.
+"""
+
+import os
+import time
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+CONCURRENCY_LATENCY_TOLERANCE = float(os.environ.get("CONCURRENCY_LATENCY_TOLERANCE", "2.0"))
+CONCURRENCY_DECREASE = float(os.environ.get("CONCURRENCY_DECREASE", "0.5"))
+
+class AIMDController:
+    def __init__(self, name: str, initial: float, minimum: int = 1, maximum: int = 16,
+                 tolerance: float = CONCURRENCY_LATENCY_TOLERANCE, decrease: float = CONCURRENCY_DECREASE):
+        self.name = name
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = float(min(self.maximum, max(self.minimum, initial)))
+        self.tolerance = tolerance
+        self.decrease = decrease
+        # Beste Latenz pro Einheit im Lauf; würde sie nachgeführt, wüchse sie mit der Überlast mit
+        self.baseline: Optional[float] = None
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.units = 0
+        self.decreases = 0
+        self.lowest = self.highest = self.current
+        # Zeitgewichtetes Mittel des Limits für summary()
+        self._started = time.monotonic()
+        self._changed = self._started
+        self._limit_seconds = 0.0
+
+    @property
+    def current(self) -> int:
+        """Aktuell erlaubte Zahl gleichzeitiger Requests."""
+        return int(self.limit)
+
+    def _set_limit(self, limit: float) -> None:
+        now = time.monotonic()
+        self._limit_seconds += self.current * (now - self._changed)
+        self._changed = now
+        self.limit = min(self.maximum, max(self.minimum, limit))
+        self.lowest = min(self.lowest, self.current)
+        self.highest = max(self.highest, self.current)
+
+    def _decrease(self, started: float) -> None:
+        # Eine Überlast zeigt sich in allen gleichzeitig laufenden Requests, gesenkt wird einmal
+        if started < self._last_decrease:
+            return
+        self._set_limit(self.limit * self.decrease)
+        self._last_decrease = time.monotonic()
+        self.decreases += 1
+
+    def record(self, started: float, latency: float, ok: bool, units: int = 1) -> None:
+        """Ergebnis eines Requests melden (started: time.monotonic() beim Start)."""
+        with self._lock:
+            self.requests += 1
+            if not ok:
+                self.errors += 1
+                self._decrease(started)
+                return
+            self.units += units
+            per_unit = latency / max(units, 1)
+            if self.baseline is None or per_unit < self.baseline:
+                self.baseline = per_unit
+            if per_unit > self.baseline * self.tolerance:
+                self._decrease(started)
+            else:
+                self._set_limit(self.limit + 1 / self.limit)
+
+    def summary(self, unit: str = "Einheiten") -> str:
+        with self._lock:
+            self._set_limit(self.limit)
+            elapsed = max(self._changed - self._started, 1e-9)
+            return (
+                f"{self.name}: Parallelität eingependelt bei {self.current} "
+                f"(Ø {self._limit_seconds / elapsed:.1f}, Bereich {self.lowest}-{self.highest}, erlaubt "
+                f"{self.minimum}-{self.maximum}), {self.units / elapsed:.1f} {unit}/s, "
+                f"{self.requests} Requests, {self.errors} Fehler, {self.decreases} Senkungen"
+            )
+
+class RequestSlot:
+    """Wird im Block von AsyncLimiter.slot gesetzt: ok=False zählt als Fehler ohne Exception."""
+
+    def __init__(self, units: int):
+        self.units = units
+        self.ok = True
+
+class AsyncLimiter:
+    """Lässt höchstens controller.current asyncio-Tasks gleichzeitig in slot()."""
+
+    def __init__(self, controller: AIMDController):
+        self.controller = controller
+        self.in_flight = 0
+        self._condition = asyncio.Condition()
+
+    @asynccontextmanager
+    async def slot(self, units: int = 1) -> AsyncIterator[RequestSlot]:
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < self.controller.current)
+            self.in_flight += 1
+        slot = RequestSlot(units)
+        started = time.monotonic()
+        try:
+            yield slot
+        except BaseException:
+            slot.ok = False
+            raise
+        finally:
+            self.controller.record(started, time.monotonic() - started, slot.ok, slot.units)
+            async with self._condition:
+                self.in_flight -= 1
+                # Das Limit kann gestiegen sein, daher alle Wartenden prüfen lassen
+                self._condition.notify_all()
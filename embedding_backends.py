@@ -0,0 +1,228 @@
+"""
+Embedding-Backends
+
+Gemeinsame Schnittstelle für alles, was Texte in Vektoren verwandelt. Gewählt wird über
+EMBED_BACKEND:
+
+- "ollama" (Standard): OLLAMA_MODEL (mxbai-embed-large) über die Batch-API /api/embed der
+  Ollama-Instanzen aus ollama_client, mit /api/embeddings als Fallback.
+- "hashing": Feature-Hashing über AL-Bezeichner in reinem NumPy, ohne Modell und ohne Server.
+  Bezeichner (auch "Sales Header" in Anführungszeichen) werden ganz und in ihre Wörter bzw.
+  CamelCase-Teile zerlegt gezählt, AL-Schlüsselwörter ausgelassen. Jedes Merkmal landet per
+  CRC32 mit Vorzeichen in einer von HASHING_EMBED_DIM Dimensionen, gewichtet mit 1 + log(tf),
+  der Vektor wird L2-normiert. Der ganze Baum ist damit in Minuten vektorisiert; das Backend
+  dient für schnelle Durchläufe, Tests ohne Ollama und als Vergleichsbasis für die
+  Trefferqualität. Eine IDF-Gewichtung bräuchte Statistiken über den ganzen Korpus und würde
+  bei jeder Änderung alle Vektoren ungültig machen, daher bleibt es bei reinen Termfrequenzen.
+
+Jedes Backend hat einen eigenen Namen als Schlüssel im Embedding-Cache und eigene
+LanceDB-Tabellen (table_name), Vektoren verschiedener Backends werden also nie vermischt.
+Ollama schreibt weiter in namespace_vectors / namespace_chunks.
+"""
+
+import os
+import re
+import math
+import zlib
+import threading
+from abc import ABC, abstractmethod
+from collections import Counter
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import requests
+
+from ollama_client import get_client
+
+EMBED_BACKEND = os.environ.get("EMBED_BACKEND", "ollama").lower()
+OLLAMA_MODEL = os.environ.get("OLLAMA_MODEL", "mxbai-embed-large:latest")
+# mxbai-embed-large: 1024-dim
+OLLAMA_EMBED_DIM = int(os.environ.get("OLLAMA_EMBED_DIM", "1024"))
+# Ollama-Endpunkte relativ zu OLLAMA_BASE_URL (siehe ollama_client)
+OLLAMA_EMBEDDINGS_PATH = "/api/embeddings"  # Einzel-API, nur noch Fallback
+OLLAMA_EMBED_PATH = "/api/embed"  # Batch-API (input als Liste)
+# Obergrenze der adaptiven Parallelität je Ollama-Endpunkt
+EMBED_MAX_CONCURRENCY_PER_ENDPOINT = int(os.environ.get("EMBED_MAX_CONCURRENCY_PER_ENDPOINT", "4"))
+HASHING_EMBED_DIM = int(os.environ.get("HASHING_EMBED_DIM", "1024"))
+
+class EmbeddingBackend(ABC):
+    """Basisklasse; embed liefert je Text einen Vektor oder None bei Fehlern."""
+
+    # Schlüssel im Embedding-Cache
+    name = ""
+    dim = 0
+    # Anhang an die LanceDB-Tabellennamen, leer für die bisherigen Tabellen
+    table_suffix = ""
+
+    @abstractmethod
+    def embed(self, contents: List[str]) -> List[Optional[List[float]]]:
+        ...
+
+    def table_name(self, base: str) -> str:
+        return f"{base}_{self.table_suffix}" if self.table_suffix else base
+
+    def concurrency_limits(self) -> Tuple[int, int]:
+        """(Start, Maximum) gleichzeitiger embed-Aufrufe für die adaptive Regelung."""
+        return 1, 1
+
+    def warm_up(self) -> None:
+        pass
+
+    def finish(self) -> None:
+        pass
+
+    def report(self) -> None:
+        pass
+
+def normalize_embedding(embedding: List[float]) -> List[float]:
+    """L2-Normierung, damit Einzel- und Batch-API vergleichbare Vektoren liefern."""
+    norm = sum(x * x for x in embedding) ** 0.5
+    return [x / norm for x in embedding] if norm else embedding
+
+class OllamaBackend(EmbeddingBackend):
+    def __init__(self, model: str = OLLAMA_MODEL, dim: int = OLLAMA_EMBED_DIM):
+        self.name = model
+        self.dim = dim
+        # Wird auf False gesetzt, wenn der Ollama-Server /api/embed nicht kennt (ältere Versionen)
+        self._batch_api_available = True
+
+    def concurrency_limits(self) -> Tuple[int, int]:
+        # Ab einem Request pro Endpunkt
+        endpoints = len(get_client().endpoints)
+        return endpoints, EMBED_MAX_CONCURRENCY_PER_ENDPOINT * endpoints
+
+    def warm_up(self) -> None:
+        get_client().warm_up(self.name, "embed")
+
+    def finish(self) -> None:
+        get_client().finish(self.name, kind="embed")
+
+    def report(self) -> None:
+        get_client().report()
+
+    def embed_one(self, content: str) -> Optional[List[float]]:
+        """Ein Embedding über /api/embeddings; None, wenn Ollama keines geliefert hat."""
+        payload = {
+            "model": self.name,
+            "prompt": content
+        }
+        try:
+            result = get_client().post_json(OLLAMA_EMBEDDINGS_PATH, payload, timeout=300)  # Timeout erhöht
+            # Ollama gibt das Embedding unter "embedding" zurück
+            embedding = result.get("embedding")
+            if not embedding or not isinstance(embedding, list):
+                raise ValueError("No embedding returned from Ollama.")
+            return embedding
+        except Exception as e:
+            print(f"Error generating embedding: {e}")
+            return None  # Kein Nullvektor: der Aufrufer wiederholt bzw. protokolliert den Fehler
+
+    def embed(self, contents: List[str]) -> List[Optional[List[float]]]:
+        """
+        Ein Request an die Batch-API für alle Texte. /api/embed liefert L2-normierte Vektoren;
+        bei Fehlern oder ohne Batch-API wird jeder Text einzeln abgefragt und ebenfalls normiert.
+        """
+        if self._batch_api_available:
+            payload = {
+                "model": self.name,
+                "input": contents
+            }
+            try:
+                embeddings = get_client().post_json(OLLAMA_EMBED_PATH, payload, timeout=600).get("embeddings")
+                if not isinstance(embeddings, list) or len(embeddings) != len(contents):
+                    raise ValueError("Unexpected number of embeddings returned from Ollama.")
+                return embeddings
+            except requests.HTTPError as e:
+                # 404 ohne Modell-Fehlermeldung: Server kennt den Endpunkt nicht
+                if e.response is not None and e.response.status_code == 404 and "model" not in e.response.text.lower():
+                    print("Ollama unterstützt /api/embed nicht, verwende Einzelabfragen über /api/embeddings.")
+                    self._batch_api_available = False
+                else:
+                    print(f"Error generating batch embeddings ({len(contents)} Dokumente): {e}")
+            except Exception as e:
+                print(f"Error generating batch embeddings ({len(contents)} Dokumente): {e}")
+        embeddings = [self.embed_one(content) for content in contents]
+        return [normalize_embedding(embedding) if embedding is not None else None for embedding in embeddings]
+
+_IDENTIFIER = re.compile(r'"([^"\r\n]+)"|([A-Za-z_][A-Za-z0-9_]*)')
+_WORD = re.compile(r'[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+')
+# Schlüsselwörter und Datentypen, die in fast jedem Objekt vorkommen und nichts unterscheiden
+AL_STOPWORDS = frozenset("""
+    begin end var procedure trigger local internal protected if then else exit case of for to downto do
+    while repeat until with and or not xor div mod true false record code text integer decimal boolean
+    date time datetime guid option enum label this rec xrec
+""".split())
+
+def iter_identifier_features(content: str) -> Iterator[str]:
+    """Bezeichner ganz ("sales header") und ihre Wörter ("sales", "header") in Kleinschreibung."""
+    for quoted, bare in _IDENTIFIER.findall(content):
+        name = quoted or bare
+        lowered = name.lower()
+        if not quoted and lowered in AL_STOPWORDS:
+            continue
+        words = [word.lower() for word in _WORD.findall(name)]
+        if len(words) != 1 or words[0] != lowered:
+            yield lowered
+        for word in words:
+            if len(word) > 1 and word not in AL_STOPWORDS:
+                yield word
+
+class HashingBackend(EmbeddingBackend):
+    def __init__(self, dim: int = HASHING_EMBED_DIM):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+        self.table_suffix = f"hashing_{dim}"
+        # Merkmal -> (Dimension, Vorzeichen); das Vokabular eines AL-Baums ist überschaubar
+        self._buckets: Dict[str, Tuple[int, float]] = {}
+
+    def _bucket(self, feature: str) -> Tuple[int, float]:
+        bucket = self._buckets.get(feature)
+        if bucket is None:
+            # CRC32 statt hash(): hash() ist je Prozess zufällig, die Vektoren landen aber im Cache
+            h = zlib.crc32(feature.encode("utf-8"))
+            bucket = self._buckets[feature] = (h % self.dim, 1.0 if h & 0x80000000 else -1.0)
+        return bucket
+
+    def embed_one(self, content: str) -> List[float]:
+        counts = Counter(iter_identifier_features(content))
+        vector = np.zeros(self.dim, dtype=np.float32)
+        if counts:
+            buckets = [self._bucket(feature) for feature in counts]
+            indices = np.fromiter((index for index, _ in buckets), dtype=np.int64, count=len(buckets))
+            weights = np.fromiter(
+                (sign * (1.0 + math.log(tf)) for (_, sign), tf in zip(buckets, counts.values())),
+                dtype=np.float32, count=len(buckets),
+            )
+            np.add.at(vector, indices, weights)
+            norm = np.linalg.norm(vector)
+            if norm:
+                vector /= norm
+        if not vector.any():
+            # Ohne Bezeichner (z.B. leere Datei): fester Einheitsvektor statt Nullvektor
+            vector[0] = 1.0
+        return vector.tolist()
+
+    def embed(self, contents: List[str]) -> List[Optional[List[float]]]:
+        return [self.embed_one(content) for content in contents]
+
+BACKENDS = {
+    "ollama": OllamaBackend,
+    "hashing": HashingBackend,
+}
+
+_backend: Optional[EmbeddingBackend] = None
+_backend_lock = threading.Lock()
+
+def get_backend() -> EmbeddingBackend:
+    """Das mit EMBED_BACKEND gewählte Backend, gemeinsam für den ganzen Prozess."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            if EMBED_BACKEND not in BACKENDS:
+                raise ValueError(f"Unbekanntes EMBED_BACKEND '{EMBED_BACKEND}', erlaubt: {', '.join(BACKENDS)}")
+            _backend = BACKENDS[EMBED_BACKEND]()
+        return _backend
+
+def generate_embeddings(contents: List[str]) -> List[Optional[List[float]]]:
+    """Embeddings des gewählten Backends, in Eingabereihenfolge; None für fehlgeschlagene Texte."""
+    return get_backend().embed(contents)
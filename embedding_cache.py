@@ -0,0 +1,76 @@
+"""
+Embedding-Cache
+
+Persistenter Cache für Embeddings, Schlüssel ist (Modell, SHA256 des Inhalts). Der Vectorizer
+fragt den Cache vor jedem Ollama-Request ab; nur Inhalte ohne Eintrag werden eingebettet.
+Damit kostet ein Neuaufbau der LanceDB-Tabelle (z.B. nach einer Schemaänderung) keine
+Embedding-Requests, der Wechsel von OLLAMA_MODEL und zurück ebenfalls nicht, und identische
+Dateien in mehreren Produkten (HC/MTC) werden nur einmal eingebettet.
+
+Gespeichert wird in einer SQLite-Datei (EMBEDDING_CACHE_PATH), die Vektoren als float32-BLOB.
+Leere und Nullvektoren werden nicht übernommen.
+"""
+
+import os
+import sqlite3
+from array import array
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+EMBEDDING_CACHE_PATH = os.environ.get("EMBEDDING_CACHE_PATH", "embedding_cache.sqlite")
+# SQLite erlaubt nur eine begrenzte Zahl von Parametern pro Statement
+_LOOKUP_CHUNK = 500
+
+def encode_vector(vector: Sequence[float]) -> bytes:
+    return array("f", vector).tobytes()
+
+def decode_vector(blob: bytes) -> List[float]:
+    vector = array("f")
+    vector.frombytes(blob)
+    return vector.tolist()
+
+class EmbeddingCache:
+    def __init__(self, path: str = EMBEDDING_CACHE_PATH):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " model TEXT NOT NULL, content_hash TEXT NOT NULL, dim INTEGER NOT NULL, vector BLOB NOT NULL,"
+            " PRIMARY KEY (model, content_hash)) WITHOUT ROWID"
+        )
+        self.conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, model: str, hashes: Iterable[str]) -> Dict[str, List[float]]:
+        """Gecachte Vektoren für die Hashes; fehlende Hashes sind nicht im Ergebnis."""
+        hashes = list(dict.fromkeys(hashes))
+        found = {}
+        for i in range(0, len(hashes), _LOOKUP_CHUNK):
+            chunk = hashes[i:i + _LOOKUP_CHUNK]
+            rows = self.conn.execute(
+                f"SELECT content_hash, vector FROM embeddings WHERE model = ? AND content_hash IN ({','.join('?' * len(chunk))})",
+                [model, *chunk],
+            )
+            for content_hash, blob in rows:
+                found[content_hash] = decode_vector(blob)
+        self.hits += len(found)
+        self.misses += len(hashes) - len(found)
+        return found
+
+    def put_many(self, model: str, items: Iterable[Tuple[str, Sequence[float]]]) -> int:
+        """Speichere (content_hash, vector)-Paare; Nullvektoren werden übersprungen."""
+        rows = [
+            (model, content_hash, len(vector), encode_vector(vector))
+            for content_hash, vector in items
+            if vector and any(vector)
+        ]
+        if rows:
+            self.conn.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?)", rows)
+            self.conn.commit()
+        return len(rows)
+
+    def count(self, model: str) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM embeddings WHERE model = ?", (model,)).fetchone()[0]
+
+    def close(self) -> None:
+        self.conn.close()
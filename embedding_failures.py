@@ -0,0 +1,64 @@
+"""
+Fehlerprotokoll des Vectorizers
+
+Dateien, für die Ollama auch nach den Wiederholungen im Lauf kein Embedding geliefert hat,
+werden mit Root, Id, Inhalts-Hash, letztem Fehler und Zahl der Versuche in einer JSON-Datei
+(EMBED_FAILURE_LEDGER) vermerkt. Für sie wird keine Zeile in LanceDB geschrieben; der nächste
+Lauf des Vectorizers liest sie zuerst erneut, auch wenn git diff sie nicht mehr meldet.
+Sobald eine Datei erfolgreich vektorisiert oder gelöscht wurde, verschwindet der Eintrag.
+"""
+
+import os
+import json
+import time
+from typing import Dict, List, Tuple
+
+EMBED_FAILURE_LEDGER = os.environ.get("EMBED_FAILURE_LEDGER", "vectorizer_failures.json")
+
+class FailureLedger:
+    def __init__(self, path: str = EMBED_FAILURE_LEDGER):
+        self.path = path
+        self.entries: Dict[Tuple[str, str], Dict] = {}
+        self._changed = False
+        if os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    for entry in json.load(f):
+                        self.entries[(entry["root"], entry["id"])] = entry
+            except (OSError, ValueError, KeyError) as e:
+                print(f"WARNUNG: Fehlerprotokoll {path} nicht lesbar ({e}), beginne leer.")
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def ids(self, root: str) -> List[str]:
+        """Ids der fehlgeschlagenen Dateien eines Roots (Spalte root, siehe vectorizer.vector_root)."""
+        return sorted(doc_id for entry_root, doc_id in self.entries if entry_root == root)
+
+    def keys(self) -> List[Tuple[str, str]]:
+        return list(self.entries)
+
+    def record(self, root: str, doc_id: str, content_hash: str, error: str) -> None:
+        previous = self.entries.get((root, doc_id), {})
+        self.entries[(root, doc_id)] = {
+            "root": root,
+            "id": doc_id,
+            "content_hash": content_hash,
+            "error": error,
+            "attempts": previous.get("attempts", 0) + 1,
+            "last_failure": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        self._changed = True
+
+    def resolve(self, root: str, doc_id: str) -> None:
+        if self.entries.pop((root, doc_id), None) is not None:
+            self._changed = True
+
+    def save(self) -> None:
+        if not self._changed:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(sorted(self.entries.values(), key=lambda e: (e["root"], e["id"])), f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        self._changed = False
@@ -1,6 +1,7 @@
-import os
 import re
 
+from file_discovery import iter_files
+
 BASE_ROOT = r"C:/Repos/Github/StefanMaron/MSDyn365BC.Code.History/BaseApp/Source/Base Application/"
 
 NAMESPACE_PATTERN = re.compile(r'(?:Namespace\s*=\s*"([\w\d_.]+)"|namespace\s+([\w\d_.]+)\s*;)', re.IGNORECASE)
@@ -18,14 +19,11 @@ def extract_namespaces_from_file(filepath):
 
 def main():
     all_namespaces = set()
-    for dirpath, _, filenames in os.walk(BASE_ROOT):
-        for f in filenames:
-            if f.lower().endswith(".al"):
-                fp = os.path.join(dirpath, f)
-                try:
-                    all_namespaces.update(extract_namespaces_from_file(fp))
-                except Exception:
-                    continue
+    for fp in iter_files([BASE_ROOT]):
+        try:
+            all_namespaces.update(extract_namespaces_from_file(fp))
+        except Exception:
+            continue
     sorted_namespaces = sorted(all_namespaces)
     print("# Kopiere das Ergebnis in allowed_namespaces_with_desc")
     print("allowed_namespaces_with_desc = [")
@@ -0,0 +1,77 @@
+"""
+Datei-Suche
+
+Gemeinsame Dateisuche für alle Skripte. Die Roots werden in einem einzigen Durchlauf mit
+os.scandir abgearbeitet; Dateien werden als Stream geliefert, sodass Aufrufer schon während
+der Suche mit der Verarbeitung beginnen oder nach dem ersten Treffer abbrechen können.
+
+Verzeichnisse, die nur Abhängigkeiten, Build-Ausgaben oder Übersetzungen enthalten, werden
+übersprungen. Die Regeln sind fnmatch-Muster auf den Verzeichnisnamen (case-insensitive) und
+lassen sich über AL_DISCOVERY_IGNORE (kommagetrennt) ersetzen.
+"""
+
+import os
+import fnmatch
+from typing import Iterable, Iterator, List, Optional, Sequence
+
+DEFAULT_IGNORE_DIRS = (".alpackages", ".snapshots", "output", "translation*", ".git")
+IGNORE_DIRS = tuple(
+    pattern.strip().lower()
+    for pattern in os.environ.get("AL_DISCOVERY_IGNORE", ",".join(DEFAULT_IGNORE_DIRS)).split(",")
+    if pattern.strip()
+)
+
+def is_ignored_dir(name: str, ignore: Optional[Sequence[str]] = None) -> bool:
+    name = name.lower()
+    return any(fnmatch.fnmatchcase(name, pattern) for pattern in (IGNORE_DIRS if ignore is None else ignore))
+
+def is_ignored_path(path: str, ignore: Optional[Sequence[str]] = None) -> bool:
+    """True, wenn ein Verzeichnis im (relativen) Pfad unter die Ignore-Regeln fällt."""
+    parts = path.replace("\\", "/").split("/")[:-1]
+    return any(is_ignored_dir(part, ignore) for part in parts if part)
+
+def iter_file_entries(
+    roots: Iterable[str], extensions: Sequence[str] = (".al",), ignore: Optional[Sequence[str]] = None
+) -> Iterator[os.DirEntry]:
+    """
+    Liefere die os.DirEntry aller Dateien mit passender Endung unterhalb der Roots.
+    DirEntry.stat() ist unter Windows ohne zusätzlichen Systemaufruf verfügbar.
+    """
+    extensions = tuple(ext.lower() for ext in extensions)
+    for root in roots:
+        if not os.path.isdir(root):
+            print(f"WARNUNG: Pfad existiert nicht: {root}")
+            continue
+        stack = [root]
+        while stack:
+            dirpath = stack.pop()
+            try:
+                with os.scandir(dirpath) as it:
+                    entries = list(it)
+            except OSError as e:
+                print(f"WARNUNG: Verzeichnis nicht lesbar: {dirpath} ({e})")
+                continue
+            subdirs = []
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if not is_ignored_dir(entry.name, ignore):
+                            subdirs.append(entry.path)
+                    elif entry.name.lower().endswith(extensions):
+                        yield entry
+                except OSError:
+                    continue
+            # Umgekehrt auf den Stack, damit Unterverzeichnisse in Verzeichnisreihenfolge besucht werden
+            stack.extend(reversed(subdirs))
+
+def iter_files(
+    roots: Iterable[str], extensions: Sequence[str] = (".al",), ignore: Optional[Sequence[str]] = None
+) -> Iterator[str]:
+    """Liefere die Pfade aller Dateien mit passender Endung unterhalb der Roots als Stream."""
+    for entry in iter_file_entries(roots, extensions, ignore):
+        yield entry.path
+
+def find_files(
+    roots: Iterable[str], extensions: Sequence[str] = (".al",), ignore: Optional[Sequence[str]] = None
+) -> List[str]:
+    return list(iter_files(roots, extensions, ignore))
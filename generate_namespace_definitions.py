@@ -1,13 +1,16 @@
 import lancedb
 from collections import defaultdict
 import os
-import requests
 import random
 
+from embedding_backends import get_backend
+from lancedb_scan import scan_rows
+from ollama_client import get_client
+
 LANCEDB_PATH = "./lancedb"
 LANCEDB_TABLE = "namespace_vectors"
 OUTPUT_FILE = "namespace_definitions.md"
-OLLAMA_URL = "http://localhost:11434/api/generate"
+OLLAMA_GENERATE_PATH = "/api/generate"  # relativ zu OLLAMA_BASE_URL (siehe ollama_client)
 OLLAMA_MODEL = "phi4:latest"
 EMBED_MODEL = os.environ.get("OLLAMA_EMBED_MODEL", "mxbai-embed-large:latest")
 
@@ -80,22 +83,23 @@ def get_namespace_definition(namespace, examples):
         "stream": False
     }
     try:
-        response = requests.post(OLLAMA_URL, json=payload, timeout=120)
-        response.raise_for_status()
-        result = response.json()
+        result = get_client().post_json(OLLAMA_GENERATE_PATH, payload, timeout=120)
         return result.get("response", "").strip()
     except Exception as e:
         return f"Fehler bei OLLAMA: {e}"
 
 def main():
     db = lancedb.connect(LANCEDB_PATH)
-    table = db.open_table(LANCEDB_TABLE)
-    df = table.to_pandas()
+    # Tabelle des Backends aus EMBED_BACKEND (namespace_vectors bei Ollama)
+    table = db.open_table(get_backend().table_name(LANCEDB_TABLE))
     ns_groups = defaultdict(list)
-    for _, row in df.iterrows():
+    # Nur die Spalten für Gruppierung und Beispielobjekte, ohne Embeddings und Inhalt
+    for row in scan_rows(table, ["namespace", "object_type", "object_name", "filename"]):
         ns = row.get("namespace", "")
         if ns:
             ns_groups[ns].append(row)
+    client = get_client()
+    client.warm_up(OLLAMA_MODEL)
     with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
         for ns, objs in ns_groups.items():
             # Ziehe eine kleine, zufällige Auswahl von Beispielobjekten (max 5)
@@ -108,6 +112,8 @@ def main():
                 f.write(f"- {obj.get('object_type','')} {obj.get('object_name','')} ({obj.get('filename','')})\n")
             f.write("\n")
     print(f"Namespace-Definitionen nach {OUTPUT_FILE} geschrieben.")
+    client.finish(OLLAMA_MODEL)
+    client.report()
 
 if __name__ == "__main__":
     main()
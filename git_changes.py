@@ -0,0 +1,127 @@
+"""
+Git-Hilfsfunktionen für die Änderungserkennung in den Source-Roots.
+
+Die Roots (HC, MTC, KBA, Base Application) sind lokale Git-Checkouts. Über den HEAD-Commit
+und den Arbeitsbaum-Status lässt sich feststellen, ob sich ein Root seit dem letzten Lauf
+geändert hat, ohne jede Datei anzufassen. Ist Git nicht verfügbar oder liegt der Root
+nicht in einem Repository, liefern die Funktionen None.
+
+Mit CHANGE_DETECTION=git fragen AL-Index, Vectorizer und Namespace-Suggester Git nach den
+seit dem zuletzt verarbeiteten Commit geänderten Dateien (inkl. uncommitteter und ungetrackter
+Änderungen) und verarbeiten nur diese, statt alle Dateien zu lesen und zu hashen.
+"""
+
+import os
+import json
+import subprocess
+from typing import Dict, List, Optional, Set, Tuple
+
+from file_discovery import is_ignored_path
+
+# "hash": Dateien per mtime/Größe/Hash vergleichen (Standard), "git": Änderungen per git diff ermitteln
+CHANGE_DETECTION = os.environ.get("CHANGE_DETECTION", "hash").lower()
+
+def _git(cwd: str, args: List[str]) -> Optional[str]:
+    try:
+        result = subprocess.run(
+            ["git", *args], cwd=cwd, capture_output=True, text=True, encoding="utf-8", timeout=120
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    if result.returncode != 0:
+        return None
+    return result.stdout
+
+def git_head(root: str) -> Optional[str]:
+    """HEAD-Commit des Repositories, in dem der Root liegt."""
+    out = _git(root, ["rev-parse", "HEAD"])
+    return out.strip() if out else None
+
+def git_is_clean(root: str) -> Optional[bool]:
+    """True, wenn unterhalb des Roots keine uncommitteten oder ungetrackten Änderungen existieren."""
+    out = _git(root, ["status", "--porcelain", "--", "."])
+    if out is None:
+        return None
+    return not out.strip()
+
+def root_fingerprint(root: str) -> Optional[str]:
+    """
+    Fingerprint eines Roots: der HEAD-Commit, sofern der Arbeitsbaum unterhalb des Roots sauber ist.
+    Bei lokalen Änderungen oder ohne Git gibt es keinen stabilen Fingerprint (None).
+    """
+    head = git_head(root)
+    if not head or not git_is_clean(root):
+        return None
+    return f"git:{head}"
+
+def git_changed_files(root: str, since: str, extensions: Tuple[str, ...] = (".al",)) -> Optional[Tuple[Set[str], Set[str]]]:
+    """
+    Dateien unterhalb des Roots, die sich seit Commit `since` geändert haben: committete,
+    uncommittete und ungetrackte Änderungen. Gibt (geändert oder neu, gelöscht) als Pfade
+    relativ zum Root (mit '/') zurück, oder None, wenn Git die Frage nicht beantworten kann.
+    Dateien in ignorierten Verzeichnissen (siehe file_discovery) werden nicht gemeldet.
+    """
+    # git diff <commit> vergleicht den Commit mit dem Arbeitsbaum, deckt also beides ab
+    diff = _git(root, ["diff", "--name-status", "--no-renames", "--relative", "-z", since, "--", "."])
+    untracked = _git(root, ["ls-files", "--others", "--exclude-standard", "-z", "--", "."])
+    if diff is None or untracked is None:
+        return None
+    changed, deleted = set(), set()
+    fields = diff.split("\0")
+    for status, path in zip(fields[0::2], fields[1::2]):
+        if not path.lower().endswith(extensions) or is_ignored_path(path):
+            continue
+        if status.startswith("D"):
+            deleted.add(path)
+        else:
+            changed.add(path)
+    for path in untracked.split("\0"):
+        if path and path.lower().endswith(extensions) and not is_ignored_path(path):
+            changed.add(path)
+    return changed, deleted
+
+def git_snapshot(root: str, extensions: Tuple[str, ...] = (".al",)) -> Optional[Dict]:
+    """
+    Aktueller Git-Stand eines Roots: HEAD-Commit und die Dateien, die davon abweichen.
+    Wird nach einem Lauf gespeichert und beim nächsten Lauf an changes_since übergeben.
+    """
+    head = git_head(root)
+    if not head:
+        return None
+    dirty = git_changed_files(root, head, extensions)
+    if dirty is None:
+        return None
+    return {"commit": head, "dirty": sorted(dirty[0] | dirty[1])}
+
+def changes_since(root: str, snapshot: Optional[Dict], extensions: Tuple[str, ...] = (".al",)) -> Optional[Tuple[Set[str], Set[str]]]:
+    """
+    Seit einem gespeicherten Snapshot geänderte bzw. gelöschte Dateien (relativ zum Root).
+    Beim Snapshot uncommittete Dateien werden immer mitgeliefert, da sie inzwischen
+    zurückgesetzt sein können, ohne dass git diff sie noch zeigt.
+    """
+    if not snapshot or not snapshot.get("commit"):
+        return None
+    changes = git_changed_files(root, snapshot["commit"], extensions)
+    if changes is None:
+        return None
+    changed, deleted = changes
+    for path in snapshot.get("dirty", []):
+        if os.path.exists(os.path.join(root, path)):
+            changed.add(path)
+        else:
+            deleted.add(path)
+    return changed, deleted
+
+def load_commit_state(state_path: str) -> Dict[str, str]:
+    """Gespeicherte Snapshots (git_snapshot) je Root, z.B. für Vectorizer oder Namespace-Suggester."""
+    if not os.path.exists(state_path):
+        return {}
+    try:
+        with open(state_path, encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+def save_commit_state(state_path: str, state: Dict[str, str]) -> None:
+    with open(state_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
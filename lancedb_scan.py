@@ -0,0 +1,35 @@
+"""
+LanceDB-Scan
+
+Liest ausgewählte Spalten einer LanceDB-Tabelle als Arrow-Stream. Anders als
+table.to_pandas() werden dabei weder die Embeddings noch der Dateiinhalt geladen, und die
+Zeilen kommen in RecordBatches von SCAN_BATCH_SIZE Zeilen, sodass Speicherbedarf und
+Startzeit nicht mit der Zahl gespeicherter Vektoren wachsen.
+"""
+
+import os
+from typing import Dict, Iterator, Optional, Sequence
+
+import pyarrow as pa
+
+SCAN_BATCH_SIZE = int(os.environ.get("LANCEDB_SCAN_BATCH_SIZE", "8192"))
+
+def sql_string(value: str) -> str:
+    """String-Literal für LanceDB-Filter (einfache Anführungszeichen verdoppeln)."""
+    return "'" + value.replace("'", "''") + "'"
+
+def scan_batches(table, columns: Sequence[str], batch_size: int = SCAN_BATCH_SIZE,
+                 where: Optional[str] = None) -> Iterator[pa.RecordBatch]:
+    """Liefere nur die angegebenen Spalten aller (mit where: der passenden) Zeilen, gestreamt in RecordBatches."""
+    # Eine Suche ohne Vektor ist ein reiner Scan; limit(None) hebt das Standardlimit von 10 auf
+    query = table.search()
+    if where:
+        query = query.where(where)
+    reader = query.select(list(columns)).limit(None).to_batches(batch_size)
+    for batch in reader:
+        yield batch
+
+def scan_rows(table, columns: Sequence[str], batch_size: int = SCAN_BATCH_SIZE) -> Iterator[Dict]:
+    """Wie scan_batches, aber zeilenweise als Dicts."""
+    for batch in scan_batches(table, columns, batch_size):
+        yield from batch.to_pylist()
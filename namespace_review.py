@@ -1,17 +1,17 @@
 import os
 import re
-import concurrent.futures
-from pathlib import Path
 from typing import Dict, Tuple, Optional, List
 from langchain_community.chat_models import AzureChatOpenAI
 from langchain.prompts import ChatPromptTemplate
 from langchain.schema import SystemMessage, HumanMessage
 import openai
-import threading
 import json
 from rich.console import Console
 from rich.markdown import Markdown
 
+from al_index import ALObjectIndex, load_al_index
+from al_lexer import extract_reference_tuples
+
 # ----------- KONSTANTEN -----------
 OBJECT_NAME_TO_REVIEW = "KVSMEDCLLCMBGeneralMgtSub"
 SEARCH_ROOTS = [
@@ -24,94 +24,29 @@ OPENAI_API_KEY = os.environ.get("AZURE_OPENAI_KEY") or os.environ.get("OPENAI_AP
 OPENAI_API_BASE = os.environ.get("AZURE_OPENAI_ENDPOINT")
 OPENAI_API_VERSION = os.environ.get("AZURE_OPENAI_API_VERSION", "2023-05-15")
 OPENAI_DEPLOYMENT = os.environ.get("AZURE_OPENAI_DEPLOYMENT", "gpt-4.1")
-AL_INDEX_JSON = "al_index.json"
+AL_INDEX_DIR = "al_index"
 # ----------------------------------
 
-OBJECT_PATTERN = re.compile(
-    r'^(table|page|codeunit|report|xmlport|query|enum|interface|controladdin|pageextension|tableextension|enumextension|profile|dotnet|entitlement|permissionset|permissionsetextension|reportextension|enumvalue|entitlementset|entitlementsetextension)\s+(\d+)?\s*"?([\w\d_]+)"?',
-    re.IGNORECASE
-)
-NAMESPACE_PATTERN = re.compile(r'Namespace\s*=\s*"([\w\d_]+)"', re.IGNORECASE)
-
-def scan_al_file(filepath: str) -> Optional[Tuple[Tuple[str, str], Dict]]:
-    """Extrahiere Objekttyp, Name, Namespace (wenn vorhanden), Verzeichnis, Pfad."""
-    try:
-        with open(filepath, encoding="utf-8") as f:
-            lines = f.readlines()
-        obj_type, obj_name, namespace = None, None, None
-        for line in lines:
-            if not obj_type:
-                m = OBJECT_PATTERN.match(line.strip())
-                if m:
-                    obj_type = m.group(1)
-                    obj_name = m.group(3)
-            if not namespace:
-                n = NAMESPACE_PATTERN.search(line)
-                if n:
-                    namespace = n.group(1)
-            if obj_type and obj_name and namespace is not None:
-                break
-        if obj_type and obj_name:
-            return (
-                (obj_type.lower(), obj_name),
-                {
-                    "namespace": namespace,
-                    "directory": str(Path(filepath).parent),
-                    "filepath": filepath
-                }
-            )
-    except Exception:
-        pass
-    return None
-
-def parallel_scan_al_files(roots: List[str]) -> Dict[Tuple[str, str], Dict]:
-    """Durchsuche alle AL-Dateien in den Verzeichnissen parallel und baue das Dict."""
-    al_files = []
-    for root in roots:
-        for dirpath, _, filenames in os.walk(root):
-            for f in filenames:
-                if f.lower().endswith(".al"):
-                    al_files.append(os.path.join(dirpath, f))
-    result = {}
-    total = len(al_files)
-    print(f"Scanne {total} AL-Dateien ...", end="", flush=True)
-
-    # I/O-bound: ThreadPoolExecutor ist hier schneller als ProcessPoolExecutor
-    lock = threading.Lock()
-    def process_file(filepath):
-        r = scan_al_file(filepath)
-        if r:
-            key, val = r
-            with lock:
-                result[key] = val
-
-    from concurrent.futures import ThreadPoolExecutor
-    with ThreadPoolExecutor(max_workers=os.cpu_count() * 4) as executor:
-        futures = []
-        for filepath in al_files:
-            futures.append(executor.submit(process_file, filepath))
-        for idx, f in enumerate(futures, 1):
-            f.result()  # Exceptions werden hier ausgelöst
-            if idx % 500 == 0 or idx == total:
-                print(".", end="", flush=True)
-    print(" fertig.")
-    return result
-
-def find_object_file(obj_dict: Dict[Tuple[str, str], Dict], object_name: str) -> Optional[Tuple[str, str, Dict]]:
-    """Finde das Objekt im Dict (case-insensitive nach Name)."""
-    for (obj_type, obj_name), info in obj_dict.items():
-        if obj_name.lower() == object_name.lower():
-            return obj_type, obj_name, info
-    return None
+def find_object_file(obj_index: ALObjectIndex, object_name: str, match_stripped: bool = False) -> Optional[Tuple[str, str, Dict]]:
+    """Finde das Objekt im Index (case-insensitive nach Name, optional ersatzweise nach Name ohne Präfix)."""
+    info = obj_index.find(object_name)
+    if not info and match_stripped:
+        matches = obj_index.find_stripped(object_name)
+        info = matches[0] if matches else None
+    if not info:
+        return None
+    return info["object_type"].lower(), info["object_name"], info
 
-def read_file_content(filepath: str) -> str:
-    with open(filepath, encoding="utf-8") as f:
-        return f.read()
+def extract_references_from_al(content: str) -> List[Tuple[str, str]]:
+    """Extrahiere referenzierte Objekte als (object_type, object_name) mit dem AL-Lexer."""
+    return sorted(extract_reference_tuples(content))
 
-def extract_references_from_al(content: str) -> List[str]:
-    """Extrahiere referenzierte Objektnamen (sehr einfach, kann erweitert werden)."""
-    ref_pattern = re.compile(r'(Table|Page|Codeunit|Report|XmlPort|Query|Enum)\s*::\s*"?([\w\d_]+)"?', re.IGNORECASE)
-    return list(set(m[1] for m in ref_pattern.findall(content)))
+def find_reference(obj_index: ALObjectIndex, ref_type: str, ref_name: str) -> Optional[Tuple[str, str, Dict]]:
+    """Finde ein referenziertes Objekt über Typ und Name."""
+    info = obj_index.get(ref_type, ref_name)
+    if not info:
+        return None
+    return info["object_type"].lower(), info["object_name"], info
 
 def langchain_analyse(object_type: str, object_name: str, al_content: str, context_objects: List[Dict]) -> str:
     """Führe die Analyse mit LangChain und OpenAI durch."""
@@ -587,15 +522,15 @@ def print_namespace_result(result: str):
             console.print(f"- [cyan]{alt.get('namespace','')}[/cyan]: {alt.get('reason','')}")
     console.print("="*60 + "\n")
 
-def agent_analyse_references(obj_dict, references):
+def agent_analyse_references(obj_index, references):
     """Analysiere jede Referenz einzeln mit LLM und sammle die Namespace-Empfehlungen."""
     ref_contexts = []
-    for ref_name in references:
-        ref_found = find_object_file(obj_dict, ref_name)
+    for ref_type, ref_name in references:
+        ref_found = find_reference(obj_index, ref_type, ref_name)
         if not ref_found:
             continue
         ref_type, ref_obj_name, ref_info = ref_found
-        al_content = read_file_content(ref_info["filepath"])
+        al_content = ref_info["source"].read()
         # Kurzes Prompt für Referenzanalyse
         prompt = (
             f"Analysiere das folgende AL-Objekt und gib den Namespace als JSON zurück.\n"
@@ -641,17 +576,16 @@ def agent_analyse_references(obj_dict, references):
     return ref_contexts
 
 def main():
-    print("Starte parallele Indexierung...")
-    obj_dict = parallel_scan_al_files(SEARCH_ROOTS)
-    print(f"{len(obj_dict)} Objekte gefunden.")
+    obj_index = load_al_index(SEARCH_ROOTS, AL_INDEX_DIR)
+    print(f"{len(obj_index)} Objekte gefunden.")
 
     # Objekt suchen
-    found = find_object_file(obj_dict, OBJECT_NAME_TO_REVIEW)
+    found = find_object_file(obj_index, OBJECT_NAME_TO_REVIEW, match_stripped=True)
     if not found:
         print(f"Objekt '{OBJECT_NAME_TO_REVIEW}' nicht gefunden.")
         return
     object_type, obj_name, info = found
-    al_content = read_file_content(info["filepath"])
+    al_content = info["source"].read()
 
     # 1. KI-Analyse: Nur mit Hauptobjekt
     print(f"Analysiere Objekt: {object_type} {obj_name}")
@@ -660,8 +594,8 @@ def main():
     # 2. Referenzen extrahieren
     references = extract_references_from_al(al_content)
     context_objs = []
-    for ref_name in references:
-        ref_found = find_object_file(obj_dict, ref_name)
+    for ref_type, ref_name in references:
+        ref_found = find_reference(obj_index, ref_type, ref_name)
         if ref_found:
             ref_type, ref_obj_name, ref_info = ref_found
             context_objs.append({
@@ -675,7 +609,7 @@ def main():
     # Agent-Variante: Für jede Referenz eine eigene LLM-Analyse (nur bei vielen oder komplexen Referenzen sinnvoll)
     if context_objs:
         print(f"Starte Agent-Analyse für {len(context_objs)} Referenzen...")
-        agent_ref_contexts = agent_analyse_references(obj_dict, references)
+        agent_ref_contexts = agent_analyse_references(obj_index, references)
         # Kombiniere Kontextobjekte aus Index und Agent-Analysen
         # (Agent-Kontext hat ggf. bessere Namespace-Infos)
         for agent_ctx in agent_ref_contexts:
@@ -8,6 +8,10 @@ from tqdm import tqdm
 from langchain_community.chat_models import AzureChatOpenAI
 from langchain.schema import SystemMessage, HumanMessage
 
+from al_index import AL_INDEX_DIR, ALObjectIndex, load_al_index, is_under_roots, normalize_path
+from al_lexer import extract_reference_tuples
+from git_changes import CHANGE_DETECTION, changes_since, git_snapshot, load_commit_state, save_commit_state
+
 HC_ROOT = "C:/Repos/DevOps/HC-Work/Product_MED/Product_MED_AL/app/"
 MTC_ROOT = "C:/Repos/DevOps/MTC-Work/Product_MED_Tech365/Product_MED_Tech/app/"
 ANALYZE_ROOTS = [HC_ROOT, MTC_ROOT]
@@ -19,6 +23,8 @@ SEARCH_ROOTS = [
     "C:/Repos/DevOps/HC-Work/Product_KBA/Product_KBA_BC_AL/app/",
 ]
 CSV_OUTPUT = "namespace_suggestions.csv"
+# Git-Snapshot je Analyse-Root nach dem letzten Lauf (für CHANGE_DETECTION=git)
+SUGGESTER_STATE_FILE = "namespace_suggester_state.json"
 # Azure OpenAI Konfiguration
 OPENAI_API_KEY = os.environ.get("AZURE_OPENAI_KEY") or os.environ.get("OPENAI_API_KEY")
 OPENAI_API_BASE = os.environ.get("AZURE_OPENAI_ENDPOINT")
@@ -26,17 +32,6 @@ OPENAI_API_VERSION = os.environ.get("AZURE_OPENAI_API_VERSION", "2024-12-01-prev
 OPENAI_DEPLOYMENT = os.environ.get("AZURE_OPENAI_DEPLOYMENT", "gpt-4o-mini")
 
 
-OBJECT_PATTERN = re.compile(r'^(table|page|codeunit|report|xmlport|query|enum|interface|controladdin|pageextension|tableextension|enumextension|profile|dotnet|entitlement|permissionset|permissionsetextension|reportextension|enumvalue|entitlementset|entitlementsetextension)\s+(\d+)?\s*"?([\w\d_]+)"?', re.IGNORECASE)
-NAMESPACE_PATTERN = re.compile(r'(?:Namespace\s*=\s*"([\w\d_.]+)"|namespace\s+([\w\d_.]+)\s*;)', re.IGNORECASE)
-REF_PATTERN = re.compile(
-    r'(?:'
-        r'(Database|Table|Page|Codeunit|Report|XmlPort|Query|Enum)\s*::\s*"?([\w\d_]+)"?'
-        r'|'
-        r':\s*(Record|Page|Codeunit|Report|XmlPort|Query|Enum)\s+("?[\w\d_]+"?)'
-    r')',
-    re.IGNORECASE
-)
-
 # Namespace-Beschreibungen wie in namespace_review.py
 allowed_namespaces_with_desc = [
         ("Microsoft", "Microsoft Standardfunktionalität und Basiskomponenten"),
@@ -384,95 +379,18 @@ allowed_namespaces_with_desc = [
 
 allowed_namespaces = [ns for ns, desc in allowed_namespaces_with_desc]
 
-def find_al_files(root: str) -> List[str]:
-    al_files = []
-    for dirpath, _, filenames in os.walk(root):
-        for f in filenames:
-            if f.lower().endswith(".al"):
-                al_files.append(os.path.join(dirpath, f))
-    return al_files
-
-def extract_object_info(filepath: str):
-    with open(filepath, encoding="utf-8") as f:
-        lines = f.readlines()
-    obj_type, obj_name, namespace = None, None, None
-    for line in lines:
-        if not obj_type:
-            m = OBJECT_PATTERN.match(line.strip())
-            if m:
-                obj_type = m.group(1)
-                obj_name = m.group(3)
-        if not namespace:
-            n = NAMESPACE_PATTERN.search(line)
-            if n:
-                namespace = n.group(1) or n.group(2)
-        if obj_type and obj_name and namespace is not None:
-            break
-    al_code = "".join(lines)
-    return obj_type, obj_name, namespace, al_code
-
-def extract_references(al_code: str) -> List[str]:
-    return list(set(m[1] for m in REF_PATTERN.findall(al_code)))
-
-def index_al_objects(roots: List[str]) -> Dict[str, Dict]:
-    """Indexiere alle AL-Objekte nach Name (case-insensitive)."""
-    index = {}
-    for root in roots:
-        for filepath in find_al_files(root):
-            try:
-                obj_type, obj_name, namespace, al_code = extract_object_info(filepath)
-                if obj_type and obj_name:
-                    key = obj_name.lower()
-                    index[key] = {
-                        "object_type": obj_type,
-                        "object_name": obj_name,
-                        "namespace": namespace,
-                        "filepath": filepath,
-                        "al_code": al_code
-                    }
-            except Exception:
-                continue
-    return index
-
-def index_al_objects_with_type_and_name(roots: List[str]) -> Dict[Tuple[str, str], Dict]:
+def index_al_objects_with_type_and_name(obj_index: ALObjectIndex, roots: List[str]) -> Dict[Tuple[str, str], Dict]:
     """
-    Indexiere alle AL-Objekte nach (object_type.lower(), object_name.lower()).
-    Liefert Dict mit Typ und Name als Schlüssel, damit Referenzen besser aufgelöst werden können.
-    Fortschrittsanzeige mit tqdm.
+    Indexiere die AL-Objekte der angegebenen Roots nach (object_type.lower(), object_name.lower()).
+    Die Einträge stammen aus dem persistenten AL-Index und enthalten statt des AL-Codes
+    unter "source" einen Lazy Handle (ALSource), der erst beim Analysieren gelesen wird.
     """
     index = {}
-    all_files = []
-    for root in roots:
-        all_files.extend(find_al_files(root))
-    for filepath in tqdm(all_files, desc="Indexiere AL-Objekte", unit="Datei"):
-        try:
-            obj_type, obj_name, namespace, al_code = extract_object_info(filepath)
-            if obj_type and obj_name:
-                key = (obj_type.lower(), obj_name.lower())
-                index[key] = {
-                    "object_type": obj_type,
-                    "object_name": obj_name,
-                    "namespace": namespace,
-                    "filepath": filepath,
-                    "al_code": al_code
-                }
-        except Exception:
-            continue
+    for obj in obj_index:
+        if is_under_roots(obj["filepath"], roots):
+            index.setdefault((obj["object_type"].lower(), obj["object_name"].lower()), obj)
     return index
 
-def extract_reference_tuples(al_code: str) -> List[Tuple[str, str]]:
-    """
-    Extrahiere Referenzen als (object_type, object_name)-Tupel aus dem AL-Code.
-    """
-    refs = []
-    for m in REF_PATTERN.findall(al_code):
-        # m[0] oder m[2] ist der Typ, m[1] oder m[3] ist der Name
-        if m[1]:
-            refs.append((m[0].lower(), m[1].lower()))
-        elif m[3]:
-            refs.append((m[2].lower(), m[3].replace('"', '').lower()))
-    return list(set(refs))
-
 # "Besonders wichtig ist, wenn Objekte auf Einrichtuungen (Setup-Tabellen) verweisen"
         # TODO Verweise auf MED Einrichtungen
         # TODO Berückischtige schon bisher gemachte Entscheidungen
@@ -481,7 +399,7 @@ def extract_reference_tuples(al_code: str) -> List[Tuple[str, str]]:
         # TODO BinCode MTC
         # TODO HC und MTC gesondert behandeln
 
-def suggest_namespace_llm(obj_info, ref_infos):
+def suggest_namespace_llm(obj_info, al_code, ref_infos):
     prompt = (
         "Du bist ein Experte für Microsoft Dynamics 365 Business Central AL-Entwicklung und die Vergabe von Namespaces.\n"
         "Analysiere das folgende AL-Objekt und schlage einen passenden Namespace vor. "
@@ -504,7 +422,7 @@ def suggest_namespace_llm(obj_info, ref_infos):
         "\nFalls keiner dieser Namespaces fachlich passt, wähle 'Custom' und begründe dies ausführlich.\n"
         f"\nObjekttyp: {obj_info['object_type']}\n"
         f"Objektname: {obj_info['object_name']}\n"
-        f"AL-Code:\n{obj_info['al_code']}\n"
+        f"AL-Code:\n{al_code}\n"
     )
     if ref_infos:
         prompt += "\nKontext zu referenzierten Objekten:\n"
@@ -579,6 +497,52 @@ def build_hc_mtc_object_map(analyze_obj_index):
             grouped.setdefault(key, {})["hc"] = obj  # Default zu HC
     return grouped
 
+def suggestion_key(otype: str, obj_pair: Dict) -> Tuple[str, str, str]:
+    """Schlüssel einer Zeile in der CSV: (ObjectType, HC ObjectName, MTC ObjectName) in Kleinbuchstaben."""
+    hc_obj = obj_pair.get("hc")
+    mtc_obj = obj_pair.get("mtc")
+    return (
+        otype,
+        (hc_obj["object_name"] if hc_obj else "").lower(),
+        (mtc_obj["object_name"] if mtc_obj else "").lower(),
+    )
+
+def find_changed_suggestions(grouped: Dict, state: Dict) -> set:
+    """
+    Schlüssel der Objekte, deren HC- oder MTC-Datei sich laut git diff seit dem letzten Lauf geändert hat.
+    """
+    changed_paths = set()
+    for root in ANALYZE_ROOTS:
+        changes = changes_since(root, state.get(root))
+        if changes is None:
+            print(f"Kein verwertbarer Git-Stand vom letzten Lauf für {root}.")
+            continue
+        changed_paths.update(normalize_path(os.path.join(root, path)) for path in changes[0])
+    changed_keys = set()
+    for (otype, _), obj_pair in grouped.items():
+        if any(normalize_path(obj["filepath"]) in changed_paths for obj in obj_pair.values()):
+            changed_keys.add(suggestion_key(otype, obj_pair))
+    return changed_keys
+
+def drop_superseded_rows(csv_path: str, keys: set) -> None:
+    """Behalte für die angegebenen Schlüssel nur die zuletzt geschriebene Zeile (den neuen Vorschlag)."""
+    with open(csv_path, newline='', encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        fieldnames = reader.fieldnames
+        rows = list(reader)
+    def row_key(row):
+        return (
+            row.get("ObjectType", "").strip().lower(),
+            row.get("HC ObjectName", "").strip().lower(),
+            row.get("MTC ObjectName", "").strip().lower()
+        )
+    last = {row_key(row): i for i, row in enumerate(rows) if row_key(row) in keys}
+    rows = [row for i, row in enumerate(rows) if row_key(row) not in keys or last[row_key(row)] == i]
+    with open(csv_path, "w", newline='', encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+
 def read_existing_csv(csv_path: str) -> set:
     """
     Lese bereits analysierte Objekte aus der CSV (ObjectType, HC ObjectName, MTC ObjectName als Schlüssel).
@@ -621,10 +585,10 @@ def write_results_to_excel(rows, fieldnames, excel_path):
     wb.save(excel_path)
 
 def main():
-    # Index für Referenz-Kontext (alle Roots)
-    ref_obj_index = index_al_objects_with_type_and_name(SEARCH_ROOTS)
-    # Index für zu analysierende Objekte (nur HC/MTC)
-    analyze_obj_index = index_al_objects_with_type_and_name(ANALYZE_ROOTS)
+    # Index für Referenz-Kontext (alle Roots), einmalig aus dem persistenten AL-Index
+    ref_obj_index = load_al_index(SEARCH_ROOTS, AL_INDEX_DIR)
+    # Index für zu analysierende Objekte (nur HC/MTC), abgeleitet aus demselben Index
+    analyze_obj_index = index_al_objects_with_type_and_name(ref_obj_index, ANALYZE_ROOTS)
     grouped = build_hc_mtc_object_map(analyze_obj_index)
 
     fieldnames = [
@@ -640,6 +604,14 @@ def main():
     ]
 
     already_done = read_existing_csv(CSV_OUTPUT)
+    resuggested = set()
+    if CHANGE_DETECTION == "git":
+        # Snapshot vor der Analyse, spätere Änderungen erscheinen im nächsten git diff
+        state = load_commit_state(SUGGESTER_STATE_FILE)
+        snapshots = {root: git_snapshot(root) for root in ANALYZE_ROOTS}
+        resuggested = find_changed_suggestions(grouped, state) & already_done
+        already_done -= resuggested
+        print(f"{len(resuggested)} bereits analysierte Objekte wurden laut git diff geändert und werden neu bewertet.")
     total = len(grouped)
     processed_tokens = 0
     start_time = time.time()
@@ -657,21 +629,27 @@ def main():
             mtc_obj = obj_pair.get("mtc")
             hc_name = hc_obj["object_name"] if hc_obj else ""
             mtc_name = mtc_obj["object_name"] if mtc_obj else ""
-            key = (otype, hc_name.lower(), mtc_name.lower())
+            key = suggestion_key(otype, obj_pair)
             if key in already_done:
                 continue
             # Für die Analyse: bevorzugt HC, sonst MTC
             obj_info = hc_obj or mtc_obj
             if not obj_info:
                 continue
+            # AL-Code erst jetzt lesen, damit nur analysierte Objekte im Speicher landen
+            try:
+                al_code = obj_info["source"].read()
+            except OSError as e:
+                print(f"Fehler beim Lesen von {obj_info['filepath']}: {e}")
+                continue
             # Referenzen analysieren (mit Typ und Name, Kontext aus ref_obj_index)
             ref_infos = []
-            if obj_info["al_code"]:
-                for ref_type, ref_name in extract_reference_tuples(obj_info["al_code"]):
-                    ref_obj = ref_obj_index.get((ref_type, ref_name))
+            if al_code:
+                for ref_type, ref_name in extract_reference_tuples(al_code):
+                    ref_obj = ref_obj_index.get(ref_type, ref_name)
                     if ref_obj:
                         ref_infos.append({"object_type": ref_obj["object_type"], "object_name": ref_obj["object_name"], "namespace": ref_obj["namespace"]})
-            ns, reason, alternatives, analyse = suggest_namespace_llm(obj_info, ref_infos)
+            ns, reason, alternatives, analyse = suggest_namespace_llm(obj_info, al_code, ref_infos)
             alt_ns = "; ".join([a[0] for a in alternatives])
             alt_reason = "; ".join([a[1] for a in alternatives])
             row = {
@@ -698,6 +676,13 @@ def main():
             print(f"Bearbeitet: {idx}/{total} | Verstrichen: {elapsed:.1f}s | Ø {avg_time:.1f}s/Objekt | ETA: {eta/60:.1f}min", end="\r")
             time.sleep(0.2)
 
+    if resuggested:
+        # Alte Vorschläge der neu bewerteten Objekte entfernen
+        drop_superseded_rows(CSV_OUTPUT, resuggested)
+    if CHANGE_DETECTION == "git":
+        state.update({root: snapshot for root, snapshot in snapshots.items() if snapshot})
+        save_commit_state(SUGGESTER_STATE_FILE, state)
+
     # Nach Abschluss: Export nach Excel
     excel_path = CSV_OUTPUT.replace(".csv", ".xlsx")
     write_results_to_excel(results, fieldnames, excel_path)
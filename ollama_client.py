@@ -0,0 +1,235 @@
+"""
+Ollama-Client
+
+Gemeinsame HTTP-Schicht für alle Aufrufe an die lokale Ollama-Instanz (Embeddings im
+Vectorizer, Textgenerierung in generate_namespace_definitions).
+
+- Eine requests.Session mit Connection-Pool hält die TCP-Verbindungen offen, statt für
+  jeden Aufruf eine neue Verbindung aufzubauen.
+- Jeder Request setzt keep_alive (OLLAMA_KEEP_ALIVE), damit das Modell während eines Laufs
+  nicht zwischen zwei Bursts entladen wird. warm_up lädt das Modell vor dem ersten echten
+  Request, finish setzt keep_alive am Ende wieder auf den Ollama-Standard zurück.
+- report gibt aus, wie viele Requests über bestehende Verbindungen liefen und wie viel Zeit
+  Ollama mit dem Laden des Modells verbracht hat (load_duration aus den Antworten).
+
+Mehrere Ollama-Instanzen (z.B. auf verschiedenen Ports des Build-Servers) werden über
+OLLAMA_ENDPOINTS angegeben, kommagetrennt mit optionalem Gewicht: "http://localhost:11434=2,
+http://localhost:11435". Jeder Request geht an den Endpunkt mit den wenigsten offenen Requests
+(pro Gewicht) oder, mit OLLAMA_BALANCING=weighted, per gewichtetem Round-Robin. Endpunkte, die
+nicht erreichbar sind oder mit 5xx antworten, werden für OLLAMA_ENDPOINT_COOLDOWN Sekunden
+übersprungen; der Request wird dann am nächsten Endpunkt wiederholt.
+"""
+
+import os
+import time
+import threading
+from typing import Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+OLLAMA_BASE_URL = os.environ.get("OLLAMA_BASE_URL", "http://localhost:11434")
+# Wie lange Ollama das Modell nach dem letzten Request eines Laufs geladen hält
+OLLAMA_KEEP_ALIVE = os.environ.get("OLLAMA_KEEP_ALIVE", "30m")
+# Nach dem Lauf wieder der Standard von Ollama
+OLLAMA_KEEP_ALIVE_AFTER_RUN = os.environ.get("OLLAMA_KEEP_ALIVE_AFTER_RUN", "5m")
+OLLAMA_POOL_SIZE = int(os.environ.get("OLLAMA_POOL_SIZE", "16"))
+# Kommagetrennte Liste von Basis-URLs, optional mit Gewicht ("url=2"); Standard: OLLAMA_BASE_URL
+OLLAMA_ENDPOINTS = os.environ.get("OLLAMA_ENDPOINTS", OLLAMA_BASE_URL)
+# "least_outstanding" (Standard) oder "weighted"
+OLLAMA_BALANCING = os.environ.get("OLLAMA_BALANCING", "least_outstanding").lower()
+# Sekunden, die ein ausgefallener Endpunkt übersprungen wird
+OLLAMA_ENDPOINT_COOLDOWN = float(os.environ.get("OLLAMA_ENDPOINT_COOLDOWN", "30"))
+
+class OllamaEndpoint:
+    def __init__(self, base_url: str, weight: float = 1.0):
+        self.base_url = base_url.rstrip("/")
+        self.weight = weight
+        self.outstanding = 0
+        self.requests = 0
+        self.failures = 0
+        self.down_until = 0.0
+        # Zähler für gewichtetes Round-Robin
+        self.current_weight = 0.0
+
+    def is_up(self, now: float) -> bool:
+        return now >= self.down_until
+
+def parse_endpoints(spec: str) -> List[OllamaEndpoint]:
+    """Parse "url[=gewicht],url[=gewicht]" in eine Liste von Endpunkten."""
+    endpoints = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        url, _, weight = part.partition("=")
+        endpoints.append(OllamaEndpoint(url, float(weight) if weight else 1.0))
+    return endpoints
+
+def _is_endpoint_failure(error: Exception) -> bool:
+    """Verbindungsfehler, Timeouts und 5xx sprechen gegen den Endpunkt, 4xx gegen den Request."""
+    if isinstance(error, requests.HTTPError):
+        return error.response is None or error.response.status_code >= 500
+    return isinstance(error, (requests.ConnectionError, requests.Timeout))
+
+class OllamaClient:
+    def __init__(self, endpoints: Optional[List[str]] = None, keep_alive: str = OLLAMA_KEEP_ALIVE,
+                 pool_size: int = OLLAMA_POOL_SIZE, balancing: str = OLLAMA_BALANCING):
+        self.endpoints = parse_endpoints(",".join(endpoints) if endpoints else OLLAMA_ENDPOINTS)
+        if not self.endpoints:
+            raise ValueError("Keine Ollama-Endpunkte konfiguriert (OLLAMA_ENDPOINTS).")
+        self.keep_alive = keep_alive
+        self.balancing = balancing
+        self.session = requests.Session()
+        self._adapter = HTTPAdapter(pool_connections=len(self.endpoints), pool_maxsize=pool_size)
+        self.session.mount("http://", self._adapter)
+        self.session.mount("https://", self._adapter)
+        self._lock = threading.Lock()
+        self.load_duration_ns = 0
+        self.model_loads = 0
+
+    def _acquire(self, exclude: List[OllamaEndpoint]) -> Optional[OllamaEndpoint]:
+        """Wähle den nächsten Endpunkt und zähle ihn als belegt."""
+        with self._lock:
+            now = time.monotonic()
+            candidates = [ep for ep in self.endpoints if ep not in exclude and ep.is_up(now)]
+            if not candidates:
+                # Alle im Cooldown: lieber den am längsten ausgefallenen erneut versuchen als abbrechen
+                candidates = [ep for ep in self.endpoints if ep not in exclude]
+                if not candidates:
+                    return None
+                candidates = [min(candidates, key=lambda ep: ep.down_until)]
+            if self.balancing == "weighted":
+                # Glattes gewichtetes Round-Robin (wie nginx)
+                total = sum(ep.weight for ep in candidates)
+                for ep in candidates:
+                    ep.current_weight += ep.weight
+                endpoint = max(candidates, key=lambda ep: ep.current_weight)
+                endpoint.current_weight -= total
+            else:
+                endpoint = min(candidates, key=lambda ep: ((ep.outstanding + 1) / ep.weight, ep.requests))
+            endpoint.outstanding += 1
+            endpoint.requests += 1
+            return endpoint
+
+    def _release(self, endpoint: OllamaEndpoint, failed: bool) -> None:
+        with self._lock:
+            endpoint.outstanding -= 1
+            if failed:
+                endpoint.failures += 1
+                endpoint.down_until = time.monotonic() + OLLAMA_ENDPOINT_COOLDOWN
+            else:
+                endpoint.down_until = 0.0
+
+    def _post(self, endpoint: OllamaEndpoint, path: str, payload: Dict, timeout: float) -> Dict:
+        response = self.session.post(f"{endpoint.base_url}{path}", json=payload, timeout=timeout)
+        response.raise_for_status()
+        result = response.json()
+        load_duration = result.get("load_duration") or 0
+        with self._lock:
+            self.load_duration_ns += load_duration
+            # Ist das Modell bereits geladen, meldet Ollama nur wenige Millisekunden
+            if load_duration > 100_000_000:
+                self.model_loads += 1
+        return result
+
+    def post_json(self, path: str, payload: Dict, timeout: float = 300) -> Dict:
+        """
+        POST an einen Ollama-Endpunkt (z.B. "/api/embed") und gib die JSON-Antwort zurück.
+        Fällt ein Endpunkt aus, wird der Request an den nächsten gesendet. HTTP-Fehler
+        werden als requests.HTTPError (mit .response) geworfen.
+        """
+        payload = {"keep_alive": self.keep_alive, **payload}
+        tried: List[OllamaEndpoint] = []
+        while True:
+            endpoint = self._acquire(tried)
+            if endpoint is None:
+                raise last_error
+            tried.append(endpoint)
+            try:
+                result = self._post(endpoint, path, payload, timeout)
+            except Exception as e:
+                failed = _is_endpoint_failure(e)
+                self._release(endpoint, failed)
+                if not failed:
+                    raise
+                print(f"Ollama-Endpunkt {endpoint.base_url} fehlgeschlagen ({e}), versuche nächsten.")
+                last_error = e
+                continue
+            self._release(endpoint, False)
+            return result
+
+    def check_health(self) -> List[OllamaEndpoint]:
+        """Frage /api/version aller Endpunkte ab; nicht erreichbare gehen in den Cooldown."""
+        healthy = []
+        for endpoint in self.endpoints:
+            try:
+                self.session.get(f"{endpoint.base_url}/api/version", timeout=5).raise_for_status()
+                healthy.append(endpoint)
+            except Exception as e:
+                print(f"Ollama-Endpunkt {endpoint.base_url} nicht erreichbar: {e}")
+                with self._lock:
+                    endpoint.failures += 1
+                    endpoint.down_until = time.monotonic() + OLLAMA_ENDPOINT_COOLDOWN
+        return healthy
+
+    def _post_each(self, path: str, payload: Dict, timeout: float, endpoints: List[OllamaEndpoint]) -> None:
+        """Sende denselben Request an jeden der Endpunkte (jede Instanz lädt ihr eigenes Modell)."""
+        for endpoint in endpoints:
+            try:
+                self._post(endpoint, path, {"keep_alive": self.keep_alive, **payload}, timeout)
+            except Exception as e:
+                print(f"Ollama-Endpunkt {endpoint.base_url}: {path} fehlgeschlagen: {e}")
+
+    def warm_up(self, model: str, kind: str = "generate") -> None:
+        """Prüfe alle Endpunkte und lade das Modell auf den erreichbaren (kind: "generate" oder "embed")."""
+        healthy = self.check_health()
+        if kind == "embed":
+            self._post_each("/api/embed", {"model": model, "input": "warm-up"}, 600, healthy)
+        else:
+            # /api/generate ohne Prompt lädt nur das Modell
+            self._post_each("/api/generate", {"model": model}, 600, healthy)
+
+    def finish(self, model: str, kind: str = "generate") -> None:
+        """Setze keep_alive des Modells nach dem Lauf wieder auf OLLAMA_KEEP_ALIVE_AFTER_RUN."""
+        now = time.monotonic()
+        endpoints = [ep for ep in self.endpoints if ep.is_up(now)]
+        if kind == "embed":
+            payload = {"model": model, "input": "", "keep_alive": OLLAMA_KEEP_ALIVE_AFTER_RUN}
+            self._post_each("/api/embed", payload, 60, endpoints)
+        else:
+            self._post_each("/api/generate", {"model": model, "keep_alive": OLLAMA_KEEP_ALIVE_AFTER_RUN}, 60, endpoints)
+
+    def connection_stats(self) -> Dict[str, int]:
+        """Requests und neu aufgebaute Verbindungen laut den urllib3-Pools der Session."""
+        requests_total, connections = 0, 0
+        pools = self._adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools[key]
+            requests_total += pool.num_requests
+            connections += pool.num_connections
+        return {"requests": requests_total, "connections": connections}
+
+    def report(self) -> None:
+        stats = self.connection_stats()
+        reused = stats["requests"] - stats["connections"]
+        rate = reused / stats["requests"] * 100 if stats["requests"] else 0.0
+        print(
+            f"Ollama: {stats['requests']} Requests über {stats['connections']} Verbindungen "
+            f"({rate:.0f}% wiederverwendet), Modell-Ladezeit {self.load_duration_ns / 1e9:.1f}s "
+            f"({self.model_loads} Ladevorgänge)"
+        )
+        if len(self.endpoints) > 1:
+            for endpoint in self.endpoints:
+                print(f"  {endpoint.base_url}: {endpoint.requests} Requests, {endpoint.failures} Ausfälle")
+
+_client: Optional[OllamaClient] = None
+_client_lock = threading.Lock()
+
+def get_client() -> OllamaClient:
+    """Gemeinsamer Client für den ganzen Prozess, damit sich alle Aufrufer den Pool teilen."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = OllamaClient()
+        return _client
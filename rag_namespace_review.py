@@ -7,6 +7,14 @@ import pyarrow as pa
 import numpy as np
 import hashlib
 
+from al_chunker import CHUNK_TABLE, search_objects
+from al_index import load_al_index
+from al_lexer import extract_reference_tuples, iter_references
+from al_scanner import scan_al_header
+from embedding_backends import generate_embeddings, get_backend
+from file_discovery import iter_files
+from vector_storage import search_table
+
 # -------------------- KONSTANTEN --------------------
 OBJECT_NAME_TO_REVIEW = "KVSMEDCLLCMBGeneralMgtSub"  # <--- Setze hier den gewünschten Objektnamen
 HC_ROOT = "C:/Repos/DevOps/HC-Work/Product_MED/Product_MED_AL/app/"
@@ -19,6 +27,7 @@ AZURE_OPENAI_DEPLOYMENT = os.environ.get("AZURE_OPENAI_DEPLOYMENT", "gpt-4.1")
 
 LANCEDB_PATH = "./lancedb"
 LANCEDB_TABLE = "namespace_vectors"
+AL_INDEX_DIR = "al_index"
 # ----------------------------------------------------
 
 def load_csv_data(csv_path):
@@ -36,19 +45,23 @@ def find_object_rows(rows, object_name):
     return matches
 
 def retrieve_context(object_type, object_name, top_k=3):
-    """Hole die ähnlichsten Objekte aus LanceDB als Kontext für RAG."""
+    """
+    Hole die ähnlichsten Objekte aus LanceDB als Kontext für RAG. Gesucht wird über die Chunks
+    (namespace_chunks), je Objekt zählt der beste Chunk; ohne Chunk-Tabelle über ganze Dateien.
+    Tabellen und Embedding kommen vom Backend aus EMBED_BACKEND (siehe embedding_backends).
+    """
     db = lancedb.connect(LANCEDB_PATH)
-    table = db.open_table(LANCEDB_TABLE)
-    # Embedding: Dummy-Embedding (hier ggf. echtes Embedding einfügen)
-    # Für echtes Embedding: OpenAI Embedding API oder eigene Methode
-    # Hier: Nutze object_type + object_name als Text
-    import numpy as np
+    # Hier: Nutze object_type + object_name als Text, eingebettet wie die Dokumente im Vectorizer
     query_text = f"{object_type} {object_name}"
-    # Dummy: zeros, in Produktion: echtes Embedding
-    query_emb = np.zeros(1024, dtype=np.float32).tolist()
+    query_emb = generate_embeddings([query_text])[0]
+    if query_emb is None:
+        return []
     try:
-        results = table.search(query_emb).limit(top_k).to_list()
-        return results
+        backend = get_backend()
+        chunk_table = backend.table_name(CHUNK_TABLE)
+        if chunk_table in db.table_names():
+            return search_objects(db.open_table(chunk_table), query_emb, top_k)
+        return search_table(db.open_table(backend.table_name(LANCEDB_TABLE)), query_emb, top_k)
     except Exception:
         return []
 
@@ -140,22 +153,16 @@ def exists_in_csv(csv_path, object_name):
 
 def find_al_file(object_name, root):
     # Suche nach .al-Dateien, die den Objekt-Namen enthalten
-    for dirpath, _, filenames in os.walk(root):
-        for f in filenames:
-            if f.lower().endswith(".al") and object_name.lower() in f.lower():
-                return os.path.join(dirpath, f)
+    for filepath in iter_files([root]):
+        if object_name.lower() in os.path.basename(filepath).lower():
+            return filepath
     return None
 
 def extract_object_info_from_file(filepath):
-    import re
-    OBJECT_PATTERN = re.compile(r'^(table|page|codeunit|report|xmlport|query|enum|interface|controladdin|pageextension|tableextension|enumextension|profile|dotnet|entitlement|permissionset|permissionsetextension|reportextension|enumvalue|entitlementset|entitlementsetextension)\s+(\d+)?\s*"?([\w\d_]+)"?', re.IGNORECASE)
-    with open(filepath, encoding="utf-8") as f:
-        for line in f:
-            match = OBJECT_PATTERN.match(line.strip())
-            if match:
-                obj_type = match.group(1)
-                obj_name = match.group(3)
-                return obj_type, obj_name
+    header = scan_al_header(filepath)
+    if header:
+        obj_type, _, obj_name, _, _ = header
+        return obj_type, obj_name
     return None, None
 
 def add_to_lancedb(object_id, object_type, object_name, namespace, filename, directory):
@@ -349,23 +356,22 @@ def extract_explicit_namespace_from_file(filepath):
 
 def extract_extension_base_object(filepath):
     """Extrahiert bei Extension-Objekten die Basisklasse (z.B. extends "Customer List")."""
-    import re
-    EXTENSION_PATTERN = re.compile(r'(pageextension|tableextension|enumextension|reportextension)\s+\d*\s*"?([\w\d_]+)"?\s+extends\s+"?([\w\d_ ]+)"?', re.IGNORECASE)
     with open(filepath, encoding="utf-8") as f:
-        for line in f:
-            match = EXTENSION_PATTERN.match(line.strip())
-            if match:
-                return match.group(1), match.group(3)
+        content = f.read()
+    for ref in iter_references(content):
+        if ref.kind == "extends":
+            return ref.detail, ref.object_name
     return None, None
 
 def get_namespace_from_base_object(base_object_name, lancedb_path=LANCEDB_PATH, lancedb_table=LANCEDB_TABLE):
-    """Sucht den Namespace der Basisklasse via RAG (LanceDB)."""
-    db = lancedb.connect(lancedb_path)
-    table = db.open_table(lancedb_table)
-    # Dummy-Embedding für Suche, in Produktion: echtes Embedding
-    query_emb = np.zeros(1024, dtype=np.float32).tolist()
+    """Sucht den Namespace der Basisklasse via RAG (LanceDB), in der Tabelle des Backends aus EMBED_BACKEND."""
+    query_emb = generate_embeddings([base_object_name])[0]
+    if query_emb is None:
+        return None
     try:
-        results = table.search(query_emb).limit(10).to_list()
+        db = lancedb.connect(lancedb_path)
+        table = db.open_table(get_backend().table_name(lancedb_table))
+        results = search_table(table, query_emb, 10)
         # Suche nach exaktem Namen
         for obj in results:
             if obj.get("object_name", "").strip().lower() == base_object_name.strip().lower():
@@ -375,68 +381,19 @@ def get_namespace_from_base_object(base_object_name, lancedb_path=LANCEDB_PATH,
     return None
 
 def build_objectname_to_path_map(roots):
-    """Erstellt ein Dictionary: object_name_lower -> filepath für alle .al-Dateien in den angegebenen Roots."""
-    import re
-    OBJECT_PATTERN = re.compile(r'^(table|page|codeunit|report|xmlport|query|enum|interface|controladdin|pageextension|tableextension|enumextension|profile|dotnet|entitlement|permissionset|permissionsetextension|reportextension|enumvalue|entitlementset|entitlementsetextension)\s+(\d+)?\s*"?([\w\d_]+)"?', re.IGNORECASE)
+    """Erstellt ein Dictionary: object_name_lower -> filepath aus dem persistenten AL-Index."""
     name_to_path = {}
-    total_files = 0
-    parsed_files = 0
-    
-    print(f"Starte Indexierung der AL-Dateien in: {roots}")
-    
-    for root in roots:
-        if not os.path.exists(root):
-            print(f"WARNUNG: Pfad existiert nicht: {root}")
-            continue
-            
-        print(f"Durchsuche Verzeichnis: {root}")
-        for dirpath, _, filenames in os.walk(root):
-            al_files = [f for f in filenames if f.lower().endswith(".al")]
-            total_files += len(al_files)
-            
-            for f in al_files:
-                filepath = os.path.join(dirpath, f)
-                try:
-                    with open(filepath, encoding="utf-8") as file:
-                        # Suche nach der ersten Zeile mit Objektdefinition
-                        content = file.read()
-                        
-                        # Suche nach dem Objektnamen in der Datei
-                        for line in content.split('\n'):
-                            line = line.strip()
-                            if not line or line.startswith("//"):
-                                continue
-                            match = OBJECT_PATTERN.match(line)
-                            if match:
-                                obj_type = match.group(1)
-                                obj_name = match.group(3)
-                                
-                                if obj_name:
-                                    parsed_files += 1
-                                    obj_name_lower = obj_name.lower()
-                                    name_to_path[obj_name_lower] = filepath
-                                    # Debug: Objekt gefunden
-                                    # print(f"Objekt gefunden: {obj_name} in {filepath}")
-                                break
-                except Exception as e:
-                    print(f"Fehler beim Lesen von {filepath}: {e}")
-                    continue
-    
-    print(f"Indexierung abgeschlossen: {parsed_files} Objekte in {total_files} AL-Dateien gefunden.")
+    for obj in load_al_index(roots, AL_INDEX_DIR):
+        name_to_path.setdefault(obj["object_name"].lower(), obj["filepath"])
     return name_to_path
 
 def find_al_file_by_partial_name(object_name, roots):
     """Fallback-Methode: Suche nach Dateinamen, die den Objektnamen enthalten."""
     print(f"Fallback-Suche für '{object_name}' nach Dateinamen...")
-    for root in roots:
-        if not os.path.exists(root):
-            continue
-        for dirpath, _, filenames in os.walk(root):
-            for f in filenames:
-                if f.lower().endswith(".al") and object_name.lower() in f.lower():
-                    filepath = os.path.join(dirpath, f)
-                    print(f"Datei gefunden (Fallback): {filepath}")
-                    return filepath
+    for filepath in iter_files(roots):
+        if object_name.lower() in os.path.basename(filepath).lower():
+            print(f"Datei gefunden (Fallback): {filepath}")
+            return filepath
     return None
 
 def extract_referenced_objects_from_al(content):
@@ -444,26 +401,25 @@ def extract_referenced_objects_from_al(content):
     Extrahiert referenzierte Objekte (z.B. Table, Page, Codeunit) aus AL-Code.
     Gibt eine Liste von (object_type, object_name) zurück.
     """
-    import re
-    patterns = [
-        re.compile(r'(Table|Page|Codeunit|Report|XmlPort|Query|Enum)\s*::\s*"?([\w\d_]+)"?', re.IGNORECASE),
-        re.compile(r'(Table|Page|Codeunit|Report|XmlPort|Query|Enum)\s*\(\s*"?([\w\d_]+)"?\s*\)', re.IGNORECASE)
-    ]
-    refs = set()
-    for pat in patterns:
-        for m in pat.findall(content):
-            refs.add((m[0].lower(), m[1]))
-    return list(refs)
+    return sorted(extract_reference_tuples(content))
 
 def retrieve_context_for_references(refs, top_k=2):
-    """Holt Kontextobjekte aus LanceDB für alle referenzierten Objekte."""
-    db = lancedb.connect(LANCEDB_PATH)
-    table = db.open_table(LANCEDB_TABLE)
+    """Holt Kontextobjekte aus LanceDB für alle referenzierten Objekte (wie retrieve_context)."""
+    if not refs:
+        return []
+    try:
+        db = lancedb.connect(LANCEDB_PATH)
+        table = db.open_table(get_backend().table_name(LANCEDB_TABLE))
+    except Exception:
+        return []
+    # Alle Anfragen in einem Aufruf, das Backend bettet sie gebündelt ein
+    query_embs = generate_embeddings([f"{obj_type} {obj_name}" for obj_type, obj_name in refs])
     context_objs = []
-    for obj_type, obj_name in refs:
-        query_emb = np.zeros(1024, dtype=np.float32).tolist()
+    for (obj_type, obj_name), query_emb in zip(refs, query_embs):
+        if query_emb is None:
+            continue
         try:
-            results = table.search(query_emb).limit(top_k).to_list()
+            results = search_table(table, query_emb, top_k)
             # Filter auf exakten Namen
             for obj in results:
                 if obj.get("object_name", "").strip().lower() == obj_name.strip().lower():
@@ -0,0 +1,70 @@
+"""
+AL-Chunker: Teilung an Prozedur- und Abschnittsgrenzen, Deklaration als Präfix, vollständige Abdeckung.
+"""
+
+import al_chunker
+from al_chunker import chunk_al_object, search_objects, split_segments
+
+DECLARATION = 'codeunit 50100 "KVS Sales Mgt."'
+
+def procedure(name, body_lines=20):
+    body = "".join(f"        Counter += {i};\n" for i in range(body_lines))
+    return f"    procedure {name}()\n    var\n        Counter: Integer;\n    begin\n{body}    end;\n\n"
+
+def large_codeunit(count=6):
+    return (
+        f"namespace KVS.Sales;\n\n{DECLARATION}\n{{\n"
+        + "    [EventSubscriber(ObjectType::Codeunit, Codeunit::\"Sales-Post\", 'OnAfterPost', '', false, false)]\n"
+        + "".join(procedure(f"Proc{i}") for i in range(count))
+        + "}\n"
+    )
+
+def test_small_object_is_one_header_chunk():
+    content = f"{DECLARATION}\n{{\n}}\n"
+    assert chunk_al_object(content) == [al_chunker.ALChunk(0, content, "header", 0)]
+
+def test_large_object_is_split_at_procedures():
+    content = large_codeunit()
+    chunks = chunk_al_object(content, max_chars=1200)
+    assert len(chunks) > 1
+    assert [chunk.index for chunk in chunks] == list(range(len(chunks)))
+    assert chunks[0].label == "header"
+    for chunk in chunks[1:]:
+        assert chunk.content.startswith(DECLARATION + "\n")
+        assert chunk.label.startswith("procedure Proc")
+        assert len(chunk.content) <= 1200
+
+    # Ohne das Präfix ergeben die Chunks wieder den vollständigen Inhalt
+    prefix = DECLARATION + "\n"
+    parts = [chunks[0].content] + [chunk.content[len(prefix):] for chunk in chunks[1:]]
+    assert "".join(parts) == content
+    lines = content.splitlines(keepends=True)
+    assert all(lines[chunk.start_line] == part.splitlines(keepends=True)[0] for chunk, part in zip(chunks, parts))
+
+def test_attributes_belong_to_following_procedure():
+    lines = large_codeunit(2).splitlines(keepends=True)
+    segments = split_segments(lines)
+    assert [label for _, _, label in segments] == ["header", "procedure Proc0", "procedure Proc1"]
+    assert lines[segments[1][0]].lstrip().startswith("[EventSubscriber")
+    assert segments[-1][1] == len(lines)
+
+def test_oversized_segment_is_split_at_lines():
+    content = f"{DECLARATION}\n{{\n" + procedure("Huge", body_lines=200) + "}\n"
+    chunks = chunk_al_object(content, max_chars=1000)
+    assert len(chunks) > 3
+    assert all(len(chunk.content) <= 1000 for chunk in chunks)
+    assert all(chunk.label == "procedure Huge" for chunk in chunks[1:])
+
+def test_search_objects_groups_chunks(monkeypatch):
+    rows = [
+        {"root": "hc", "id": "a.al", "label": "procedure X", "_distance": 0.1},
+        {"root": "hc", "id": "a.al", "label": "header", "_distance": 0.2},
+        {"root": "hc", "id": "b.al", "label": "header", "_distance": 0.3},
+        {"root": "mtc", "id": "a.al", "label": "header", "_distance": 0.4},
+    ]
+    monkeypatch.setattr(al_chunker, "search_table", lambda table, query, limit, where: rows[:limit])
+    results = search_objects(None, [0.0], top_k=2, fanout=2)
+    assert [(row["root"], row["id"], row["label"], row["matched_chunks"]) for row in results] == [
+        ("hc", "a.al", "procedure X", 2),
+        ("hc", "b.al", "header", 1),
+    ]
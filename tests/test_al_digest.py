@@ -0,0 +1,96 @@
+"""
+AL-Digest: Kurzfassung eines Objekts für das Embedding und Entfernen von Boilerplate.
+"""
+
+from al_digest import build_digest, estimate_tokens, strip_boilerplate
+
+SALES_POST = """// Copyright (c) Microsoft Corporation.
+namespace Microsoft.Sales.Posting;
+
+codeunit 80 "Sales-Post"
+{
+    Caption = 'Sales Post';
+    TableNo = "Sales Header";
+
+    trigger OnRun()
+    var
+        SalesLine: Record "Sales Line";
+        Release: Codeunit "Release Sales Document";
+    begin
+        Release.Run(Rec);
+        SalesLine.SetRange("Document No.", Rec."No.");
+    end;
+
+    procedure PostDocument(var SalesHeader: Record "Sales Header")
+    begin
+        OnBeforePostSalesDoc(SalesHeader);
+    end;
+
+    [IntegrationEvent(false, false)]
+    local procedure OnBeforePostSalesDoc(var SalesHeader: Record "Sales Header")
+    begin
+    end;
+
+    [EventSubscriber(ObjectType::Codeunit, Codeunit::"Release Sales Document", 'OnAfterReleaseSalesDoc', '', false, false)]
+    local procedure HandleRelease()
+    begin
+    end;
+}
+"""
+
+def test_build_digest_lines():
+    assert build_digest(SALES_POST).splitlines() == [
+        'codeunit 80 "Sales-Post"',
+        "namespace: Microsoft.Sales.Posting",
+        "caption: Sales Post",
+        "procedures: PostDocument, OnBeforePostSalesDoc, HandleRelease",
+        "triggers: OnRun",
+        "publishes events: OnBeforePostSalesDoc",
+        'subscribes to: codeunit "Release Sales Document".OnAfterReleaseSalesDoc',
+        'references: table "Sales Header", table "Sales Line", codeunit "Release Sales Document"',
+    ]
+
+def test_build_digest_extension_and_source_table():
+    content = """pageextension 50100 "KVS Customer Card" extends "Customer Card"
+{
+    layout
+    {
+        addlast(General)
+        {
+            field(KVSRating; Rec."KVS Rating") { }
+        }
+    }
+}
+page 50101 Other { SourceTable = Customer; }
+"""
+    digest = build_digest(content).splitlines()
+    assert digest[0] == 'pageextension 50100 "KVS Customer Card"'
+    assert 'extends: "Customer Card"' in digest
+    assert "source table: Customer" in digest
+    assert "fields: KVSRating" in digest
+
+def test_content_without_declaration_is_unchanged():
+    content = "// nur ein Kommentar\n"
+    assert build_digest(content) == content
+
+def test_strip_boilerplate():
+    content = """    // Kommentar
+    field(1; "No."; Code[20])
+    {
+        Caption = 'No.';
+        ToolTip = 'Specifies the number.';
+        /* Block */
+        DataClassification = CustomerContent;
+    }
+    Url := 'https://example.com'; // Rest
+"""
+    stripped = strip_boilerplate(content)
+    assert stripped.splitlines() == [
+        'field(1; "No."; Code[20])',
+        "{",
+        "DataClassification = CustomerContent;",
+        "}",
+        "Url := 'https://example.com';",
+    ]
+    assert estimate_tokens(stripped) < estimate_tokens(content)
+    assert estimate_tokens("Rec.Get(1);") == 7
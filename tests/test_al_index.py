@@ -0,0 +1,94 @@
+"""
+AL-Index: inkrementeller Abgleich mit dem Dateisystem über das Manifest (mtime, Größe, Hash).
+"""
+
+import os
+
+from al_index import load_al_index, update_al_table
+
+def write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+
+def codeunit(number, name, namespace="KVS.Test"):
+    return f'namespace {namespace};\n\ncodeunit {number} "{name}"\n{{\n}}\n'
+
+def names(obj_index):
+    return sorted(entry["object_name"] for entry in obj_index)
+
+def test_update_al_table_is_incremental(tmp_path):
+    root = str(tmp_path / "app")
+    write(os.path.join(root, "A.Codeunit.al"), codeunit(50100, "KVS A"))
+    write(os.path.join(root, "B.Codeunit.al"), codeunit(50101, "KVS B"))
+
+    table, added, changed, deleted = update_al_table(None, [root])
+    assert (added, changed, deleted) == (2, 0, 0)
+    assert table.num_rows == 2
+
+    # Unverändert: keine neue Tabelle
+    assert update_al_table(table, [root]) == (None, 0, 0, 0)
+
+    write(os.path.join(root, "A.Codeunit.al"), codeunit(50100, "KVS A Renamed"))
+    os.remove(os.path.join(root, "B.Codeunit.al"))
+    write(os.path.join(root, "C.Codeunit.al"), codeunit(50102, "KVS C"))
+    table, added, changed, deleted = update_al_table(table, [root])
+    assert (added, changed, deleted) == (1, 1, 1)
+    assert sorted(table.column("object_name").to_pylist()) == ["KVS A Renamed", "KVS C"]
+
+def test_touched_file_keeps_header(tmp_path):
+    root = str(tmp_path / "app")
+    path = os.path.join(root, "A.Codeunit.al")
+    write(path, codeunit(50100, "KVS A"))
+    table, *_ = update_al_table(None, [root])
+
+    def touch():
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    # Neue Dateien bekommen ihren Hash erst beim ersten geänderten mtime
+    touch()
+    table, *_ = update_al_table(table, [root])
+    touch()
+    updated, added, changed, deleted = update_al_table(table, [root])
+    # Nur angefasst: Inhalt per Hash als unverändert erkannt
+    assert (added, changed, deleted) == (0, 0, 0)
+    assert updated.column("object_name").to_pylist() == ["KVS A"]
+
+def test_load_al_index_persists_between_runs(tmp_path, capsys):
+    root = str(tmp_path / "app")
+    index_dir = str(tmp_path / "index")
+    write(os.path.join(root, "A.Codeunit.al"), codeunit(50100, "KVS A"))
+    assert names(load_al_index([root], index_dir)) == ["KVS A"]
+    assert "1 neu" in capsys.readouterr().out
+
+    write(os.path.join(root, "B.Codeunit.al"), codeunit(50101, "KVS B"))
+    assert names(load_al_index([root], index_dir)) == ["KVS A", "KVS B"]
+    assert "1 neu, 0 geändert, 0 gelöscht" in capsys.readouterr().out
+
+    # rebuild verwirft den gespeicherten Stand
+    load_al_index([root], index_dir, rebuild=True)
+    assert "2 neu" in capsys.readouterr().out
+
+def test_object_index_lookups(tmp_path):
+    hc = str(tmp_path / "hc")
+    base = str(tmp_path / "base")
+    write(os.path.join(hc, "SalesExt.al"), 'tableextension 50100 "KVSMED Sales Ext" extends "Sales Header"\n{\n}\n')
+    write(os.path.join(hc, "Customer.al"), 'table 50101 "Customer"\n{\n}\n')
+    write(os.path.join(base, "Customer.al"), 'table 18 "Customer"\n{\n}\n')
+    write(os.path.join(base, "SalesPost.al"), 'codeunit 80 "Sales-Post"\n{\n}\n')
+    obj_index = load_al_index([hc, base], str(tmp_path / "index"))
+
+    assert len(obj_index) == 4
+    # Gleicher Name in zwei Roots: get/find liefern den zuerst konfigurierten Root
+    assert obj_index.get("table", "customer")["object_id"] == "50101"
+    assert [entry["object_id"] for entry in obj_index.get_all("Table", "CUSTOMER")] == ["50101", "18"]
+    assert obj_index.find("sales-post")["object_type"] == "codeunit"
+    # Record/Database zeigen auf Tabellen
+    assert obj_index.by_id("Record", "18")["object_name"] == "Customer"
+    assert obj_index.by_id("codeunit", 80)["object_name"] == "Sales-Post"
+    assert obj_index.get("page", "Customer") is None
+    # Ohne Produktpräfix, mit oder ohne Präfix in der Anfrage
+    assert [entry["object_name"] for entry in obj_index.find_stripped("Sales Ext")] == ["KVSMED Sales Ext"]
+    assert [entry["object_name"] for entry in obj_index.find_stripped("KVSMTC Sales Ext")] == ["KVSMED Sales Ext"]
+    assert obj_index.query(["object_name"], object_type="codeunit").column("object_name").to_pylist() == ["Sales-Post"]
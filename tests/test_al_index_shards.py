@@ -0,0 +1,91 @@
+"""
+AL-Index-Shards: Warmstart über den Git-Fingerprint, Invalidierung bei Änderungen, Versionswechsel
+und Heartbeat des Watchers sowie verschiedene Schreibweisen desselben Roots.
+"""
+
+import os
+import subprocess
+
+import pytest
+
+import al_index
+from al_index import load_al_index, load_shard, shard_path, write_watch_heartbeat
+
+def write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+
+def git(cwd, *args):
+    subprocess.run(
+        ["git", "-c", "user.name=Test", "-c", "user.email=test@example.com", *args],
+        cwd=cwd, check=True, capture_output=True,
+    )
+
+@pytest.fixture
+def repo(tmp_path):
+    root = str(tmp_path / "repo")
+    write(os.path.join(root, "A.Codeunit.al"), 'codeunit 50100 "KVS A"\n{\n}\n')
+    git(tmp_path, "init", "-q", root)
+    git(root, "add", ".")
+    git(root, "commit", "-q", "-m", "init")
+    return root
+
+def names(obj_index):
+    return sorted(entry["object_name"] for entry in obj_index)
+
+def test_clean_repo_is_reused_by_fingerprint(repo, tmp_path, capsys):
+    index_dir = str(tmp_path / "index")
+    load_al_index([repo], index_dir)
+    assert os.path.exists(shard_path(repo, index_dir))
+    capsys.readouterr()
+
+    load_al_index([repo], index_dir)
+    assert "unverändert" in capsys.readouterr().out
+
+    # Uncommittete Änderung: kein Fingerprint, der Shard wird abgeglichen
+    write(os.path.join(repo, "B.Codeunit.al"), 'codeunit 50101 "KVS B"\n{\n}\n')
+    assert names(load_al_index([repo], index_dir)) == ["KVS A", "KVS B"]
+    assert "1 neu" in capsys.readouterr().out
+
+    # Nach dem Commit passt der gespeicherte Fingerprint nicht mehr, danach wieder unverändert
+    git(repo, "add", ".")
+    git(repo, "commit", "-q", "-m", "B")
+    load_al_index([repo], index_dir)
+    assert "unverändert" not in capsys.readouterr().out
+    load_al_index([repo], index_dir)
+    assert "unverändert" in capsys.readouterr().out
+
+def test_index_version_change_rebuilds(repo, tmp_path, monkeypatch, capsys):
+    index_dir = str(tmp_path / "index")
+    load_al_index([repo], index_dir)
+    capsys.readouterr()
+    monkeypatch.setattr(al_index, "AL_INDEX_VERSION", "test")
+    assert names(load_al_index([repo], index_dir)) == ["KVS A"]
+    assert "1 neu" in capsys.readouterr().out
+
+def test_fresh_watch_heartbeat_skips_reconciliation(tmp_path, capsys):
+    root = str(tmp_path / "app")
+    index_dir = str(tmp_path / "index")
+    write(os.path.join(root, "A.Codeunit.al"), 'codeunit 50100 "KVS A"\n{\n}\n')
+    load_shard(root, index_dir)
+    write_watch_heartbeat([root], index_dir)
+    capsys.readouterr()
+    load_shard(root, index_dir)
+    assert "vom Watcher aktuell gehalten" in capsys.readouterr().out
+
+def test_root_spellings_share_shard_and_rows(tmp_path):
+    root = str(tmp_path / "app")
+    index_dir = str(tmp_path / "index")
+    write(os.path.join(root, "A.Codeunit.al"), 'codeunit 50100 "KVS A"\n{\n}\n')
+    assert shard_path(root, index_dir) == shard_path(root + "/", index_dir)
+    load_al_index([root], index_dir)
+    obj_index = load_al_index([root + "/"], index_dir)
+    assert names(obj_index) == ["KVS A"]
+    assert obj_index.query(["filepath"], root=root).num_rows == 1
+    assert obj_index.query(["filepath"], root=root + "/").num_rows == 1
+
+def test_root_without_files(tmp_path):
+    root = str(tmp_path / "empty")
+    os.makedirs(root)
+    assert len(load_al_index([root], str(tmp_path / "index"))) == 0
@@ -0,0 +1,68 @@
+"""
+AL-Lexer: Referenz-Arten, Namen in Anführungszeichen, übersprungene Kommentare und Strings.
+"""
+
+from al_lexer import ALReference, extract_reference_tuples, extract_references
+
+def test_reference_kinds():
+    code = '''
+pageextension 50100 "KVS Customer List" extends "Customer List"
+{
+    SourceTable = "Sales Header";
+    var
+        SalesHeader: Record "Sales Header";
+        Mgt: Codeunit Mgt;
+        Posts: array[2] of Codeunit "Sales-Post";
+
+    [EventSubscriber(ObjectType::Codeunit, Codeunit::"Sales-Post", 'OnAfterPostSalesDoc', '', false, false)]
+    local procedure OnAfterPost()
+    begin
+        if SalesHeader.Get(Database::"Sales Header") then
+            Page.RunModal(21, SalesHeader);
+    end;
+}
+'''
+    assert extract_references(code) == [
+        ALReference("extends", "page", "Customer List", detail="pageextension"),
+        ALReference("source_table", "table", "Sales Header"),
+        ALReference("variable", "table", "Sales Header"),
+        ALReference("variable", "codeunit", "Mgt"),
+        ALReference("variable", "codeunit", "Sales-Post"),
+        ALReference("event_subscriber", "codeunit", "Sales-Post", detail="OnAfterPostSalesDoc"),
+        ALReference("scope", "table", "Sales Header"),
+        ALReference("run", "page", None, "21", "RunModal"),
+    ]
+
+def test_dataitem_relation_and_implements():
+    code = '''
+report 50100 X
+{
+    dataset
+    {
+        dataitem(Header; "Sales Header") { }
+    }
+}
+enum 50101 Y implements "Price Calculation", IDocument { }
+field(1; "No."; Code[20]) { TableRelation = Customer."No."; }
+'''
+    assert [(ref.kind, ref.object_type, ref.object_name) for ref in extract_references(code)] == [
+        ("dataitem", "table", "Sales Header"),
+        ("implements", "interface", "Price Calculation"),
+        ("implements", "interface", "IDocument"),
+        ("table_relation", "table", "Customer"),
+    ]
+
+def test_comments_strings_and_quoted_identifiers_are_skipped():
+    code = '''
+// Rec: Record "Line Comment";
+/* Mgt: Codeunit "Block
+   Comment"; */
+Msg: Label 'Rec: Record "In String"; it''s Codeunit::X';
+"Field: Record Quoted" := 1;
+Cust: Record Customer;
+'''
+    assert extract_reference_tuples(code) == {("table", "customer")}
+
+def test_unterminated_string_ends_at_line_end():
+    code = "Msg := 'nicht geschlossen\nCust: Record Customer;\n"
+    assert extract_reference_tuples(code) == {("table", "customer")}
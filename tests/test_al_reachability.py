@@ -0,0 +1,61 @@
+"""
+Erreichbarkeit: Referenzhülle von den Seed-Roots aus, Namespace-Stichprobe und leere Auswahl.
+"""
+
+import os
+
+import pytest
+
+from al_index import load_al_index
+from al_reachability import namespace_sample, reachable_ids, reference_closure
+
+def write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+
+def codeunit(number, name, body="", namespace="Base.Core"):
+    return f'namespace {namespace};\n\ncodeunit {number} "{name}"\n{{\n{body}}}\n'
+
+@pytest.fixture
+def tree(tmp_path):
+    hc = str(tmp_path / "hc")
+    base = str(tmp_path / "base")
+    # HC -> A (Variable) und X (Codeunit.Run über die Id); A -> B -> C
+    seed_body = '    var\n        A: Codeunit "Base A";\n\n    trigger OnRun()\n    begin\n        Codeunit.Run(70);\n    end;\n'
+    write(os.path.join(hc, "Seed.al"), codeunit(50100, "KVS Seed", seed_body, "KVS"))
+    write(os.path.join(base, "A.al"), codeunit(10, "Base A", "    var\n        B: Codeunit \"Base B\";\n"))
+    write(os.path.join(base, "B.al"), codeunit(20, "Base B", "    var\n        C: Codeunit \"Base C\";\n"))
+    write(os.path.join(base, "C.al"), codeunit(30, "Base C"))
+    write(os.path.join(base, "X.al"), codeunit(70, "Base X"))
+    for i in range(5):
+        write(os.path.join(base, "Other", f"O{i}.al"), codeunit(100 + i, f"Other {i}", namespace="Base.Other"))
+    obj_index = load_al_index([hc, base], str(tmp_path / "index"))
+    return obj_index, hc, base
+
+def test_reference_closure_stops_after_max_hops(tree):
+    obj_index, hc, base = tree
+    hops = reference_closure(obj_index, [hc], [base], max_hops=2)
+    assert {os.path.basename(path): hop for path, hop in hops.items()} == {"A.al": 1, "X.al": 1, "B.al": 2}
+    hops = reference_closure(obj_index, [hc], [base], max_hops=3)
+    assert {os.path.basename(path): hop for path, hop in hops.items()}["C.al"] == 3
+
+def test_namespace_sample_spreads_over_sorted_paths(tree):
+    obj_index, _, base = tree
+    sample = {os.path.relpath(path, base) for path in namespace_sample(obj_index, [base], sample_size=3)}
+    other = sorted(path for path in sample if path.startswith("Other"))
+    assert other == [os.path.join("Other", f"O{i}.al") for i in (0, 1, 3)]
+    assert len(sample) == 6
+
+def test_reachable_ids_combines_closure_and_sample(tree):
+    obj_index, hc, base = tree
+    selected = reachable_ids(obj_index, [hc], [base + "/"])
+    closure = {os.path.relpath(path, base) for path in reference_closure(obj_index, [hc], [base])}
+    sample = {os.path.relpath(path, base) for path in namespace_sample(obj_index, [base])}
+    assert selected == {base + "/": closure | sample}
+    assert {"A.al", "B.al", "X.al"} <= selected[base + "/"]
+
+def test_nothing_reached_selects_nothing(tree, tmp_path):
+    obj_index, _, base = tree
+    empty_seed = str(tmp_path / "none")
+    assert reachable_ids(obj_index, [empty_seed], [base]) == {base: set()}
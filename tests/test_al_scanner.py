@@ -0,0 +1,73 @@
+"""
+AL-Scanner: Objektkopf, Byte-Offset der Deklaration, BOM, Kommentare und ungültige Bytes.
+"""
+
+import codecs
+
+import pytest
+
+from al_index import ALSource
+from al_scanner import decode_al, find_declaration, scan_al_header, scan_al_headers, scan_al_text
+
+def write_bytes(tmp_path, name, data):
+    path = tmp_path / name
+    path.write_bytes(data)
+    return str(path)
+
+def test_scan_al_text_header():
+    text = 'namespace KVS.Sales;\n\nusing Microsoft.Sales;\n\ntableextension 50100 "KVS Sales Header" extends "Sales Header"\n{\n}\n'
+    obj_type, obj_id, obj_name, namespace, offset = scan_al_text(text)
+    assert (obj_type, obj_id, obj_name, namespace) == ("tableextension", "50100", "KVS Sales Header", "KVS.Sales")
+    assert text[offset:].startswith("tableextension 50100")
+
+def test_legacy_namespace_property_after_declaration():
+    text = 'codeunit 50100 Mgt\n{\n    Namespace = "KVS.Legacy";\n}\n'
+    assert scan_al_text(text)[3] == "KVS.Legacy"
+
+def test_commented_out_declarations_are_skipped():
+    text = (
+        '/* old\ncodeunit 1 "Commented"\n*/\n'
+        "// codeunit 2 Line\n"
+        'codeunit 50100 "Real One"\n{\n}'
+    )
+    assert scan_al_text(text)[:3] == ("codeunit", "50100", "Real One")
+    assert find_declaration("/* codeunit 1 X */") is None
+
+def test_quoted_identifier_with_apostrophe():
+    assert scan_al_text("page 50100 \"Customer's Card\"\n{\n}\n")[2] == "Customer's Card"
+
+def test_offset_with_bom_points_to_declaration(tmp_path):
+    data = codecs.BOM_UTF8 + 'namespace KVS.Ü;\n\ncodeunit 50100 "Grüße"\n{\n}\n'.encode("utf-8")
+    path = write_bytes(tmp_path, "bom.al", data)
+    obj_type, _, obj_name, namespace, offset = scan_al_header(path)
+    assert (obj_type, obj_name, namespace) == ("codeunit", "Grüße", "KVS.Ü")
+    assert data[offset:].startswith(b"codeunit 50100")
+    assert ALSource(path, offset).read(from_declaration=True).startswith('codeunit 50100 "Grüße"')
+
+def test_offset_with_invalid_utf8_bytes(tmp_path):
+    data = b"// caf\xe9 \xff\xfe\nnamespace N.M;\ncodeunit 50102 \"R\xe9al\"\n{\n}\n"
+    path = write_bytes(tmp_path, "latin1.al", data)
+    header = scan_al_header(path)
+    assert data[header[4]:].startswith(b"codeunit 50102")
+    # Ungültige Bytes im Namen erscheinen wie beim Lesen mit errors="replace"
+    assert header[2] == "R�al"
+    assert scan_al_text(decode_al(data)) == header
+
+@pytest.mark.parametrize("chunk_size", [16, 64, 4096])
+def test_block_comment_across_read_blocks(tmp_path, chunk_size):
+    data = b"/*\n" + b"codeunit 9 Fake\n" * 50 + b"*/\ncodeunit 50103 Real\n{\n}\n"
+    path = write_bytes(tmp_path, "comment.al", data)
+    header = scan_al_header(path, chunk_size=chunk_size)
+    assert header[:3] == ("codeunit", "50103", "Real")
+    assert data[header[4]:].startswith(b"codeunit 50103")
+
+def test_scan_al_headers_keeps_order_and_missing(tmp_path):
+    paths = [
+        write_bytes(tmp_path, "a.al", b"table 50100 A\n{\n}\n"),
+        write_bytes(tmp_path, "empty.al", b"// nichts\n"),
+        str(tmp_path / "missing.al"),
+    ]
+    results = scan_al_headers(paths)
+    assert [path for path, _ in results] == paths
+    assert results[0][1][:3] == ("table", "50100", "A")
+    assert results[1][1] is None and results[2][1] is None
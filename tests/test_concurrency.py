@@ -0,0 +1,78 @@
+"""
+Adaptive Parallelität: AIMD-Regelung des Limits und Begrenzung der asyncio-Tasks.
+"""
+
+import time
+import asyncio
+
+from concurrency import AIMDController, AsyncLimiter
+
+def test_additive_increase_while_latency_is_stable():
+    controller = AIMDController("test", initial=2, maximum=8)
+    for _ in range(4):
+        controller.record(time.monotonic(), 1.0, ok=True)
+    # 2 -> 2.5 -> 2.9 -> 3.24 -> 3.55
+    assert controller.current == 3
+    assert controller.baseline == 1.0
+
+def test_latency_per_unit_and_decrease():
+    controller = AIMDController("test", initial=8, maximum=16, tolerance=2.0, decrease=0.5)
+    controller.record(time.monotonic(), 4.0, ok=True, units=4)
+    assert controller.baseline == 1.0
+    # 10 Sekunden für 4 Einheiten: 2,5 pro Einheit über der Toleranz
+    controller.record(time.monotonic(), 10.0, ok=True, units=4)
+    assert controller.current == 4
+    controller.record(time.monotonic(), 1.0, ok=False)
+    assert controller.current == 2
+    assert (controller.requests, controller.errors, controller.decreases) == (3, 1, 2)
+
+def test_limit_stays_within_bounds():
+    controller = AIMDController("test", initial=100, minimum=2, maximum=4)
+    assert controller.current == 4
+    for _ in range(10):
+        controller.record(time.monotonic(), 1.0, ok=True)
+    assert controller.current == 4
+    for _ in range(5):
+        controller.record(time.monotonic(), 1.0, ok=False)
+    assert controller.current == 2
+
+def test_requests_started_before_decrease_do_not_decrease_again():
+    controller = AIMDController("test", initial=8, decrease=0.5)
+    started = time.monotonic()
+    controller.record(started, 1.0, ok=False)
+    controller.record(started, 1.0, ok=False)
+    assert controller.current == 4
+    assert controller.decreases == 1
+    controller.record(time.monotonic(), 1.0, ok=False)
+    assert controller.current == 2
+
+def test_async_limiter_caps_in_flight_tasks():
+    controller = AIMDController("test", initial=2, maximum=2)
+    limiter = AsyncLimiter(controller)
+    peak = 0
+
+    async def task():
+        nonlocal peak
+        async with limiter.slot():
+            peak = max(peak, limiter.in_flight)
+            await asyncio.sleep(0.01)
+
+    async def run():
+        await asyncio.gather(*(task() for _ in range(6)))
+
+    asyncio.run(run())
+    assert peak == 2
+    assert limiter.in_flight == 0
+    assert controller.requests == 6
+
+def test_async_limiter_records_failed_slot():
+    controller = AIMDController("test", initial=4)
+    limiter = AsyncLimiter(controller)
+
+    async def run():
+        async with limiter.slot() as slot:
+            slot.ok = False
+
+    asyncio.run(run())
+    assert controller.errors == 1
+    assert controller.current == 2
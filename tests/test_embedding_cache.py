@@ -0,0 +1,34 @@
+"""
+Embedding-Cache: Schlüssel (Modell, Hash), Nullvektoren und Persistenz zwischen Läufen.
+"""
+
+from embedding_cache import EmbeddingCache
+
+def test_round_trip_per_model(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "cache.sqlite"))
+    assert cache.put_many("model-a", [("h1", [0.5, -0.25]), ("h2", [1.0, 0.0])]) == 2
+    assert cache.put_many("model-b", [("h1", [0.75, 0.125])]) == 1
+
+    assert cache.get_many("model-a", ["h1", "h2", "h3"]) == {"h1": [0.5, -0.25], "h2": [1.0, 0.0]}
+    assert cache.get_many("model-b", ["h1", "h2"]) == {"h1": [0.75, 0.125]}
+    assert (cache.hits, cache.misses) == (3, 2)
+    assert (cache.count("model-a"), cache.count("model-b")) == (2, 1)
+    cache.close()
+
+def test_zero_and_empty_vectors_are_skipped(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "cache.sqlite"))
+    assert cache.put_many("model", [("zero", [0.0, 0.0]), ("empty", []), ("ok", [0.5])]) == 1
+    assert cache.get_many("model", ["zero", "empty", "ok"]) == {"ok": [0.5]}
+    cache.close()
+
+def test_entries_survive_reopen(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = EmbeddingCache(path)
+    cache.put_many("model", [("h1", [0.5, 0.25])])
+    cache.put_many("model", [("h1", [0.25, 0.5])])
+    cache.close()
+
+    cache = EmbeddingCache(path)
+    assert cache.get_many("model", ["h1"]) == {"h1": [0.25, 0.5]}
+    assert cache.count("model") == 1
+    cache.close()
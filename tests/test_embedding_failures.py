@@ -0,0 +1,54 @@
+"""
+Fehlerprotokoll des Vectorizers: Versuche zählen, speichern, erneut laden und auflösen.
+"""
+
+import json
+
+from embedding_failures import FailureLedger
+
+def test_record_counts_attempts_and_ids_per_root(tmp_path):
+    ledger = FailureLedger(str(tmp_path / "failures.json"))
+    ledger.record("hc", "b.al", "h1", "timeout")
+    ledger.record("hc", "b.al", "h2", "HTTP 500")
+    ledger.record("hc", "a.al", "h3", "timeout")
+    ledger.record("mtc", "c.al", "h4", "timeout")
+
+    assert len(ledger) == 3
+    assert ledger.ids("hc") == ["a.al", "b.al"]
+    assert ledger.ids("base") == []
+    entry = ledger.entries[("hc", "b.al")]
+    assert (entry["attempts"], entry["content_hash"], entry["error"]) == (2, "h2", "HTTP 500")
+
+def test_save_and_reload(tmp_path):
+    path = str(tmp_path / "failures.json")
+    ledger = FailureLedger(path)
+    ledger.record("hc", "a.al", "h1", "timeout")
+    ledger.record("hc", "b.al", "h2", "timeout")
+    ledger.save()
+
+    ledger = FailureLedger(path)
+    assert sorted(ledger.keys()) == [("hc", "a.al"), ("hc", "b.al")]
+    ledger.record("hc", "a.al", "h1", "timeout")
+    ledger.resolve("hc", "b.al")
+    ledger.resolve("hc", "missing.al")
+    ledger.save()
+
+    ledger = FailureLedger(path)
+    assert ledger.keys() == [("hc", "a.al")]
+    assert ledger.entries[("hc", "a.al")]["attempts"] == 2
+    assert not (tmp_path / "failures.json.tmp").exists()
+
+def test_unchanged_ledger_is_not_written(tmp_path):
+    path = tmp_path / "failures.json"
+    ledger = FailureLedger(str(path))
+    ledger.resolve("hc", "a.al")
+    ledger.save()
+    assert not path.exists()
+
+def test_unreadable_ledger_starts_empty(tmp_path, capsys):
+    path = tmp_path / "failures.json"
+    path.write_text("{kein json", encoding="utf-8")
+    assert len(FailureLedger(str(path))) == 0
+    assert "WARNUNG" in capsys.readouterr().out
+    path.write_text(json.dumps([{"root": "hc"}]), encoding="utf-8")
+    assert len(FailureLedger(str(path))) == 0
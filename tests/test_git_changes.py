@@ -0,0 +1,71 @@
+"""
+Git-Änderungserkennung: Snapshot nach einem Lauf und die seitdem geänderten Dateien.
+"""
+
+import os
+import subprocess
+
+import pytest
+
+from git_changes import changes_since, git_snapshot, load_commit_state, root_fingerprint, save_commit_state
+
+def write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+
+def git(cwd, *args):
+    subprocess.run(
+        ["git", "-c", "user.name=Test", "-c", "user.email=test@example.com", *args],
+        cwd=cwd, check=True, capture_output=True,
+    )
+
+@pytest.fixture
+def repo(tmp_path):
+    root = str(tmp_path / "repo")
+    for name in ("A", "B", "C", "D"):
+        write(os.path.join(root, "src", f"{name}.al"), f"codeunit 1 {name}\n")
+    write(os.path.join(root, "README.md"), "readme\n")
+    git(tmp_path, "init", "-q", root)
+    git(root, "add", ".")
+    git(root, "commit", "-q", "-m", "init")
+    return root
+
+def test_changes_since_snapshot(repo):
+    # Beim Snapshot uncommittet: D
+    write(os.path.join(repo, "src", "D.al"), "codeunit 1 D2\n")
+    snapshot = git_snapshot(repo)
+    assert snapshot["dirty"] == ["src/D.al"]
+    assert changes_since(repo, snapshot) == ({"src/D.al"}, set())
+
+    # D wird zurückgesetzt, git diff zeigt es nicht mehr
+    git(repo, "checkout", "--", "src/D.al")
+    # Committete Änderung an A, uncommittete an B, ungetrackte E, gelöschte C, Nicht-AL-Datei
+    write(os.path.join(repo, "src", "A.al"), "codeunit 1 A2\n")
+    git(repo, "commit", "-q", "-am", "A")
+    write(os.path.join(repo, "src", "B.al"), "codeunit 1 B2\n")
+    write(os.path.join(repo, "src", "E.al"), "codeunit 1 E\n")
+    os.remove(os.path.join(repo, "src", "C.al"))
+    write(os.path.join(repo, "README.md"), "changed\n")
+
+    changed, deleted = changes_since(repo, snapshot)
+    assert changed == {"src/A.al", "src/B.al", "src/D.al", "src/E.al"}
+    assert deleted == {"src/C.al"}
+
+def test_changes_since_without_snapshot(repo, tmp_path):
+    assert changes_since(repo, None) is None
+    assert changes_since(repo, {}) is None
+    assert git_snapshot(str(tmp_path)) is None
+
+def test_root_fingerprint_only_when_clean(repo, tmp_path):
+    fingerprint = root_fingerprint(repo)
+    assert fingerprint.startswith("git:")
+    write(os.path.join(repo, "src", "A.al"), "codeunit 1 A2\n")
+    assert root_fingerprint(repo) is None
+    assert root_fingerprint(str(tmp_path)) is None
+
+def test_commit_state_round_trip(repo, tmp_path):
+    path = str(tmp_path / "state.json")
+    assert load_commit_state(path) == {}
+    save_commit_state(path, {repo: git_snapshot(repo)})
+    assert load_commit_state(path)[repo]["dirty"] == []
@@ -0,0 +1,85 @@
+"""
+Vektor-Speicherformat: int8/float16 liefern dieselbe Rangfolge und vergleichbare Distanzen wie float32.
+"""
+
+import lancedb
+import numpy as np
+import pyarrow as pa
+import pytest
+
+from vector_storage import INT8_MAX, encode_vector, search_table, stored_dtype, vector_type
+
+DIM = 32
+ROWS = 200
+
+@pytest.fixture(scope="module")
+def corpus():
+    rnd = np.random.default_rng(1)
+    centers = rnd.normal(size=(10, DIM))
+    matrix = centers[rnd.integers(0, len(centers), ROWS)] + 0.3 * rnd.normal(size=(ROWS, DIM))
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    queries = matrix[:10] + 0.05 * rnd.normal(size=(10, DIM))
+    return matrix.astype(np.float32), queries.astype(np.float32)
+
+@pytest.fixture(scope="module")
+def tables(corpus, tmp_path_factory):
+    matrix, _ = corpus
+    db = lancedb.connect(str(tmp_path_factory.mktemp("lancedb")))
+    tables = {}
+    for dtype in ("float32", "float16", "int8"):
+        schema = pa.schema([
+            pa.field("root", pa.string()),
+            pa.field("id", pa.string()),
+            pa.field("embedding", vector_type(DIM, dtype)),
+        ])
+        rows = [
+            {"root": "hc" if i % 2 else "mtc", "id": f"{i}.al", "embedding": encode_vector(vector, dtype)}
+            for i, vector in enumerate(matrix)
+        ]
+        tables[dtype] = db.create_table(f"vectors_{dtype}", data=rows, schema=schema)
+    return tables
+
+def exact_ids(matrix, query, limit, rows=None):
+    scores = matrix @ (query / np.linalg.norm(query))
+    order = [i for i in np.argsort(-scores) if rows is None or i in rows]
+    return [f"{i}.al" for i in order[:limit]]
+
+def test_stored_dtype(tables):
+    assert {dtype: stored_dtype(table) for dtype, table in tables.items()} == {
+        "float32": "float32", "float16": "float16", "int8": "int8",
+    }
+
+def test_encode_vector_int8_range():
+    codes = encode_vector([0.5, -0.25, 0.0, -1.0], "int8")
+    assert codes == [64, -32, 0, -INT8_MAX]
+    assert encode_vector([0.0, 0.0], "int8") == [0, 0]
+    assert encode_vector([0.5, 0.25], "float16") == [0.5, 0.25]
+    with pytest.raises(ValueError):
+        vector_type(DIM, "bfloat16")
+
+def test_ranking_and_distances_agree_with_float32(corpus, tables):
+    matrix, queries = corpus
+    for query in queries:
+        expected = exact_ids(matrix, query, 10)
+        reference = search_table(tables["float32"], query, limit=10)
+        assert [row["id"] for row in reference] == expected
+        for dtype in ("float16", "int8"):
+            results = search_table(tables[dtype], query, limit=10)
+            ids = [row["id"] for row in results]
+            assert ids[0] == expected[0]
+            assert len(set(ids) & set(expected)) >= 8
+            # _distance ist in allen Formaten die quadrierte L2-Distanz der normierten Vektoren
+            by_id = {row["id"]: row["_distance"] for row in reference}
+            for row in results:
+                if row["id"] in by_id:
+                    assert row["_distance"] == pytest.approx(by_id[row["id"]], abs=0.02)
+            assert [row["_distance"] for row in results] == sorted(row["_distance"] for row in results)
+
+def test_int8_search_with_filter(corpus, tables):
+    matrix, queries = corpus
+    hc_rows = {i for i in range(ROWS) if i % 2}
+    results = search_table(tables["int8"], queries[0], limit=5, where="root = 'hc'")
+    assert {row["root"] for row in results} == {"hc"}
+    # Die Codes werden für die Treffer nicht mitgeladen
+    assert "embedding" not in results[0]
+    assert results[0]["id"] == exact_ids(matrix, queries[0], 1, hc_rows)[0]
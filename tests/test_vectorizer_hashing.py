@@ -0,0 +1,114 @@
+"""
+Vectorizer-Pipeline mit EMBED_BACKEND=hashing: ohne Ollama auf einem kleinen AL-Baum.
+Geprüft werden Zeilen in namespace_vectors / namespace_chunks, das Überspringen
+unveränderter Dateien sowie Änderungen und Löschungen zwischen zwei Läufen.
+"""
+
+import os
+
+import lancedb
+import pytest
+
+import embedding_backends
+import vectorizer
+from embedding_backends import HashingBackend
+from embedding_failures import FailureLedger
+
+PROCEDURE = """
+    procedure Proc{n}()
+    begin
+        Counter += {n};
+        Message('Schritt {n}');
+    end;
+"""
+
+def write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+
+def small_object(n):
+    return f'namespace KVS.Test;\n\ncodeunit {50100 + n} "KVS Small {n}"\n{{\n    trigger OnRun()\n    begin\n    end;\n}}\n'
+
+def big_object(procedures):
+    body = "".join(PROCEDURE.format(n=n) for n in range(procedures))
+    return f'namespace KVS.Test;\n\ncodeunit 50200 "KVS Big Mgt"\n{{\n    var\n        Counter: Integer;\n{body}}}\n'
+
+@pytest.fixture
+def pipeline(tmp_path, monkeypatch):
+    """Temporärer AL-Baum, LanceDB und Embedding-Cache; liefert eine Funktion für einen vollen Lauf."""
+    root = str(tmp_path / "app")
+    for n in range(3):
+        write(os.path.join(root, "src", f"Small{n}.Codeunit.al"), small_object(n))
+    write(os.path.join(root, "src", "Big.Codeunit.al"), big_object(80))
+    # Cache und Fehlerprotokoll liegen mit relativen Standardpfaden im Arbeitsverzeichnis
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(vectorizer, "LANCEDB_PATH", str(tmp_path / "lancedb"))
+    monkeypatch.setattr(embedding_backends, "_backend", HashingBackend())
+
+    def run():
+        data = vectorizer.collect_files(root, vectorizer.FILE_EXTENSION_FILTERS)
+        assert vectorizer.vectorize_data(data, complete_roots=[root])
+
+    return root, run
+
+def open_tables():
+    db = lancedb.connect(vectorizer.LANCEDB_PATH)
+    backend = embedding_backends.get_backend()
+    return db.open_table(backend.table_name("namespace_vectors")), db.open_table(backend.table_name("namespace_chunks"))
+
+def ids(table):
+    return sorted(table.to_arrow().column("id").to_pylist())
+
+def test_hashing_backend_tables_are_separate():
+    backend = HashingBackend()
+    assert backend.table_name("namespace_vectors") == f"namespace_vectors_hashing_{backend.dim}"
+    assert len(backend.embed(["codeunit 1 X"])[0]) == backend.dim
+
+def test_vectorize_update_and_delete(pipeline, capsys):
+    root, run = pipeline
+    big_id = os.path.join("src", "Big.Codeunit.al")
+    run()
+    vectors, chunks = open_tables()
+    assert vectors.count_rows() == 4
+    big_chunks = chunks.to_arrow().column("id").to_pylist().count(big_id)
+    assert big_chunks > 1
+    assert "4 Dateien vektorisiert" in capsys.readouterr().out
+
+    # Unveränderter Baum: nichts wird neu geschrieben
+    run()
+    out = capsys.readouterr().out
+    assert "4 Dateien übersprungen" in out
+    assert "0 Dateien vektorisiert" in out
+    assert vectors.count_rows() == 4
+
+    # Eine Datei geändert, eine gelöscht, das große Objekt verkleinert
+    write(os.path.join(root, "src", "Small0.Codeunit.al"), small_object(0).replace("OnRun", "OnRunChanged"))
+    os.remove(os.path.join(root, "src", "Small1.Codeunit.al"))
+    write(os.path.join(root, big_id), big_object(40))
+    run()
+    out = capsys.readouterr().out
+    assert "1 Dateien übersprungen" in out
+    assert "2 Dateien vektorisiert" in out
+    assert "1 gelöschte Dateien aus LanceDB entfernt" in out
+    vectors, chunks = open_tables()
+    assert ids(vectors) == sorted(os.path.join("src", name) for name in ("Big.Codeunit.al", "Small0.Codeunit.al", "Small2.Codeunit.al"))
+    assert os.path.join("src", "Small1.Codeunit.al") not in ids(chunks)
+    assert 1 < chunks.to_arrow().column("id").to_pylist().count(big_id) < big_chunks
+
+def test_write_failure_is_recorded_in_ledger(pipeline, monkeypatch, capsys):
+    root, _ = pipeline
+
+    def failing_upsert(table, rows):
+        raise OSError("Datenträger voll")
+
+    monkeypatch.setattr(vectorizer, "upsert_rows", failing_upsert)
+    data = vectorizer.collect_files(root, vectorizer.FILE_EXTENSION_FILTERS)
+    # Ohne gespeicherte Zeilen darf der Aufrufer seinen Git-Stand nicht fortschreiben
+    assert not vectorizer.vectorize_data(data, complete_roots=[root])
+    assert "0 Dateien vektorisiert" in capsys.readouterr().out
+    # Nicht geschriebene Dateien werden beim nächsten Lauf zuerst erneut versucht
+    ledger = FailureLedger()
+    assert sorted(ledger.ids(vectorizer.vector_root(root))) == sorted(
+        os.path.join("src", name) for name in ("Big.Codeunit.al", "Small0.Codeunit.al", "Small1.Codeunit.al", "Small2.Codeunit.al")
+    )
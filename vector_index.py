@@ -0,0 +1,97 @@
+"""
+Vektorindex
+
+Ohne Index ist jede Suche in namespace_vectors / namespace_chunks ein vollständiger Scan aller
+Vektoren. ensure_vector_index legt nach der Vektorisierung einen ANN-Index an bzw. hält ihn
+aktuell, gewählt über VECTOR_INDEX_TYPE:
+
+- "ivf_pq" (Standard): IVF mit Product Quantization. num_partitions ≈ Wurzel der Zeilenzahl,
+  num_sub_vectors = Dimension / 16 (bei 1024 Dimensionen 64 Teilvektoren zu je 16 Werten).
+- "hnsw": IVF_HNSW_SQ, HNSW-Graph je Partition über skalar quantisierten Vektoren; eine
+  Partition je angefangener Million Zeilen.
+- "none": kein Index.
+
+Unter VECTOR_INDEX_MIN_ROWS Zeilen ist der Scan schnell genug und es wird kein Index angelegt.
+Neue Zeilen nimmt table.optimize() in den bestehenden Index auf. Ist die Tabelle seit dem Aufbau
+auf mehr als das VECTOR_INDEX_REBUILD_GROWTH-fache gewachsen (Partitionen zu groß), wird der
+Index neu aufgebaut, ebenso bei geändertem Indextyp. int8-Spalten (vector_storage) werden im
+Speicher durchsucht und bekommen keinen Index.
+
+Die Suchparameter (nprobes, refine_factor, ef) stehen in vector_storage; bench_ann_index.py
+misst Recall und Latenz gegen die exakte Suche.
+"""
+
+import os
+import math
+import time
+from typing import Dict, Optional
+
+from vector_storage import stored_dtype
+
+VECTOR_INDEX_TYPE = os.environ.get("VECTOR_INDEX_TYPE", "ivf_pq").lower()
+VECTOR_INDEX_MIN_ROWS = int(os.environ.get("VECTOR_INDEX_MIN_ROWS", "10000"))
+VECTOR_INDEX_REBUILD_GROWTH = float(os.environ.get("VECTOR_INDEX_REBUILD_GROWTH", "2.0"))
+# VECTOR_INDEX_TYPE -> Indextyp in LanceDB
+LANCEDB_INDEX_TYPES = {"ivf_pq": "IVF_PQ", "hnsw": "IVF_HNSW_SQ"}
+
+def index_params(rows: int, dim: int, index_type: str = VECTOR_INDEX_TYPE) -> Dict:
+    """Parameter für table.create_index, an Zeilenzahl und Dimension angepasst."""
+    lance_type = LANCEDB_INDEX_TYPES[index_type]
+    if lance_type == "IVF_PQ":
+        # PQ trainiert je Partition 256 Zentroide, kleinere Partitionen lohnen nicht
+        num_partitions = max(1, min(round(math.sqrt(rows)), rows // 256))
+        num_sub_vectors = max(1, dim // 16)
+        while dim % num_sub_vectors:
+            num_sub_vectors -= 1
+        return {"index_type": lance_type, "num_partitions": num_partitions, "num_sub_vectors": num_sub_vectors}
+    return {"index_type": lance_type, "num_partitions": max(1, math.ceil(rows / 1_000_000)), "m": 20, "ef_construction": 300}
+
+def _embedding_index(table):
+    for index in table.list_indices():
+        if "embedding" in index.columns:
+            return index
+    return None
+
+def build_vector_index(table, index_type: str = VECTOR_INDEX_TYPE) -> Dict:
+    """Index neu aufbauen (ersetzt einen bestehenden); liefert die verwendeten Parameter."""
+    rows = table.count_rows()
+    params = index_params(rows, table.schema.field("embedding").type.list_size, index_type)
+    start = time.time()
+    # L2 wie die Suche ohne Index; die Embeddings sind normiert, die Reihenfolge entspricht Kosinus
+    table.create_index(metric="l2", vector_column_name="embedding", replace=True, **params)
+    print(f"Vektorindex für {table.name}: {params} über {rows} Zeilen in {time.time() - start:.1f}s aufgebaut.")
+    return params
+
+def ensure_vector_index(table, index_type: str = VECTOR_INDEX_TYPE) -> Optional[str]:
+    """
+    Index nach der Vektorisierung anlegen, aktualisieren oder neu aufbauen (siehe
+    Modulbeschreibung). Liefert "built", "optimized" oder None, wenn nichts zu tun war.
+    """
+    if index_type == "none":
+        return None
+    if index_type not in LANCEDB_INDEX_TYPES:
+        raise ValueError(f"Unbekannter VECTOR_INDEX_TYPE '{index_type}', erlaubt: none, {', '.join(LANCEDB_INDEX_TYPES)}")
+    if stored_dtype(table) == "int8":
+        return None
+    rows = table.count_rows()
+    existing = _embedding_index(table)
+    if existing is None:
+        if rows < VECTOR_INDEX_MIN_ROWS:
+            return None
+        build_vector_index(table, index_type)
+        return "built"
+    stats = table.index_stats(existing.name)
+    if str(stats.index_type).upper() != LANCEDB_INDEX_TYPES[index_type]:
+        print(f"Vektorindex für {table.name} ist {stats.index_type}, gewünscht {LANCEDB_INDEX_TYPES[index_type]}.")
+        build_vector_index(table, index_type)
+        return "built"
+    if rows > stats.num_indexed_rows * VECTOR_INDEX_REBUILD_GROWTH:
+        print(f"{table.name} ist seit dem Indexaufbau von {stats.num_indexed_rows} auf {rows} Zeilen gewachsen.")
+        build_vector_index(table, index_type)
+        return "built"
+    if stats.num_unindexed_rows:
+        start = time.time()
+        table.optimize()
+        print(f"Vektorindex für {table.name}: {stats.num_unindexed_rows} neue Zeilen in {time.time() - start:.1f}s aufgenommen.")
+        return "optimized"
+    return None
@@ -0,0 +1,159 @@
+"""
+Vektor-Speicherformat
+
+Die Embeddings in namespace_vectors / namespace_chunks können statt als float32 kompakter
+gespeichert werden, gewählt über VECTOR_DTYPE:
+
+- "float32" (Standard): 4 Byte je Dimension, wie bisher.
+- "float16": 2 Byte je Dimension. LanceDB sucht darauf direkt (table.search).
+- "int8": 1 Byte je Dimension, skalar quantisiert. Jeder Vektor wird mit 127 / max|x|
+  skaliert und gerundet. Die Embeddings sind L2-normiert und gesucht wird nach
+  Kosinus-Ähnlichkeit, daher muss der Skalierungsfaktor nicht gespeichert werden. LanceDB
+  sucht nicht auf int8-Spalten; search_table lädt die Codes dann über einen Spalten-Scan
+  einmal je Tabellenversion in den Speicher (als int8 plus eine Norm je Zeile, also ein
+  Viertel des Speichers von float32) und sucht mit NumPy blockweise über
+  INT8_SEARCH_BLOCK_ROWS Zeilen.
+
+_distance ist für alle Formate die quadrierte L2-Distanz der normierten Vektoren, wie sie
+LanceDB liefert; bei int8 wird sie aus der Kosinus-Ähnlichkeit berechnet (2 * (1 - cos)).
+
+Für float32/float16 mit Vektorindex (vector_index) steuern VECTOR_SEARCH_NPROBES (durchsuchte
+IVF-Partitionen), VECTOR_SEARCH_REFINE_FACTOR (so viele Kandidaten mal limit werden mit den
+vollen Vektoren nachsortiert, 0 = aus) und VECTOR_SEARCH_EF (Kandidatenliste bei HNSW, 0 =
+Standard von LanceDB) Recall und Latenz; ohne Index sind sie wirkungslos.
+
+search_table richtet sich nach dem Typ der gespeicherten Spalte, nicht nach VECTOR_DTYPE, und
+funktioniert so mit jeder Tabelle. Der Vectorizer legt neue Tabellen mit VECTOR_DTYPE an; ein
+Wechsel erfordert das Löschen der Tabellen, die Embeddings kommen dann aus dem Embedding-Cache.
+"""
+
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pyarrow as pa
+
+from lancedb_scan import scan_batches, sql_string
+
+VECTOR_DTYPE = os.environ.get("VECTOR_DTYPE", "float32").lower()
+VECTOR_DTYPES = {"float32": pa.float32(), "float16": pa.float16(), "int8": pa.int8()}
+INT8_MAX = 127
+# Zeilen je Block bei der int8-Suche; nur ein Block liegt gleichzeitig als float32 im Speicher
+INT8_SEARCH_BLOCK_ROWS = int(os.environ.get("INT8_SEARCH_BLOCK_ROWS", "8192"))
+VECTOR_SEARCH_NPROBES = int(os.environ.get("VECTOR_SEARCH_NPROBES", "20"))
+VECTOR_SEARCH_REFINE_FACTOR = int(os.environ.get("VECTOR_SEARCH_REFINE_FACTOR", "5"))
+VECTOR_SEARCH_EF = int(os.environ.get("VECTOR_SEARCH_EF", "0"))
+
+# (Tabellenname, Version, Filter) -> (Schlüssel der Zeilen, int8-Codes, Norm der Codes je Zeile)
+_int8_matrices: Dict[tuple, Tuple[List[tuple], np.ndarray, np.ndarray]] = {}
+
+def vector_type(dim: int, dtype: str = VECTOR_DTYPE) -> pa.DataType:
+    """Arrow-Typ der Embedding-Spalte."""
+    if dtype not in VECTOR_DTYPES:
+        raise ValueError(f"Unbekannter VECTOR_DTYPE '{dtype}', erlaubt: {', '.join(VECTOR_DTYPES)}")
+    return pa.list_(VECTOR_DTYPES[dtype], dim)
+
+def encode_vector(vector: Sequence[float], dtype: str = VECTOR_DTYPE) -> list:
+    """Vektor im Speicherformat; float16 konvertiert Arrow beim Schreiben selbst."""
+    if dtype != "int8":
+        return list(vector)
+    values = np.asarray(vector, dtype=np.float32)
+    peak = float(np.abs(values).max()) if values.size else 0.0
+    if not peak:
+        return [0] * len(values)
+    return np.rint(values * (INT8_MAX / peak)).astype(np.int8).tolist()
+
+def stored_dtype(table, column: str = "embedding") -> str:
+    """Speicherformat der Spalte in einer bestehenden Tabelle."""
+    value_type = table.schema.field(column).type.value_type
+    for name, arrow_type in VECTOR_DTYPES.items():
+        if value_type == arrow_type:
+            return name
+    return str(value_type)
+
+def _key_columns(table) -> List[str]:
+    return ["root", "id", "chunk_index"] if "chunk_index" in table.schema.names else ["root", "id"]
+
+def _int8_matrix(table, where: Optional[str]) -> Tuple[List[tuple], np.ndarray, np.ndarray]:
+    cache_key = (table.name, table.version, where)
+    cached = _int8_matrices.get(cache_key)
+    if cached is None:
+        columns = _key_columns(table)
+        keys, blocks = [], []
+        for batch in scan_batches(table, columns + ["embedding"], where=where):
+            keys.extend(zip(*(batch.column(name).to_pylist() for name in columns)))
+            embeddings = batch.column("embedding")
+            blocks.append(embeddings.values.to_numpy(zero_copy_only=False).reshape(len(batch), embeddings.type.list_size))
+        dim = table.schema.field("embedding").type.list_size
+        codes = np.concatenate(blocks).astype(np.int8, copy=False) if blocks else np.zeros((0, dim), dtype=np.int8)
+        norms = np.empty(len(codes), dtype=np.float32)
+        for start in range(0, len(codes), INT8_SEARCH_BLOCK_ROWS):
+            block = codes[start:start + INT8_SEARCH_BLOCK_ROWS].astype(np.float32)
+            norms[start:start + len(block)] = np.linalg.norm(block, axis=1)
+        norms[norms == 0] = 1
+        # Ältere Versionen derselben Tabelle werden nicht mehr gebraucht
+        for old in [key for key in _int8_matrices if key[0] == table.name]:
+            del _int8_matrices[old]
+        cached = _int8_matrices[cache_key] = (keys, codes, norms)
+    return cached
+
+def _int8_scores(codes: np.ndarray, norms: np.ndarray, query: np.ndarray) -> np.ndarray:
+    """Kosinus-Ähnlichkeit aller Zeilen zur normierten Anfrage, blockweise über die int8-Codes."""
+    scores = np.empty(len(codes), dtype=np.float32)
+    for start in range(0, len(codes), INT8_SEARCH_BLOCK_ROWS):
+        block = codes[start:start + INT8_SEARCH_BLOCK_ROWS]
+        scores[start:start + len(block)] = block.astype(np.float32) @ query
+    return scores / norms
+
+def _row_filter(columns: List[str], keys: List[tuple]) -> str:
+    conditions = []
+    for key in keys:
+        parts = [
+            f"{column} = {value}" if isinstance(value, int) else f"{column} = {sql_string(value)}"
+            for column, value in zip(columns, key)
+        ]
+        conditions.append(f"({' AND '.join(parts)})")
+    return " OR ".join(conditions)
+
+def search_table(table, query_embedding: Sequence[float], limit: int = 10, where: Optional[str] = None,
+                 nprobes: int = VECTOR_SEARCH_NPROBES, refine_factor: int = VECTOR_SEARCH_REFINE_FACTOR,
+                 ef: int = VECTOR_SEARCH_EF) -> List[Dict]:
+    """
+    Die limit ähnlichsten Zeilen als Dicts mit _distance (quadrierte L2-Distanz), aufsteigend
+    sortiert. float32/float16 über LanceDB, int8 über die Codes im Speicher.
+    """
+    # Normierte Anfrage: gleiche Reihenfolge, aber _distance in allen Formaten vergleichbar
+    query = np.asarray(query_embedding, dtype=np.float32)
+    norm = np.linalg.norm(query)
+    if norm:
+        query = query / norm
+    if stored_dtype(table) != "int8":
+        search = table.search(query.tolist()).limit(limit).nprobes(nprobes)
+        if refine_factor:
+            search = search.refine_factor(refine_factor)
+        if ef:
+            search = search.ef(ef)
+        if where:
+            search = search.where(where, prefilter=True)
+        return search.to_list()
+    keys, codes, norms = _int8_matrix(table, where)
+    if not keys:
+        return []
+    scores = _int8_scores(codes, norms, query)
+    top = np.argpartition(-scores, min(limit, len(keys)) - 1)[:limit]
+    top = top[np.argsort(-scores[top])]
+    columns = _key_columns(table)
+    wanted = [keys[i] for i in top]
+    # Volle Zeilen (ohne die Codes) nur für die Treffer nachladen
+    select = [name for name in table.schema.names if name != "embedding"]
+    rows = {
+        tuple(row[column] for column in columns): row
+        for row in table.search().where(_row_filter(columns, wanted)).select(select).limit(len(wanted)).to_list()
+    }
+    results = []
+    for i, key in zip(top, wanted):
+        row = rows.get(key)
+        if row is not None:
+            # Für Einheitsvektoren gilt |a - b|² = 2 * (1 - cos), vergleichbar mit LanceDB
+            results.append({**row, "_distance": float(2.0 * (1.0 - scores[i]))})
+    return results
@@ -1,34 +1,72 @@
 """
 Vectorizer Module
 
-This module handles the vectorization of data using LanceDB and a local Ollama instance.
+This module handles the vectorization of data using LanceDB and an embedding backend
+(Ollama by default, see embedding_backends).
 """
 
 import lancedb
 import pyarrow as pa  # Add this import for schema types
-from typing import List, Dict
-import requests
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
 from tqdm import tqdm
 import hashlib
 import os
-import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import asyncio
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+from collections import defaultdict
+
+from al_chunker import CHUNK_TABLE, ALChunk, chunk_al_object
+from al_digest import DIGEST_VERSION, build_digest, estimate_tokens, strip_boilerplate
+from al_index import AL_INDEX_DIR, load_al_index
+from al_reachability import reachable_ids
+from concurrency import AIMDController, AsyncLimiter
+from embedding_backends import EmbeddingBackend, get_backend
+from embedding_cache import EmbeddingCache
+from embedding_failures import FailureLedger
+from file_discovery import iter_files
+from git_changes import CHANGE_DETECTION, changes_since, git_snapshot, load_commit_state, save_commit_state
+from lancedb_scan import scan_batches, sql_string
+from vector_index import ensure_vector_index
+from vector_storage import VECTOR_DTYPE, encode_vector, stored_dtype, vector_type
 
 # Constants
 LANCEDB_PATH = "./lancedb"  # Lokaler Pfad zur LanceDB-Datenbank
-OLLAMA_URL = "http://localhost:11434/api/embeddings"
-# Modell kann jetzt per Umgebungsvariable gewählt werden: mxbai-embed-large:latest oder phi4:latest
-OLLAMA_MODEL = os.environ.get("OLLAMA_MODEL", "mxbai-embed-large:latest")
+# Dokumente pro Batch-Request und parallele Batch-Requests (0: adaptiv, siehe concurrency)
+EMBED_BATCH_SIZE = int(os.environ.get("EMBED_BATCH_SIZE", "32"))
+EMBED_WORKERS = int(os.environ.get("EMBED_WORKERS", "0"))
+# Wiederholungen fehlgeschlagener Embeddings im selben Lauf, Wartezeit verdoppelt sich je Versuch
+EMBED_MAX_RETRIES = int(os.environ.get("EMBED_MAX_RETRIES", "3"))
+EMBED_RETRY_DELAY = float(os.environ.get("EMBED_RETRY_DELAY", "2"))
+EMBED_RETRY_MAX_DELAY = 60.0
+# Zeilen pro merge_insert in LanceDB; jede Schreiboperation erzeugt eine neue Tabellenversion
+UPSERT_BATCH_SIZE = int(os.environ.get("UPSERT_BATCH_SIZE", "1000"))
+# Ids pro Delete-Filter
+DELETE_CHUNK_SIZE = 500
+# Zusätzlich Chunks je Prozedur/Trigger/Feldgruppe in namespace_chunks (siehe al_chunker)
+VECTORIZE_CHUNKS = os.environ.get("VECTORIZE_CHUNKS", "1") != "0"
+# Statt des Rohtexts einen Digest je Objekt bzw. Code ohne Kommentare/Captions einbetten (siehe al_digest)
+EMBED_DIGEST = os.environ.get("EMBED_DIGEST", "1") != "0"
+# Dokumente je Warteschlange zwischen den Pipeline-Stufen; begrenzt den Speicher unabhängig von der Baumgröße
+PIPELINE_QUEUE_SIZE = int(os.environ.get("PIPELINE_QUEUE_SIZE", "256"))
 FILE_EXTENSION_FILTERS = [".al", ".json"]  # Erlaubte Dateiendungen
+# Git-Snapshot je Root nach dem letzten Lauf (für CHANGE_DETECTION=git)
+VECTORIZER_STATE_FILE = "vectorizer_state.json"
 
+BASE_APP_ROOT = r"/home/kosta/Repos/GitHub/StefanMaron/MSDyn365BC.Code.History/BaseApp/Source/Base Application"
 # Mehrere Root-Dirs als Liste
 ROOT_DIRS = [
     r"/home/kosta/Repos/DevOps/Product_KBA/Product_KBA_BC_AL/app/",
     r"/home/kosta/Repos/DevOps/Product_MED/Product_MED_AL/app/",
     r"/home/kosta/Repos/DevOps/Product_MED_Tech365/Product_MED_Tech/app/",
-    r"/home/kosta/Repos/GitHub/StefanMaron/MSDyn365BC.Code.History/BaseApp/Source/Base Application"
-    
+    BASE_APP_ROOT,
 ]
+# Roots aus ROOT_DIRS, die mit VECTORIZE_BASE_APP=reachable nur teilweise vektorisiert werden
+# (mit os.pathsep getrennt); über den Pfad, nicht die Position in ROOT_DIRS
+_base_app_roots = os.environ.get("VECTORIZE_BASE_APP_ROOTS")
+BASE_APP_ROOTS = _base_app_roots.split(os.pathsep) if _base_app_roots else [BASE_APP_ROOT]
+# "full": alle Dateien; "reachable": nur von den übrigen Roots aus erreichbare Objekte (siehe al_reachability)
+VECTORIZE_BASE_APP = os.environ.get("VECTORIZE_BASE_APP", "full").lower()
 
 # Initialize LanceDB
 def initialize_lancedb() -> lancedb.db.DBConnection:
@@ -40,6 +78,13 @@ def compute_content_hash(content: str) -> str:
     """
     return hashlib.sha256(content.encode("utf-8")).hexdigest()
 
+def document_hash(content: str) -> str:
+    """
+    Hash, an dem unveränderte Dateien erkannt werden (Spalte content_hash bzw. parent_hash).
+    Mit EMBED_DIGEST geht das Digest-Format ein, ein Wechsel bettet also alle Dateien neu ein.
+    """
+    return compute_content_hash(f"{DIGEST_VERSION}\n{content}" if EMBED_DIGEST else content)
+
 def extract_object_info(content: str, filename: str) -> dict:
     """
     Extrahiere Objekt-Id, Objektart, Objekt Name, Namespace aus dem Content oder Dateinamen.
@@ -74,22 +119,419 @@ def extract_object_info(content: str, filename: str) -> dict:
         "namespace": namespace
     }
 
+def vector_root(root_dir: str) -> str:
+    """
+    Root, wie er in der Spalte root der LanceDB-Tabellen steht. Zusammen mit id (Pfad relativ zum
+    Root) eindeutig. Nicht zu verwechseln mit al_index.root_key (Vergleichsschlüssel im AL-Index).
+    """
+    return os.path.normpath(root_dir)
+
+def load_existing_hashes(table, hash_column: str = "content_hash") -> Dict[Tuple[str, str], str]:
+    """(root, id) -> Hash aller Zeilen der Tabelle (bei namespace_chunks: parent_hash)."""
+    existing = {}
+    try:
+        # Nur die drei Schlüsselspalten, ohne Embeddings und Inhalt
+        for batch in scan_batches(table, ["root", "id", hash_column]):
+            rows = batch.to_pydict()
+            existing.update(zip(zip(rows["root"], rows["id"]), rows[hash_column]))
+    except Exception:
+        return {}  # Tabelle ist evtl. noch leer
+    return existing
+
+def upsert_rows(table, rows: List[Dict]) -> None:
+    """Zeilen per (root, id) ersetzen oder neu anlegen, in einer Schreiboperation."""
+    (
+        table.merge_insert(["root", "id"])
+        .when_matched_update_all()
+        .when_not_matched_insert_all()
+        .execute(rows)
+    )
+
+def _parents_filter(keys: Iterable[Tuple[str, str]]) -> str:
+    by_root = defaultdict(list)
+    for root, doc_id in keys:
+        by_root[root].append(doc_id)
+    return " OR ".join(
+        f"(root = {sql_string(root)} AND id IN ({', '.join(sql_string(doc_id) for doc_id in sorted(ids))}))"
+        for root, ids in by_root.items()
+    )
+
+def replace_chunks(table, rows: List[Dict]) -> None:
+    """
+    Chunks per (root, id, chunk_index) ersetzen und übrige Chunks derselben Dateien entfernen
+    (eine Datei kann weniger Chunks haben als vorher), in einer Schreiboperation.
+    """
+    parents = {(row["root"], row["id"]) for row in rows}
+    (
+        table.merge_insert(["root", "id", "chunk_index"])
+        .when_matched_update_all()
+        .when_not_matched_insert_all()
+        .when_not_matched_by_source_delete(_parents_filter(parents))
+        .execute(rows)
+    )
+
+def delete_rows(table, keys: Iterable[Tuple[str, str]]) -> None:
+    """Zeilen für (root, id)-Paare löschen, ein Filter je Root und DELETE_CHUNK_SIZE Ids."""
+    by_root = defaultdict(list)
+    for root, doc_id in keys:
+        by_root[root].append(doc_id)
+    for root, ids in by_root.items():
+        ids.sort()
+        for i in range(0, len(ids), DELETE_CHUNK_SIZE):
+            id_list = ", ".join(sql_string(doc_id) for doc_id in ids[i:i + DELETE_CHUNK_SIZE])
+            table.delete(where=f"root = {sql_string(root)} AND id IN ({id_list})")
+
+def check_vector_dtype(table) -> bool:
+    """Prüfe, ob die Tabelle im Speicherformat VECTOR_DTYPE angelegt ist (siehe vector_storage)."""
+    dtype = stored_dtype(table)
+    if dtype == VECTOR_DTYPE:
+        return True
+    print(f"FEHLER: Die Tabelle '{table.name}' speichert Embeddings als {dtype}, VECTOR_DTYPE ist {VECTOR_DTYPE}.")
+    print(f"Bitte lösche die Tabelle '{table.name}' in LanceDB und lasse das Skript erneut laufen; die Embeddings kommen aus dem Embedding-Cache.")
+    return False
+
+def vector_row(doc: Dict, embedding: List[float]) -> Dict:
+    """Zeile für namespace_vectors bzw. namespace_chunks aus einer Einheit der Pipeline und ihrem Embedding."""
+    item, obj_info = doc["item"], doc["obj_info"]
+    row = {
+        "id": item["id"],
+        "root": item["root"],
+        "content": doc["text"],
+        "embedding": encode_vector(embedding),
+        "filename": item.get("filename", ""),
+        "directory": item.get("directory", ""),
+        "content_hash": doc["content_hash"],
+        "object_id": obj_info.get("object_id", ""),
+        "object_type": obj_info.get("object_type", ""),
+        "object_name": obj_info.get("object_name", ""),
+        "namespace": obj_info.get("namespace", ""),
+    }
+    if doc["kind"] == "chunk":
+        chunk = doc["chunk"]
+        row.update({
+            "chunk_index": chunk.index,
+            "label": chunk.label,
+            "start_line": chunk.start_line,
+            "parent_hash": doc["parent_hash"],
+        })
+    return row
+
+# Ende-Markierung in den Warteschlangen der Pipeline
+_DONE = object()
+
+class EmbeddingPipeline:
+    """
+    Streaming-Pipeline Dateisuche/Lesen -> Hash/Skip -> Chunking -> Embedding -> Batch-Upsert.
+
+    Die Stufen laufen gleichzeitig und sind über begrenzte asyncio-Queues verbunden; ist eine
+    Queue voll, wartet die vorherige Stufe. Im Speicher sind dadurch nur die Dokumente in den
+    Queues, nie der ganze Baum. Blockierende Arbeit (Dateien lesen, Embeddings, LanceDB) läuft in
+    Threads, der Event-Loop verteilt nur.
+
+    Eine geänderte Datei ergibt eine Einheit für namespace_vectors (ganze Datei) und, mit
+    chunk_table, eine Einheit je Chunk (siehe al_chunker). Die Chunks einer Datei werden erst
+    geschrieben, wenn alle ein Embedding haben, und ersetzen dann die bisherigen Chunks der Datei.
+    Gespeichert wird der Rohtext, eingebettet mit EMBED_DIGEST der Digest des Objekts bzw. der
+    bereinigte Code des Chunks (siehe al_digest).
+
+    Identische Inhalte werden nur einmal eingebettet: Ist ein Hash gerade beim Backend, warten
+    weitere Einheiten mit diesem Inhalt darauf; danach liefert der Embedding-Cache den Vektor.
+
+    Einheiten ohne Embedding werden mit wachsender Wartezeit bis zu EMBED_MAX_RETRIES mal erneut
+    angefragt. Was dann noch fehlt, landet im Fehlerprotokoll statt als Nullvektor in LanceDB.
+    """
+
+    def __init__(self, table, existing: Dict[Tuple[str, str], str], cache: EmbeddingCache, ledger: FailureLedger,
+                 backend: EmbeddingBackend, controller: AIMDController, pbar, chunk_table=None,
+                 existing_chunks: Optional[Dict[Tuple[str, str], str]] = None):
+        self.table = table
+        self.existing = existing
+        self.chunk_table = chunk_table
+        # (root, id) -> Hash der Datei, aus der die gespeicherten Chunks stammen
+        self.existing_chunks = existing_chunks or {}
+        self.cache = cache
+        self.ledger = ledger
+        self.backend = backend
+        # Es laufen so viele Embedding-Tasks wie maximal erlaubt, der Limiter lässt nur controller.current zu
+        self.controller = controller
+        self.workers = controller.maximum
+        self.pbar = pbar
+        # (root, id) aller gelesenen Dateien, für das Entfernen verwaister Zeilen
+        self.seen: Set[Tuple[str, str]] = set()
+        # (root, id) der Dateien, für die mindestens ein Embedding endgültig fehlgeschlagen ist
+        self.failed_keys: Set[Tuple[str, str]] = set()
+        # embed_hash -> Einheiten, die auf dieses Embedding warten
+        self.in_flight: Dict[str, List[Dict]] = {}
+        self._embed_batch: List[Dict] = []
+        self.warmed = False
+        self.skipped = 0
+        self.cached = 0
+        self.duplicates = 0
+        self.embedded = 0
+        self.retried = 0
+        self.failed = 0
+        # Zeilen, die LanceDB beim Schreiben abgelehnt hat (Dateien und Chunks)
+        self.write_failures = 0
+        self.written = 0
+        self.chunks_written = 0
+        # Geschätzte Token der eingebetteten Einheiten: Rohtext und tatsächlich gesendeter Text
+        self.raw_tokens = 0
+        self.embed_tokens = 0
+
+    async def run(self, data: Iterable[Dict[str, str]]) -> None:
+        loop = asyncio.get_running_loop()
+        # Eigene Threads: Leser, Embedding-Worker und Schreiber blockieren jeweils einen
+        loop.set_default_executor(ThreadPoolExecutor(max_workers=self.workers + 2))
+        self._warm_up_lock = asyncio.Lock()
+        self.limiter = AsyncLimiter(self.controller)
+        read_queue = asyncio.Queue(PIPELINE_QUEUE_SIZE)
+        embed_queue = asyncio.Queue(self.workers)
+        write_queue = asyncio.Queue(PIPELINE_QUEUE_SIZE)
+
+        async def embed_all():
+            await asyncio.gather(*(self._embed_stage(embed_queue, write_queue) for _ in range(self.workers)))
+            await write_queue.put(_DONE)
+
+        await asyncio.gather(
+            asyncio.to_thread(self._read_stage, data, loop, read_queue),
+            self._hash_stage(read_queue, embed_queue, write_queue),
+            embed_all(),
+            self._write_stage(write_queue),
+        )
+        # Erst am Ende: eine Datei ist erledigt, wenn weder die Datei noch einer ihrer Chunks fehlschlug
+        for key in self.seen - self.failed_keys:
+            self.ledger.resolve(*key)
+
+    def _read_stage(self, data: Iterable[Dict[str, str]], loop, read_queue: asyncio.Queue) -> None:
+        """Läuft im Thread: data kann ein Generator sein, der Dateien erst hier sucht und liest."""
+        try:
+            for item in data:
+                asyncio.run_coroutine_threadsafe(read_queue.put(item), loop).result()
+        finally:
+            asyncio.run_coroutine_threadsafe(read_queue.put(_DONE), loop).result()
+
+    def _units(self, item: Dict[str, str], content_hash: str) -> List[Dict]:
+        """
+        Einheiten, die für eine Datei neu eingebettet bzw. geschrieben werden müssen. text wird
+        gespeichert, embed_text eingebettet; embed_hash ist der Schlüssel im Embedding-Cache.
+        """
+        key = (item["root"], item["id"])
+        obj_info = extract_object_info(item["content"], item["filename"])
+        digest = EMBED_DIGEST and item["id"].lower().endswith(".al")
+        file_text = build_digest(item["content"]) if digest else item["content"]
+        units = []
+        if self.existing.get(key) != content_hash:
+            units.append({
+                "kind": "file",
+                "item": item,
+                "text": item["content"],
+                "embed_text": file_text,
+                "embed_hash": compute_content_hash(file_text),
+                "content_hash": content_hash,
+                "obj_info": obj_info,
+            })
+        if self.chunk_table is not None and self.existing_chunks.get(key) != content_hash:
+            if item["id"].lower().endswith(".al"):
+                chunks = chunk_al_object(item["content"])
+            else:
+                chunks = [ALChunk(0, item["content"], "header", 0)]
+            for chunk in chunks:
+                # Ein einzelner Chunk ist die ganze Datei und teilt sich deren Embedding
+                embed_text = file_text if len(chunks) == 1 else strip_boilerplate(chunk.content) if digest else chunk.content
+                units.append({
+                    "kind": "chunk",
+                    "item": item,
+                    "text": chunk.content,
+                    "embed_text": embed_text,
+                    "embed_hash": compute_content_hash(embed_text),
+                    "content_hash": compute_content_hash(chunk.content),
+                    "obj_info": obj_info,
+                    "chunk": chunk,
+                    "chunk_total": len(chunks),
+                    "parent_hash": content_hash,
+                })
+        return units
+
+    async def _hash_stage(self, read_queue: asyncio.Queue, embed_queue: asyncio.Queue, write_queue: asyncio.Queue) -> None:
+        while (item := await read_queue.get()) is not _DONE:
+            key = (item["root"], item["id"])
+            if key in self.seen:
+                # Z.B. aus dem Fehlerprotokoll nachgeholt und zugleich laut git diff geändert
+                continue
+            self.seen.add(key)
+            units = self._units(item, document_hash(item["content"]))
+            if not units:
+                self.skipped += 1
+                self.pbar.update(1)
+                continue
+            for unit in units:
+                await self._route(unit, embed_queue, write_queue)
+        if self._embed_batch:
+            await embed_queue.put(self._embed_batch)
+        for _ in range(self.workers):
+            await embed_queue.put(_DONE)
+
+    async def _route(self, unit: Dict, embed_queue: asyncio.Queue, write_queue: asyncio.Queue) -> None:
+        """Einheit an einen laufenden Request anhängen, aus dem Cache schreiben oder zum Einbetten sammeln."""
+        embed_hash = unit["embed_hash"]
+        if embed_hash in self.in_flight:
+            # Gleicher Inhalt ist schon unterwegs (z.B. dieselbe Datei in einem anderen Produkt)
+            self.in_flight[embed_hash].append(unit)
+            self.duplicates += 1
+            return
+        embedding = self.cache.get_many(self.backend.name, [embed_hash]).get(embed_hash)
+        if embedding:
+            self.cached += 1
+            await write_queue.put((unit, embedding))
+            return
+        self.in_flight[embed_hash] = [unit]
+        self.raw_tokens += estimate_tokens(unit["text"])
+        self.embed_tokens += estimate_tokens(unit["embed_text"])
+        self._embed_batch.append(unit)
+        if len(self._embed_batch) >= EMBED_BATCH_SIZE:
+            batch, self._embed_batch = self._embed_batch, []
+            await embed_queue.put(batch)
+
+    async def _warm_up(self) -> None:
+        # Modell erst laden, wenn wirklich etwas einzubetten ist, dann auf allen Endpunkten
+        async with self._warm_up_lock:
+            if not self.warmed:
+                await asyncio.to_thread(self.backend.warm_up)
+                self.warmed = True
+
+    async def _embed_stage(self, embed_queue: asyncio.Queue, write_queue: asyncio.Queue) -> None:
+        while (batch := await embed_queue.get()) is not _DONE:
+            await self._warm_up()
+            attempt = 0
+            while batch:
+                print(f"Generiere Embeddings für {len(batch)} Einheiten ab: {batch[0]['item']['filename']}")  # Logging
+                error = f"{self.backend.name} hat kein Embedding geliefert"
+                try:
+                    async with self.limiter.slot(units=len(batch)) as slot:
+                        embeddings = await asyncio.to_thread(self.backend.embed, [unit["embed_text"] for unit in batch])
+                        slot.ok = all(embedding is not None for embedding in embeddings)
+                except Exception as e:
+                    print(f"Fehler bei Verarbeitung: {e}")
+                    error = str(e)
+                    embeddings = [None] * len(batch)
+                await self._store_embedded(
+                    [(unit, embedding) for unit, embedding in zip(batch, embeddings) if embedding is not None], write_queue
+                )
+                batch = [unit for unit, embedding in zip(batch, embeddings) if embedding is None]
+                if not batch:
+                    break
+                attempt += 1
+                if attempt > EMBED_MAX_RETRIES:
+                    self._record_failures(batch, error)
+                    break
+                # Die Wartezeit hält nur diesen Worker auf, nicht den Platz im Limiter
+                delay = min(EMBED_RETRY_MAX_DELAY, EMBED_RETRY_DELAY * 2 ** (attempt - 1))
+                print(f"{len(batch)} Embeddings fehlgeschlagen, Versuch {attempt + 1}/{EMBED_MAX_RETRIES + 1} in {delay:.0f}s.")
+                self.retried += len(batch)
+                await asyncio.sleep(delay)
+
+    async def _store_embedded(self, results: List[Tuple[Dict, List[float]]], write_queue: asyncio.Queue) -> None:
+        if not results:
+            return
+        self.embedded += len(results)
+        # Erst in den Cache, dann aus in_flight: spätere Duplikate finden so immer eines von beiden
+        self.cache.put_many(self.backend.name, [(unit["embed_hash"], embedding) for unit, embedding in results])
+        for unit, embedding in results:
+            for waiting_unit in self.in_flight.pop(unit["embed_hash"]):
+                await write_queue.put((waiting_unit, embedding))
+
+    def _record_failures(self, units: List[Dict], error: str) -> None:
+        for unit in units:
+            for waiting_unit in self.in_flight.pop(unit["embed_hash"]):
+                item = waiting_unit["item"]
+                key = (item["root"], item["id"])
+                if key not in self.failed_keys:
+                    self.failed_keys.add(key)
+                    self.ledger.record(item["root"], item["id"], compute_content_hash(item["content"]), error)
+                    self.failed += 1
+                    self.pbar.update(1)
+
+    def _record_write_failures(self, rows: List[Dict], error: str) -> None:
+        """Dateien eines nicht geschriebenen Batches wie fehlgeschlagene Embeddings vermerken."""
+        self.write_failures += len(rows)
+        for row in rows:
+            key = (row["root"], row["id"])
+            if key not in self.failed_keys:
+                self.failed_keys.add(key)
+                self.ledger.record(row["root"], row["id"], row.get("parent_hash") or row["content_hash"], error)
+                self.failed += 1
+
+    async def _write_stage(self, write_queue: asyncio.Queue) -> None:
+        file_rows: List[Dict] = []
+        chunk_rows: List[Dict] = []
+        # (root, id) -> bereits eingebettete Chunks der Datei, bis alle da sind
+        pending_chunks: Dict[Tuple[str, str], List[Dict]] = defaultdict(list)
+        done = False
+        while not done:
+            entry = await write_queue.get()
+            done = entry is _DONE
+            if not done:
+                unit, embedding = entry
+                if unit["kind"] == "file":
+                    file_rows.append(vector_row(unit, embedding))
+                else:
+                    key = (unit["item"]["root"], unit["item"]["id"])
+                    pending_chunks[key].append(vector_row(unit, embedding))
+                    if len(pending_chunks[key]) == unit["chunk_total"]:
+                        chunk_rows.extend(pending_chunks.pop(key))
+            if file_rows and (done or len(file_rows) >= UPSERT_BATCH_SIZE):
+                try:
+                    await asyncio.to_thread(upsert_rows, self.table, file_rows)
+                    self.written += len(file_rows)
+                except Exception as e:
+                    print(f"Fehler beim Schreiben nach LanceDB: {e}")
+                    self._record_write_failures(file_rows, f"LanceDB: {e}")
+                self.pbar.update(len(file_rows))
+                file_rows = []
+            if chunk_rows and (done or len(chunk_rows) >= UPSERT_BATCH_SIZE):
+                try:
+                    await asyncio.to_thread(replace_chunks, self.chunk_table, chunk_rows)
+                    self.chunks_written += len(chunk_rows)
+                except Exception as e:
+                    print(f"Fehler beim Schreiben der Chunks nach LanceDB: {e}")
+                    self._record_write_failures(chunk_rows, f"LanceDB (Chunks): {e}")
+                chunk_rows = []
+        # Unvollständige Dateien (ein Chunk fehlgeschlagen) behalten ihre bisherigen Chunks
+
 # Vectorize Data
-def vectorize_data(data: List[Dict[str, str]]) -> None:
+def vectorize_data(
+    data: Iterable[Dict[str, str]],
+    deleted: Optional[Iterable[Tuple[str, str]]] = None,
+    complete_roots: Optional[Iterable[str]] = None,
+) -> bool:
     """
     Vectorize the provided data and store it in LanceDB.
 
     Args:
-        data (List[Dict[str, str]]): List of objects to vectorize.
+        data (Iterable[Dict[str, str]]): Objects to vectorize. Kann ein Generator sein (siehe
+            iter_collected_files), dann laufen Dateisuche und Lesen parallel zur Vektorisierung.
             Jeder Eintrag sollte zusätzlich 'filename' und 'directory' enthalten.
+            Der Schlüssel einer Zeile ist (root, id), id ist der Pfad relativ zum Root.
+        deleted: (root, id)-Paare gelöschter Dateien, deren Zeilen entfernt werden.
+        complete_roots: Roots, deren Dateien vollständig in data enthalten sind. Zeilen dieser
+            Roots ohne Datei in data werden entfernt.
+
+    Returns:
+        bool: False, wenn wegen eines veralteten Tabellenschemas abgebrochen wurde oder Zeilen
+            nicht nach LanceDB geschrieben werden konnten. Der Aufrufer darf seinen Stand der
+            Änderungserkennung dann nicht fortschreiben.
     """
     db = initialize_lancedb()
+    backend = get_backend()
+    table_name = backend.table_name("namespace_vectors")
+    chunk_table_name = backend.table_name(CHUNK_TABLE)
     
     # Use pyarrow.Schema instead of dict
     table_schema = pa.schema([
         ("id", pa.string()),
+        ("root", pa.string()),
         ("content", pa.string()),
-        ("embedding", pa.list_(pa.float32(), 1024)),  # mxbai-embed-large: 1024-dim
+        ("embedding", vector_type(backend.dim)),  # Dimension des Backends (mxbai-embed-large: 1024), Typ aus VECTOR_DTYPE
         ("filename", pa.string()),
         ("directory", pa.string()),
         ("content_hash", pa.string()),
@@ -102,207 +544,272 @@ def vectorize_data(data: List[Dict[str, str]]) -> None:
     
     try:
         # Try to open existing table
-        table = db.open_table("namespace_vectors")
+        table = db.open_table(table_name)
         # Prüfe, ob neue Spalten fehlen und gib ggf. einen Hinweis aus
         existing_fields = set(table.schema.names)
-        missing_fields = [field for field in ["object_id", "object_type", "object_name", "namespace"] if field not in existing_fields]
+        missing_fields = [field for field in ["root", "object_id", "object_type", "object_name", "namespace"] if field not in existing_fields]
         if missing_fields:
             print(f"FEHLER: Die Tabelle existiert bereits, aber folgende Felder fehlen: {missing_fields}.")
-            print("Bitte lösche die Tabelle 'namespace_vectors' in LanceDB und lasse das Skript erneut laufen, damit das Schema korrekt angelegt wird.")
+            print(f"Bitte lösche die Tabelle '{table_name}' in LanceDB und lasse das Skript erneut laufen, damit das Schema korrekt angelegt wird.")
             print("Alternativ: Migriere die Tabelle manuell mit den neuen Feldern.")
-            return  # Abbruch, um weitere Fehler zu vermeiden
+            return False  # Abbruch, um weitere Fehler zu vermeiden
+        if not check_vector_dtype(table):
+            return False
     except Exception:
         # Create new table if it doesn't exist
-        table = db.create_table("namespace_vectors", schema=table_schema)
+        table = db.create_table(table_name, schema=table_schema)
 
-    # Lade alle existierenden (filename, content_hash) Paare EINMALIG
-    existing_pairs = set()
-    try:
-        df = table.to_pandas()
-        existing_pairs = set(zip(df["filename"], df["content_hash"]))
-    except Exception:
-        pass  # Tabelle ist evtl. noch leer
-
-    start_time = time.time()
-    batch = []
-    batch_size = 64  # Passe die Batchgröße ggf. an
-    max_workers = 10  # Passe die Thread-Anzahl ggf. an
-
-    def embedding_task(item):
-        content_hash = compute_content_hash(item["content"])
-        pair = (item.get("filename", ""), content_hash)
-        if pair in existing_pairs:
-            return None  # Already exists, skip
-        filename = item.get("filename", "")
-        has_other_hash = any(f == filename and h != content_hash for (f, h) in existing_pairs)
-        # Extrahiere Objektinfos
-        obj_info = extract_object_info(item["content"], item["filename"])
-        return {
-            "item": item,
-            "content_hash": content_hash,
-            "pair": pair,
-            "filename": filename,
-            "has_other_hash": has_other_hash,
-            "obj_info": obj_info,
-        }
-
-    with tqdm(total=len(data), desc="Vektorisieren", unit="Dokument") as pbar:
-        # Schritt 1: Vorfiltern, was wirklich verarbeitet werden muss
-        filtered = []
-        skipped = 0
-        for item in data:
-            res = embedding_task(item)
-            if res:
-                filtered.append(res)
-            else:
-                skipped += 1
-                pbar.update(1)
-        total_to_process = len(filtered)
-        print(f"{skipped} Dateien übersprungen (bereits vorhanden), {total_to_process} zu vektorisieren.")
-
-        # Schritt 2: Embeddings parallel generieren
-        def embedding_worker(res):
-            print(f"Generiere Embedding für: {res['item']['filename']}")  # Logging
-            embedding = generate_embedding(res["item"]["content"])
-            return {**res, "embedding": embedding}
-
-        results = []
-        processed = 0
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            futures = [executor.submit(embedding_worker, res) for res in filtered]
-            for idx, future in enumerate(as_completed(futures), 1):
-                try:
-                    res = future.result()
-                    # Delete nur wenn nötig
-                    if res["has_other_hash"]:
-                        del_filter_str = f"filename = '{res['filename']}'"
-                        table.delete(where=del_filter_str)
-                    batch.append({
-                        "id": res["item"]["id"],
-                        "content": res["item"]["content"],
-                        "embedding": res["embedding"],
-                        "filename": res["filename"],
-                        "directory": res["item"].get("directory", ""),
-                        "content_hash": res["content_hash"],
-                        # Neue Felder:
-                        "object_id": res["obj_info"].get("object_id", ""),
-                        "object_type": res["obj_info"].get("object_type", ""),
-                        "object_name": res["obj_info"].get("object_name", ""),
-                        "namespace": res["obj_info"].get("namespace", ""),
-                    })
-                    existing_pairs.add(res["pair"])
-                    processed += 1
-                    # Batch-Insert
-                    if len(batch) >= batch_size:
-                        table.add(batch)
-                        batch.clear()
-                except Exception as e:
-                    print(f"Fehler bei Verarbeitung: {e}")
-                # Fortschritt nur alle 10 Schritte aktualisieren
-                if idx % 10 == 0 or idx == total_to_process:
-                    elapsed = time.time() - start_time
-                    avg_time = elapsed / idx
-                    remaining = avg_time * (total_to_process - idx)
-                    pbar.set_postfix_str(f"Ø {avg_time:.2f}s, Rest {remaining/60:.1f}min")
-                pbar.update(1)
-        # Restliche Einträge einfügen
-        if batch:
-            table.add(batch)
-            batch.clear()
-        print(f"{processed} Dateien vektorisiert und gespeichert.")
-
-def generate_embedding(content: str) -> List[float]:
-    """
-    Generate an embedding for the given content using the local Ollama instance.
+    chunk_table = None
+    existing_chunks = {}
+    if VECTORIZE_CHUNKS:
+        chunk_schema = pa.schema([
+            ("id", pa.string()),
+            ("root", pa.string()),
+            ("chunk_index", pa.int32()),
+            ("label", pa.string()),
+            ("start_line", pa.int32()),
+            ("content", pa.string()),
+            ("embedding", vector_type(backend.dim)),
+            ("filename", pa.string()),
+            ("directory", pa.string()),
+            ("content_hash", pa.string()),
+            ("parent_hash", pa.string()),
+            ("object_id", pa.string()),
+            ("object_type", pa.string()),
+            ("object_name", pa.string()),
+            ("namespace", pa.string()),
+        ])
+        try:
+            chunk_table = db.open_table(chunk_table_name)
+            if not check_vector_dtype(chunk_table):
+                return False
+        except Exception:
+            chunk_table = db.create_table(chunk_table_name, schema=chunk_schema)
+        existing_chunks = load_existing_hashes(chunk_table, "parent_hash")
 
-    Args:
-        content (str): The content to embed.
+    # Stand je Datei EINMALIG laden: (root, id) -> content_hash
+    existing = load_existing_hashes(table)
 
-    Returns:
-        List[float]: The embedding vector.
-    """
-    payload = {
-        "model": OLLAMA_MODEL,
-        "prompt": content
+    cache = EmbeddingCache()
+    ledger = FailureLedger()
+    # Parallele Batch-Requests: fest mit EMBED_WORKERS, sonst per AIMD in den Grenzen des Backends
+    if EMBED_WORKERS:
+        controller = AIMDController("Embeddings", EMBED_WORKERS, EMBED_WORKERS, EMBED_WORKERS)
+    else:
+        initial, maximum = backend.concurrency_limits()
+        controller = AIMDController("Embeddings", initial, maximum=maximum)
+    with tqdm(desc="Vektorisieren", unit="Dokument") as pbar:
+        pipeline = EmbeddingPipeline(
+            table, existing, cache, ledger, backend, controller, pbar, chunk_table, existing_chunks
+        )
+        try:
+            asyncio.run(pipeline.run(data))
+        finally:
+            cache.close()
+            ledger.save()
+    print(
+        f"{pipeline.skipped} Dateien übersprungen (unverändert). Einheiten (Dateien und Chunks): "
+        f"{pipeline.cached} aus dem Embedding-Cache, {pipeline.duplicates} mit identischem Inhalt übernommen, "
+        f"{pipeline.embedded} von {backend.name} eingebettet."
+    )
+    print(f"{pipeline.written} Dateien vektorisiert und gespeichert.")
+    if EMBED_DIGEST and pipeline.raw_tokens:
+        saved = pipeline.raw_tokens - pipeline.embed_tokens
+        print(
+            f"Embedding-Eingaben: ~{pipeline.embed_tokens} statt ~{pipeline.raw_tokens} Token, "
+            f"{saved} ({saved / pipeline.raw_tokens:.0%}) durch Digest und Bereinigung gespart."
+        )
+    if chunk_table is not None:
+        print(f"{pipeline.chunks_written} Chunks in {chunk_table_name} gespeichert.")
+    if pipeline.retried:
+        print(f"{pipeline.retried} Embeddings wurden im Lauf wiederholt.")
+    if pipeline.failed:
+        print(
+            f"WARNUNG: {pipeline.failed} Dateien ohne Embedding oder nicht gespeichert, vermerkt in "
+            f"{ledger.path}; sie werden beim nächsten Lauf zuerst erneut versucht."
+        )
+
+    deleted = set(deleted or [])
+    if complete_roots:
+        # Zeilen von Dateien, die im vollständigen Durchlauf eines Roots nicht mehr vorkamen
+        complete = {vector_root(root) for root in complete_roots}
+        deleted.update(key for key in existing if key[0] in complete and key not in pipeline.seen)
+        deleted.update(key for key in existing_chunks if key[0] in complete and key not in pipeline.seen)
+        # Einträge im Fehlerprotokoll zu Dateien, die es nicht mehr gibt
+        deleted.update(key for key in ledger.keys() if key[0] in complete and key not in pipeline.seen)
+    for key in deleted:
+        ledger.resolve(*key)
+    ledger.save()
+    if chunk_table is not None:
+        deleted_chunks = [key for key in deleted if key in existing_chunks]
+        if deleted_chunks:
+            delete_rows(chunk_table, deleted_chunks)
+    deleted = {key for key in deleted if key in existing}
+    if deleted:
+        delete_rows(table, deleted)
+        print(f"{len(deleted)} gelöschte Dateien aus LanceDB entfernt.")
+
+    # ANN-Index erst nach allen Schreib- und Löschoperationen anlegen bzw. nachführen
+    for indexed_table in (table, chunk_table):
+        if indexed_table is not None:
+            ensure_vector_index(indexed_table)
+
+    if pipeline.warmed:
+        print(controller.summary("Einheiten"))
+        backend.finish()
+        backend.report()
+    if pipeline.write_failures:
+        print(f"FEHLER: {pipeline.write_failures} Zeilen konnten nicht nach LanceDB geschrieben werden.")
+        return False
+    return True
+
+def read_file_entry(full_path: str, root_dir: str) -> Dict[str, str]:
+    """Lies eine Datei und baue den Eintrag (id, content, filename, directory, Objektinfos)."""
+    dirpath, fname = os.path.split(full_path)
+    with open(full_path, encoding="utf-8") as f:
+        content = f.read()
+    obj_info = extract_object_info(content, fname)
+    # Spezialfall: KVSKBA-Objekte -> Namespace aus übergeordnetem Verzeichnis
+    if obj_info.get("object_name", "").startswith("KVSKBA"):
+        # Hole das übergeordnete Verzeichnis (direkt über dem Dateinamen)
+        rel_dir = os.path.relpath(dirpath, root_dir)
+        # Namespace ist der letzte Teil des relativen Verzeichnispfads
+        ns_candidate = os.path.basename(rel_dir)
+        # Setze Namespace, falls nicht schon im Content gefunden
+        if not obj_info.get("namespace"):
+            obj_info["namespace"] = ns_candidate
+    return {
+        "id": os.path.relpath(full_path, root_dir),
+        "root": vector_root(root_dir),
+        "content": content,
+        "filename": fname,
+        "directory": os.path.relpath(dirpath, root_dir),
+        "object_id": obj_info.get("object_id", ""),
+        "object_type": obj_info.get("object_type", ""),
+        "object_name": obj_info.get("object_name", ""),
+        "namespace": obj_info.get("namespace", ""),
     }
-    try:
-        response = requests.post(OLLAMA_URL, json=payload, timeout=300)  # Timeout erhöht
-        response.raise_for_status()
-        result = response.json()
-        # Ollama gibt das Embedding unter "embedding" zurück
-        embedding = result.get("embedding")
-        if not embedding or not isinstance(embedding, list):
-            raise ValueError("No embedding returned from Ollama.")
-        return embedding
-    except Exception as e:
-        print(f"Error generating embedding: {e}")
-        return [0.0] * 1024  # Fallback auf Nullvektor
-
-def collect_files(root_dir: str, extensions: list) -> List[Dict[str, str]]:
+
+def iter_collected_files(root_dir: str, extensions: list, only: Optional[Set[str]] = None) -> Iterator[Dict[str, str]]:
     """
-    Sammelt rekursiv alle Dateien mit den angegebenen Extensions ab root_dir.
-    Gibt eine Liste von Dicts mit id, content, filename, directory zurück.
+    Sammelt rekursiv alle Dateien mit den angegebenen Extensions ab root_dir, als Stream.
+    Mit only (relative Pfade, z.B. aus git diff oder vom Watcher) werden nur diese Dateien gelesen.
+    Liefert Dicts mit id, root, content, filename, directory.
     """
-    result = []
     file_count = 0
     dir_count = 0
-    
-    print(f"Sammle Dateien mit Endungen {', '.join(extensions)}...")
-    
-    total_dirs = sum([len(dirpath) for dirpath, _, _ in os.walk(root_dir)])
-    
-    for dirpath, _, filenames in os.walk(root_dir):
-        dir_count += 1
-        if dir_count % 10 == 0:
-            print(f"Verarbeite Verzeichnis {dir_count}/{total_dirs}: {os.path.relpath(dirpath, root_dir)}")
-        
-        for fname in filenames:
-            if any(fname.lower().endswith(ext) for ext in extensions):
-                file_count += 1
-                full_path = os.path.join(dirpath, fname)
-                try:
-                    with open(full_path, encoding="utf-8") as f:
-                        content = f.read()
-                    obj_info = extract_object_info(content, fname)
-                    # Spezialfall: KVSKBA-Objekte -> Namespace aus übergeordnetem Verzeichnis
-                    if obj_info.get("object_name", "").startswith("KVSKBA"):
-                        # Hole das übergeordnete Verzeichnis (direkt über dem Dateinamen)
-                        rel_dir = os.path.relpath(dirpath, root_dir)
-                        # Namespace ist der letzte Teil des relativen Verzeichnispfads
-                        ns_candidate = os.path.basename(rel_dir)
-                        # Setze Namespace, falls nicht schon im Content gefunden
-                        if not obj_info.get("namespace"):
-                            obj_info["namespace"] = ns_candidate
-                    result.append({
-                        "id": os.path.relpath(full_path, root_dir),
-                        "content": content,
-                        "filename": fname,
-                        "directory": os.path.relpath(dirpath, root_dir),
-                        "object_id": obj_info.get("object_id", ""),
-                        "object_type": obj_info.get("object_type", ""),
-                        "object_name": obj_info.get("object_name", ""),
-                        "namespace": obj_info.get("namespace", ""),
-                    })
-                    
-                    if file_count % 50 == 0:
-                        print(f"Dateien gefunden: {file_count} (aktuell: {fname})")
-                        
-                except Exception as e:
-                    print(f"Fehler beim Lesen von {full_path}: {e}")
-    
+
+    if only is not None:
+        for rel_path in sorted(only):
+            full_path = os.path.join(root_dir, rel_path)
+            try:
+                entry = read_file_entry(full_path, root_dir)
+            except Exception as e:
+                print(f"Fehler beim Lesen von {full_path}: {e}")
+                continue
+            file_count += 1
+            yield entry
+        print(f"{file_count} geänderte Dateien gelesen in {root_dir}.")
+        return
+
+    print(f"Sammle Dateien mit Endungen {', '.join(extensions)} in {root_dir}...")
+
+    # Ein einziger Durchlauf; Verzeichnisse werden gezählt, sobald die erste Datei darin auftaucht
+    current_dir = None
+    for full_path in iter_files([root_dir], extensions):
+        dirpath, fname = os.path.split(full_path)
+        if dirpath != current_dir:
+            current_dir = dirpath
+            dir_count += 1
+            if dir_count % 10 == 0:
+                print(f"Verarbeite Verzeichnis {dir_count}: {os.path.relpath(dirpath, root_dir)}")
+        file_count += 1
+        try:
+            entry = read_file_entry(full_path, root_dir)
+        except Exception as e:
+            print(f"Fehler beim Lesen von {full_path}: {e}")
+            continue
+        if file_count % 50 == 0:
+            print(f"Dateien gefunden: {file_count} (aktuell: {fname})")
+        yield entry
+
     print(f"Dateisammlung abgeschlossen. Insgesamt {file_count} Dateien gefunden in {dir_count} Verzeichnissen.")
-    return result
+
+def collect_files(root_dir: str, extensions: list, only: Optional[Set[str]] = None) -> List[Dict[str, str]]:
+    """Wie iter_collected_files, aber als Liste."""
+    return list(iter_collected_files(root_dir, extensions, only))
+
+def base_app_roots() -> Optional[List[str]]:
+    """
+    BASE_APP_ROOTS in der Schreibweise von ROOT_DIRS. None, wenn ein Eintrag in ROOT_DIRS fehlt:
+    sonst würde ein Produkt-Root als Base Application ausgedünnt oder ein Root ohne Auswahl gelöscht.
+    """
+    configured = {vector_root(root_dir): root_dir for root_dir in ROOT_DIRS}
+    missing = [root for root in BASE_APP_ROOTS if vector_root(root) not in configured]
+    if missing:
+        print(f"FEHLER: BASE_APP_ROOTS nicht in ROOT_DIRS: {', '.join(missing)}")
+        return None
+    return [configured[vector_root(root)] for root in BASE_APP_ROOTS]
 
 def main():
-    all_data = []
+    sources = []
+    deleted = []
+    complete_roots = []
+    extensions = tuple(FILE_EXTENSION_FILTERS)
+    state = load_commit_state(VECTORIZER_STATE_FILE) if CHANGE_DETECTION == "git" else {}
+    snapshots = {}
+    reachable = {}
+    if VECTORIZE_BASE_APP == "reachable":
+        target_roots = base_app_roots()
+        if target_roots is None:
+            return
+        seed_roots = [root_dir for root_dir in ROOT_DIRS if root_dir not in target_roots]
+        reachable = reachable_ids(load_al_index(ROOT_DIRS, AL_INDEX_DIR), seed_roots, target_roots)
+    # Dateien, die im letzten Lauf kein Embedding bekommen haben, zuerst, unabhängig von git diff
+    ledger = FailureLedger()
+    for root_dir in ROOT_DIRS:
+        retry = {doc_id for doc_id in ledger.ids(vector_root(root_dir)) if os.path.exists(os.path.join(root_dir, doc_id))}
+        if retry:
+            print(f"{len(retry)} Dateien aus dem Fehlerprotokoll werden erneut vektorisiert: {root_dir}")
+            sources.append(iter_collected_files(root_dir, FILE_EXTENSION_FILTERS, only=retry))
     print("Starte Vektorisierung für folgende Verzeichnisse:")
     for root_dir in ROOT_DIRS:
         print(f"  - {root_dir} (nur {', '.join(FILE_EXTENSION_FILTERS)})")
-        data = collect_files(root_dir, FILE_EXTENSION_FILTERS)
-        print(f"{len(data)} Dateien gefunden in {root_dir}.")
-        all_data.extend(data)
-    print(f"Insgesamt {len(all_data)} Dateien gefunden. Starte Vektorisierung...")
-    vectorize_data(all_data)
+        if root_dir in reachable and not reachable[root_dir]:
+            # Leere Auswahl (z.B. Seed-Roots nicht im Index): bestehende Zeilen nicht löschen
+            print(f"WARNUNG: Keine erreichbaren Objekte in {root_dir}, Root wird in diesem Lauf übersprungen.")
+            continue
+        if root_dir in reachable:
+            # Vollständig im Sinne der Auswahl: nicht mehr erreichbare Objekte werden entfernt
+            print(f"Nur erreichbare Objekte: {len(reachable[root_dir])} Dateien.")
+            # Ohne Snapshot liest der nächste Lauf mit "full" wieder alle Dateien dieses Roots
+            state.pop(root_dir, None)
+            sources.append(iter_collected_files(root_dir, FILE_EXTENSION_FILTERS, only=reachable[root_dir]))
+            complete_roots.append(root_dir)
+            continue
+        changes = None
+        if CHANGE_DETECTION == "git":
+            # Snapshot vor dem Lesen, spätere Änderungen erscheinen im nächsten git diff
+            snapshots[root_dir] = git_snapshot(root_dir, extensions)
+            changes = changes_since(root_dir, state.get(root_dir), extensions)
+            if changes is None:
+                print("Kein verwertbarer Git-Stand vom letzten Lauf, alle Dateien werden gelesen.")
+        if changes is not None:
+            changed, deleted_paths = changes
+            print(f"Laut git diff: {len(changed)} geändert, {len(deleted_paths)} gelöscht.")
+            sources.append(iter_collected_files(root_dir, FILE_EXTENSION_FILTERS, only=changed))
+            deleted.extend((vector_root(root_dir), os.path.normpath(path)) for path in sorted(deleted_paths))
+        else:
+            sources.append(iter_collected_files(root_dir, FILE_EXTENSION_FILTERS))
+            complete_roots.append(root_dir)
+    print("Starte Vektorisierung, Dateien werden währenddessen gesucht und gelesen...")
+    # Die Roots werden nacheinander gestreamt, gelesen wird erst in der Pipeline
+    completed = vectorize_data(itertools.chain.from_iterable(sources), deleted, complete_roots)
+    if completed and CHANGE_DETECTION == "git":
+        state.update({root_dir: snapshot for root_dir, snapshot in snapshots.items() if snapshot})
+        save_commit_state(VECTORIZER_STATE_FILE, state)
+    elif CHANGE_DETECTION == "git":
+        print("Git-Stand wird nicht gespeichert, der nächste Lauf prüft dieselben Änderungen erneut.")
     print("Vektorisierung abgeschlossen.")
 
 if __name__ == "__main__":